@@ -15,6 +15,102 @@ st.set_page_config(
 # Initialize session state
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
+if 'conversation' not in st.session_state:
+    # Token-bounded memory for this browser session; chat_history is only for display
+    from src.agent.conversation_store import LocalConversationStore
+    st.session_state.conversation = LocalConversationStore()
+    st.session_state.conversation_id = f"streamlit:{datetime.utcnow().isoformat()}"
+
+
+# Cache accounting - shared across sessions so the debug panel shows real reuse
+@st.cache_resource
+def get_cache_stats():
+    return {}
+
+
+def track_cache(name, miss=False):
+    """Count a loader call (and whether it missed the cache)"""
+    stats = get_cache_stats().setdefault(name, {'calls': 0, 'misses': 0})
+    if miss:
+        stats['misses'] += 1
+    else:
+        stats['calls'] += 1
+
+
+def cached(loader, name, *args):
+    """Call a cached data loader and record the call for the debug panel"""
+    track_cache(name)
+    return loader(*args)
+
+
+# Clients - built once per server process instead of on every rerun
+@st.cache_resource
+def get_rag():
+    from src.agent.document_rag import DocumentRAG
+    return DocumentRAG()
+
+
+@st.cache_resource
+def get_contacts_manager():
+    from src.agent.contacts_manager import ContactsManager
+    return ContactsManager()
+
+
+@st.cache_resource
+def get_credentials_manager():
+    from src.agent.credentials_manager import CredentialsManager
+    return CredentialsManager()
+
+
+@st.cache_resource
+def get_note_session():
+    from src.notes.note_manager import NoteSession
+    return NoteSession()
+
+
+@st.cache_resource
+def get_transcriber():
+    from src.notes.voice_transcription import VoiceTranscriber
+    return VoiceTranscriber()
+
+
+# Data loaders - cached per page with TTLs; write actions clear the affected loader
+@st.cache_data(ttl=300, show_spinner=False)
+def load_calendar_events(days):
+    track_cache('calendar_events', miss=True)
+    from src.calendar.google_calendar import get_dashboard_events
+    return get_dashboard_events(days=days)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_pending_actions():
+    track_cache('pending_actions', miss=True)
+    return get_note_session().get_pending_actions()
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def load_credential_status(days):
+    track_cache('credential_status', miss=True)
+    return get_credentials_manager().get_status(days)
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def load_contacts():
+    track_cache('contacts', miss=True)
+    return get_contacts_manager().get_all_contacts()
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def load_documents():
+    track_cache('documents', miss=True)
+    return get_rag().list_documents()
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_document_answer(query):
+    track_cache('document_answer', miss=True)
+    return get_rag().query_with_answer(query)
+
 
 # Sidebar
 st.sidebar.title("🔥 CHIEF")
@@ -54,7 +150,12 @@ if page == "💬 Chat":
             with st.spinner("Thinking..."):
                 try:
                     from src.agent.orchestrator import process_message
-                    response = process_message(prompt)
+                    response = process_message(
+                        prompt,
+                        sender=st.session_state.conversation_id,
+                        store=st.session_state.conversation,
+                        recall=False
+                    )
                 except Exception as e:
                     response = f"Error: {str(e)}"
                 
@@ -66,51 +167,54 @@ elif page == "📅 Calendar":
     
     col1, col2 = st.columns([2, 1])
     
+    try:
+        events, upcoming = cached(load_calendar_events, 'calendar_events', 7)
+        calendar_error = None
+    except Exception as e:
+        events, upcoming, calendar_error = [], None, e
+    
     with col1:
         st.subheader("Today's Events")
-        try:
-            from src.calendar.google_calendar import get_todays_events, format_events_for_display
-            events = get_todays_events()
-            if events:
-                for event in events:
-                    start = event['start'].get('dateTime', event['start'].get('date'))
-                    if 'T' in start:
-                        dt = datetime.fromisoformat(start.replace('Z', '+00:00'))
-                        time_str = dt.strftime('%I:%M %p')
-                    else:
-                        time_str = 'All day'
-                    
-                    with st.container():
-                        st.markdown(f"**{time_str}** - {event.get('summary', 'No title')}")
-                        if event.get('location'):
-                            st.caption(f"📍 {event['location']}")
-            else:
-                st.info("No events scheduled for today.")
-        except Exception as e:
-            st.error(f"Error loading calendar: {e}")
+        if calendar_error:
+            st.error(f"Error loading calendar: {calendar_error}")
+        elif events:
+            for event in events:
+                start = event['start'].get('dateTime', event['start'].get('date'))
+                if 'T' in start:
+                    dt = datetime.fromisoformat(start.replace('Z', '+00:00'))
+                    time_str = dt.strftime('%I:%M %p')
+                else:
+                    time_str = 'All day'
+                
+                with st.container():
+                    st.markdown(f"**{time_str}** - {event.get('summary', 'No title')}")
+                    if event.get('location'):
+                        st.caption(f"📍 {event['location']}")
+        else:
+            st.info("No events scheduled for today.")
     
     with col2:
         st.subheader("This Week")
-        try:
-            from src.calendar.google_calendar import get_upcoming_events
-            upcoming = get_upcoming_events(days=7)
+        if upcoming is not None:
             st.metric("Events", len(upcoming))
-        except:
+        else:
             st.metric("Events", "—")
 
 elif page == "✅ Actions":
     st.title("✅ Pending Actions")
     
     try:
-        from src.notes.note_manager import NoteSession
-        notes = NoteSession()
-        actions = notes.get_pending_actions()
+        notes = get_note_session()
+        actions = cached(load_pending_actions, 'pending_actions')
         
         if actions:
             for action in actions:
                 col1, col2, col3 = st.columns([3, 1, 1])
                 with col1:
-                    st.checkbox(action['description'], key=action['PK'])
+                    if st.checkbox(action['description'], key=action['PK']):
+                        notes.complete_action(action['PK'].replace('ACTION#', ''))
+                        load_pending_actions.clear()
+                        st.rerun()
                 with col2:
                     st.caption(action.get('due_date', 'No due date'))
                 with col3:
@@ -131,30 +235,33 @@ elif page == "✅ Actions":
     new_action = st.text_input("New action item")
     if st.button("Add Action"):
         if new_action:
-            st.success(f"Added: {new_action}")
+            try:
+                from src.agent.state import detect_workspace
+                get_note_session().save_action({'description': new_action}, detect_workspace(new_action))
+                load_pending_actions.clear()
+                st.success(f"Added: {new_action}")
+            except Exception as e:
+                st.error(f"Error adding action: {e}")
 
 elif page == "📚 Credentials":
     st.title("📚 Professional Development")
     
     try:
-        from src.agent.credentials_manager import CredentialsManager
-        cm = CredentialsManager()
-        
         # Summary metrics
-        credentials = cm.get_all_credentials()
-        active = len([c for c in credentials if c.get('status') == 'active'])
-        in_progress = len([c for c in credentials if c.get('status') == 'in_progress'])
+        # One query; counts, CEU progress and expirations computed together
+        status = cached(load_credential_status, 'credential_status', 90)
+        credentials = status['credentials']
         
         col1, col2, col3 = st.columns(3)
-        col1.metric("Active", active)
-        col2.metric("In Progress", in_progress)
-        col3.metric("Expiring Soon", len(cm.get_expiring_soon(90)))
+        col1.metric("Active", status['active'])
+        col2.metric("In Progress", status['in_progress'])
+        col3.metric("Expiring Soon", len(status['expiring']))
         
         st.markdown("---")
         
         # CEU Progress
         st.subheader("CEU Progress")
-        for ceu in cm.get_ceu_status():
+        for ceu in status['ceu_status']:
             st.write(f"**{ceu['name']}**")
             st.progress(ceu['percent'] / 100)
             st.caption(f"{ceu['earned']}/{ceu['required']} CEUs ({ceu['remaining']} remaining)")
@@ -180,15 +287,15 @@ elif page == "👥 Contacts":
     st.title("👥 Key Contacts")
     
     try:
-        from src.agent.contacts_manager import ContactsManager, TONE_PROFILES
-        contacts = ContactsManager()
-        all_contacts = contacts.get_all_contacts()
+        from src.agent.contacts_manager import TONE_PROFILES
+        all_contacts = cached(load_contacts, 'contacts')
         
         # Search
         search = st.text_input("🔍 Search contacts")
         
         if search:
-            all_contacts = [c for c in all_contacts if search.lower() in c.get('name', '').lower() or search.lower() in c.get('organization', '').lower()]
+            # In-memory index: fuzzy, ranked, and no DynamoDB round trip per keystroke
+            all_contacts = get_contacts_manager().search_contacts(search, limit=50)
         
         for contact in all_contacts:
             with st.expander(f"**{contact['name']}** - {contact['role']}"):
@@ -202,10 +309,14 @@ elif page == "👥 Contacts":
                 if contact.get('notes'):
                     st.write(f"**Notes:** {contact['notes']}")
                 
-                if contact.get('interactions'):
-                    st.write("**Recent Interactions:**")
-                    for i in contact['interactions'][-3:]:
-                        st.caption(f"  {i['date']} - {i['type']}: {i['summary']}")
+                if contact.get('last_interaction_type'):
+                    st.write(f"**Last Interaction:** {contact['last_interaction']} - "
+                             f"{contact['last_interaction_type']}: {contact['last_interaction_summary']}")
+                    
+                    if st.button("Show history", key=f"history_{contact['SK']}"):
+                        history = get_contacts_manager().get_interactions(contact['name'], limit=10)
+                        for i in history['items']:
+                            st.caption(f"  {i['date']} - {i['type']}: {i['summary']}")
     except Exception as e:
         st.error(f"Error loading contacts: {e}")
 
@@ -213,11 +324,8 @@ elif page == "📄 Documents":
     st.title("📄 Document Search")
     
     try:
-        from src.agent.document_rag import DocumentRAG
-        rag = DocumentRAG()
-        
         # List documents
-        docs = rag.list_documents()
+        docs = cached(load_documents, 'documents')
         st.caption(f"{len(docs)} documents indexed")
         
         # Search
@@ -225,7 +333,7 @@ elif page == "📄 Documents":
         
         if query:
             with st.spinner("Searching..."):
-                result = rag.query_with_answer(query)
+                result = cached(load_document_answer, 'document_answer', query)
             
             st.subheader("Answer")
             st.write(result['answer'])
@@ -257,15 +365,16 @@ elif page == "🎤 Voice Notes":
             with st.spinner("Transcribing..."):
                 try:
                     import tempfile
-                    from src.notes.voice_transcription import VoiceTranscriber
                     
                     # Save uploaded file temporarily
                     with tempfile.NamedTemporaryFile(delete=False, suffix='.mp3') as tmp:
                         tmp.write(uploaded_file.read())
                         tmp_path = tmp.name
                     
-                    transcriber = VoiceTranscriber()
+                    transcriber = get_transcriber()
                     result = transcriber.transcribe_and_process(tmp_path, source_type='file')
+                    # Extracted action items were written - the Actions page must not show the cached list
+                    load_pending_actions.clear()
                     
                     st.subheader("Transcript")
                     st.write(result['transcript'])
@@ -279,10 +388,24 @@ elif page == "🎤 Voice Notes":
                     
                     st.subheader("Summary")
                     st.write(result['summary'])
-                    
+                
                 except Exception as e:
                     st.error(f"Error: {e}")
 
+# Cache debug panel
+with st.sidebar.expander("🛠️ Cache debug"):
+    stats = get_cache_stats()
+    if stats:
+        for name, counts in sorted(stats.items()):
+            hits = counts['calls'] - counts['misses']
+            st.caption(f"{name}: {hits} hits / {counts['misses']} misses")
+    else:
+        st.caption("No cached loads yet")
+    if st.button("Clear data cache"):
+        st.cache_data.clear()
+        stats.clear()
+        st.rerun()
+
 # Footer
 st.sidebar.markdown("---")
 st.sidebar.caption("Built with ❤️ for Chief Steven")
@@ -3,11 +3,19 @@ import json
 import boto3
 import urllib.parse
 from src.agent.orchestrator import process_message
+from src.agent.conversation_recall import flush_pending
+from src.utils.tracing import trace_request, span, payload_size, instrument_boto3
+from src.utils.usage import flush_usage
+from src.utils.call_policy import deadline_from_context, AWS_CONFIG, TWILIO_TIMEOUT
+
+
+# Time every Secrets Manager / DynamoDB call made during a request
+instrument_boto3()
 
 
 def get_twilio_client():
     """Get Twilio credentials from Secrets Manager"""
-    secrets = boto3.client('secretsmanager', region_name='us-east-1')
+    secrets = boto3.client('secretsmanager', region_name='us-east-1', config=AWS_CONFIG)
     response = secrets.get_secret_value(SecretId='chief/twilio-credentials')
     return json.loads(response['SecretString'])
 
@@ -15,15 +23,19 @@ def get_twilio_client():
 def send_sms(to_number: str, message: str):
     """Send SMS via Twilio"""
     from twilio.rest import Client
+    from twilio.http.http_client import TwilioHttpClient
     
     creds = get_twilio_client()
-    client = Client(creds['account_sid'], creds['auth_token'])
-    
-    client.messages.create(
-        body=message,
-        from_=creds['phone_number'],
-        to=to_number
-    )
+    client = Client(creds['account_sid'], creds['auth_token'],
+                    http_client=TwilioHttpClient(timeout=TWILIO_TIMEOUT))
+    
+    with span('twilio.messages', bytes_in=payload_size(message)) as s:
+        sent = client.messages.create(
+            body=message,
+            from_=creds['phone_number'],
+            to=to_number
+        )
+        s.set(request_id=getattr(sent, 'sid', None))
 
 
 def handle_incoming_sms(event, context):
@@ -45,8 +57,8 @@ def handle_incoming_sms(event, context):
             'body': 'No message body'
         }
     
-    # Process the message
-    response_text = process_message(message_body)
+    # Process the message with this sender's conversation memory
+    response_text = process_message(message_body, sender=from_number)
     
     # Send response back via SMS
     send_sms(from_number, response_text)
@@ -60,29 +72,14 @@ def handle_incoming_sms(event, context):
 
 
 def handle_scheduled_briefing(event, context):
-    """Handle scheduled morning/EOD briefings"""
-    from src.calendar.google_calendar import get_todays_events, format_events_for_display
+    """Handle scheduled morning/EOD briefings - refreshes the briefing snapshot and sends it"""
+    from src.agent.briefing import refresh_snapshot
     
     briefing_type = event.get('briefing_type', 'morning')
     
-    # Get today's events
-    events = get_todays_events()
-    events_text = format_events_for_display(events)
-    
-    if briefing_type == 'morning':
-        message = f"""Good morning, Chief.
-
-📅 TODAY'S CALENDAR:
-{events_text}
-
-Reply with any questions or 'note' to start taking notes."""
-    else:
-        message = f"""EOD Summary
-
-📅 TOMORROW'S PREVIEW:
-{events_text}
-
-Anything else to capture before end of day?"""
+    # Gather all sources in parallel and store the snapshot for on-demand requests
+    snapshot = refresh_snapshot(briefing_type)
+    message = snapshot['text']
     
     # Get user phone number from environment or secrets
     creds = get_twilio_client()
@@ -97,16 +94,41 @@ Anything else to capture before end of day?"""
     }
 
 
+def finish_invocation():
+    """Work that must finish before Lambda freezes the process
+    
+    Recall indexing runs first, because it records embedding usage of its own.
+    """
+    flush_pending()
+    flush_usage()
+
+
 def lambda_handler(event, context):
-    """Main Lambda entry point - routes to appropriate handler"""
+    """Main Lambda entry point - routes to appropriate handler
+    
+    Each invocation is one trace; its per-service timings are logged as a
+    single EMF line when the handler returns. Model and API calls share a
+    deadline taken from the invocation's remaining time.
+    """
+    request_id = getattr(context, 'aws_request_id', None)
     
     # Check if this is a scheduled event
     if event.get('source') == 'aws.events':
-        return handle_scheduled_briefing(event, context)
+        with trace_request('briefing', request_id, briefing_type=event.get('briefing_type', 'morning')), \
+                deadline_from_context(context):
+            try:
+                return handle_scheduled_briefing(event, context)
+            finally:
+                finish_invocation()
     
     # Check if this is an API Gateway event (SMS webhook)
     if event.get('httpMethod') == 'POST':
-        return handle_incoming_sms(event, context)
+        with trace_request('sms', request_id, bytes_in=payload_size(event.get('body'))), \
+                deadline_from_context(context):
+            try:
+                return handle_incoming_sms(event, context)
+            finally:
+                finish_invocation()
     
     return {
         'statusCode': 400,
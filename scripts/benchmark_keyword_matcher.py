@@ -0,0 +1,156 @@
+"""Micro-benchmark: compiled keyword matcher vs the original substring scans"""
+import sys
+import time
+import random
+sys.path.insert(0, '.')
+
+from src.agent.state import WORKSPACE_RULES, detect_workspace, match_keywords
+from src.agent.orchestrator import ChiefOrchestrator
+
+
+def legacy_detect_workspace(text):
+    """Original nested substring loop"""
+    text_lower = text.lower()
+    
+    matches = []
+    for workspace, rules in WORKSPACE_RULES.items():
+        for keyword in rules["keywords"]:
+            if keyword.rstrip('*') in text_lower:
+                matches.append((workspace, rules["priority"]))
+                break
+    
+    if matches:
+        matches.sort(key=lambda x: x[1])
+        return matches[0][0]
+    
+    return "operations"
+
+
+def legacy_classify_intent(user_input):
+    """Original any(word in input_lower) scans"""
+    input_lower = user_input.lower()
+    
+    if any(word in input_lower for word in ["calendar", "schedule", "meeting", "event", "free", "busy", "block"]):
+        if any(word in input_lower for word in ["what", "show", "today", "tomorrow", "week"]):
+            return "calendar_query"
+        elif any(word in input_lower for word in ["schedule", "create", "add", "block"]):
+            return "calendar_create"
+        elif any(word in input_lower for word in ["move", "reschedule", "cancel"]):
+            return "calendar_modify"
+    
+    if any(word in input_lower for word in ["note", "taking notes", "remember", "action item"]):
+        if any(word in input_lower for word in ["start", "taking", "begin"]):
+            return "note_start"
+        elif any(word in input_lower for word in ["done", "end", "stop", "finish"]):
+            return "note_end"
+        else:
+            return "note_add"
+    
+    if any(word in input_lower for word in ["brief", "summary", "status", "update"]):
+        return "briefing"
+    
+    return "conversation"
+
+
+FILLER = ("the a to for with about please can you I we need on at by from and of in my our "
+          "recommend attend abacba legend describe tremendous probably calendars scheduling "
+          "meetings notes started friend weekend stations").split()
+
+KEYWORDS = [k.rstrip('*') for rules in WORKSPACE_RULES.values() for k in rules["keywords"]] + [
+    "calendar", "schedule", "meeting", "what", "today", "tomorrow", "create", "move",
+    "note", "start", "done", "brief", "status", "update", "remember"
+]
+
+
+# Real messages the matcher must route the same way the substring scan did
+# (plurals and compounds the word-boundary matcher once missed), with the
+# intent each must classify as where that has regressed before
+ROUTING_CHECKS = [
+    ("Meetings with the unions tomorrow", None),
+    ("The councilmembers want the budget", None),
+    ("Both councils meet next week", None),
+    ("Staffing at the stations over the holidays", None),
+    ("Swap shifts with B crew", None),
+    ("Call the vendors about the cardiac monitors", None),
+    ("Book the conferences for the spring", None),
+    ("Move my appointments to Friday", None),
+    ("Commissioners asked about response times", None),
+    ("The kids have a half day", None),
+    ("What's on my schedule today?", "calendar_query"),
+    ("Schedule a meeting with the union tomorrow", "calendar_create"),
+]
+
+
+def check_routing():
+    """Disagreements on ROUTING_CHECKS: workspace vs the substring scan, intent vs the expected one"""
+    orchestrator = ChiefOrchestrator.__new__(ChiefOrchestrator)  # no API client needed
+    disagreements = []
+    for text, intent in ROUTING_CHECKS:
+        legacy, new = legacy_detect_workspace(text), detect_workspace(text)
+        if legacy != new:
+            disagreements.append((text, f"substring -> {legacy}", f"compiled -> {new}"))
+        classified = orchestrator.classify_intent(text)
+        if intent and classified != intent:
+            disagreements.append((text, f"expected {intent}", f"classified {classified}"))
+    return disagreements
+
+
+def make_corpus(size, seed=7):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        words = rng.choices(FILLER, k=rng.randint(6, 40))
+        for _ in range(rng.randint(0, 3)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(KEYWORDS))
+        corpus.append(' '.join(words))
+    return corpus
+
+
+def timed(label, func, corpus):
+    start = time.perf_counter()
+    results = [func(text) for text in corpus]
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<32} {elapsed * 1000:8.1f} ms  {len(corpus) / elapsed:12,.0f} msg/s")
+    return results
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    corpus = make_corpus(size)
+    orchestrator = ChiefOrchestrator.__new__(ChiefOrchestrator)  # no API client needed
+    
+    print(f"Keyword matcher benchmark ({size:,} messages)")
+    print("=" * 60)
+    
+    legacy_ws = timed("legacy detect_workspace", legacy_detect_workspace, corpus)
+    legacy_intent = timed("legacy classify_intent", legacy_classify_intent, corpus)
+    timed("legacy both", lambda t: (legacy_detect_workspace(t), legacy_classify_intent(t)), corpus)
+    
+    new_ws = timed("compiled detect_workspace", detect_workspace, corpus)
+    new_intent = timed("compiled classify_intent", orchestrator.classify_intent, corpus)
+    
+    def both(text):
+        hits = match_keywords(text)
+        return detect_workspace(text, hits), orchestrator.classify_intent(text, hits)
+    timed("compiled both (one pass)", both, corpus)
+    
+    ws_diff = sum(a != b for a, b in zip(legacy_ws, new_ws))
+    intent_diff = sum(a != b for a, b in zip(legacy_intent, new_intent))
+    print(f"\n  Workspace differs on {ws_diff:,} messages, intent on {intent_diff:,}")
+    print("  (differences are substring hits the word-boundary matcher no longer counts)")
+    
+    examples = [t for t, a, b in zip(corpus, legacy_ws, new_ws) if a != b][:3]
+    for text in examples:
+        print(f"    e.g. {text[:70]!r}")
+    
+    disagreements = check_routing()
+    failed = {text for text, _, _ in disagreements}
+    print(f"\n  Routing checks: {len(ROUTING_CHECKS) - len(failed)}/{len(ROUTING_CHECKS)} agree")
+    for text, expected, got in disagreements:
+        print(f"    {text!r}: {expected}, {got}")
+    if disagreements:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
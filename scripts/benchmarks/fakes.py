@@ -0,0 +1,405 @@
+"""Local stand-ins for every external service CHIEF calls
+
+- DynamoDB and Secrets Manager: moto (`pip install "moto[dynamodb,secretsmanager]>=5"`)
+- Qdrant: qdrant-client's local `:memory:` mode, one instance per run
+- Anthropic, OpenAI (embeddings + Whisper), Google Calendar and Twilio:
+  hand-rolled clients returning canned responses
+
+Every fake sleeps for its service's configured latency before answering,
+so a run with Latency.none() measures CHIEF's own overhead and a run with
+Latency.realistic() approximates production timings.
+"""
+import os
+import sys
+import json
+import math
+import time
+import uuid
+import random
+import hashlib
+import tempfile
+import contextlib
+import types
+from datetime import datetime, timedelta, timezone
+
+
+EMBED_DIM = 1536
+
+# Milliseconds per call, roughly what CHIEF sees from us-east-1
+REALISTIC_MS = {
+    'dynamodb': 8,
+    'secretsmanager': 25,
+    'qdrant': 30,
+    'embeddings': 120,
+    'anthropic': 900,
+    'whisper': 1500,
+    'calendar': 180,
+    'twilio': 250,
+}
+
+
+class Latency:
+    """Per-service delay in milliseconds, with optional +/- jitter (fraction)"""
+    
+    def __init__(self, ms=None, jitter=0.0, seed=7):
+        self.ms = dict.fromkeys(REALISTIC_MS, 0)
+        self.ms.update(ms or {})
+        self.jitter = jitter
+        self.rng = random.Random(seed)
+    
+    @classmethod
+    def none(cls):
+        return cls()
+    
+    @classmethod
+    def realistic(cls, jitter=0.2):
+        return cls(REALISTIC_MS, jitter=jitter)
+    
+    @classmethod
+    def parse(cls, spec, jitter=0.0):
+        """'realistic', 'none' or 'anthropic=800,dynamodb=5' (unlisted services are 0)"""
+        if spec in (None, '', 'none'):
+            return cls(jitter=jitter)
+        if spec == 'realistic':
+            return cls(REALISTIC_MS, jitter=jitter)
+        ms = {}
+        for part in spec.split(','):
+            service, value = part.split('=')
+            if service.strip() not in REALISTIC_MS:
+                raise ValueError(f"Unknown service {service!r}; expected one of {', '.join(REALISTIC_MS)}")
+            ms[service.strip()] = float(value)
+        return cls(ms, jitter=jitter)
+    
+    def sleep(self, service):
+        delay = self.ms.get(service, 0)
+        if delay <= 0:
+            return
+        if self.jitter:
+            delay *= 1 + self.rng.uniform(-self.jitter, self.jitter)
+        time.sleep(delay / 1000)
+
+
+def embed_text(text, dim=EMBED_DIM):
+    """Deterministic bag-of-words vector, so similar texts land near each other"""
+    vector = [0.0] * dim
+    for word in text.lower().split():
+        digest = hashlib.blake2b(word.strip('.,?!:;"\'()').encode(), digest_size=8).digest()
+        vector[int.from_bytes(digest[:4], 'little') % dim] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+# --- Anthropic ---------------------------------------------------------------
+
+# Agent turns that mention these words ask for one tool round first
+TOOL_TRIGGERS = [
+    (('policy', 'sop', 'procedure'), 'search_documents', lambda text: {'query': text}),
+    (('who is', 'contact'), 'search_contacts', lambda text: {'query': text.split()[-1].strip('?')}),
+    (('meeting notes', 'we decide'), 'search_notes', lambda text: {'query': text}),
+]
+
+
+def _text_block(text):
+    return types.SimpleNamespace(type='text', text=text)
+
+
+def _message(blocks, stop_reason, prompt):
+    return types.SimpleNamespace(
+        id=f"msg_{uuid.uuid4().hex[:12]}",
+        content=blocks,
+        stop_reason=stop_reason,
+        usage=types.SimpleNamespace(input_tokens=len(prompt) // 4, output_tokens=60),
+        _request_id=f"req_{uuid.uuid4().hex[:12]}"
+    )
+
+
+class FakeMessages:
+    def __init__(self, latency):
+        self.latency = latency
+    
+    def create(self, model, max_tokens, messages, system='', tools=None, tool_choice=None, **kwargs):
+        self.latency.sleep('anthropic')
+        prompt = system + json.dumps(messages, default=str)
+        last = messages[-1]['content']
+        
+        if 'Extract action items' in system:
+            return _message([_text_block(json.dumps([{
+                'description': 'Follow up on the discussed item',
+                'assignee': None,
+                'due_date': (datetime.utcnow() + timedelta(days=3)).date().isoformat(),
+                'priority': 'medium'
+            }]))], 'end_turn', prompt)
+        if 'Summarize' in system or 'running summary' in system:
+            return _message([_text_block("- Discussed staffing and budget\n- Follow-ups assigned")], 'end_turn', prompt)
+        
+        # First agent turn: request a tool if the message calls for one
+        allow_tools = tools and (tool_choice or {}).get('type') != 'none'
+        if allow_tools and isinstance(last, str):
+            lowered = last.lower()
+            for words, name, make_input in TOOL_TRIGGERS:
+                if any(word in lowered for word in words):
+                    block = types.SimpleNamespace(type='tool_use', id=f"toolu_{uuid.uuid4().hex[:12]}",
+                                                  name=name, input=make_input(last))
+                    return _message([_text_block("Let me check."), block], 'tool_use', prompt)
+        
+        return _message([_text_block("Understood, Chief. Here's what I have on that.")], 'end_turn', prompt)
+
+
+class FakeAnthropic:
+    def __init__(self, latency, **kwargs):
+        self.messages = FakeMessages(latency)
+
+
+# --- OpenAI ------------------------------------------------------------------
+
+class FakeEmbeddings:
+    def __init__(self, latency):
+        self.latency = latency
+    
+    def create(self, model, input, **kwargs):
+        self.latency.sleep('embeddings')
+        texts = [input] if isinstance(input, str) else input
+        return types.SimpleNamespace(
+            data=[types.SimpleNamespace(index=i, embedding=embed_text(text)) for i, text in enumerate(texts)],
+            usage=types.SimpleNamespace(prompt_tokens=sum(len(t) // 4 for t in texts),
+                                        total_tokens=sum(len(t) // 4 for t in texts))
+        )
+
+
+class FakeTranscriptions:
+    TEXT = "Staffing at Station 72 is short two medics on B shift. Chief to send the overtime memo by Friday."
+    
+    def __init__(self, latency):
+        self.latency = latency
+    
+    def create(self, model, file, response_format='json', **kwargs):
+        self.latency.sleep('whisper')
+        if response_format == 'text':
+            return self.TEXT
+        return types.SimpleNamespace(
+            text=self.TEXT,
+            segments=[types.SimpleNamespace(start=0.0, end=5.0, text=self.TEXT)]
+        )
+
+
+class FakeOpenAI:
+    def __init__(self, latency, **kwargs):
+        self.embeddings = FakeEmbeddings(latency)
+        self.audio = types.SimpleNamespace(transcriptions=FakeTranscriptions(latency))
+
+
+# --- Qdrant ------------------------------------------------------------------
+
+class SlowProxy:
+    """Wraps a client so every method call first sleeps for the service latency"""
+    
+    def __init__(self, target, latency, service):
+        self._target = target
+        self._latency = latency
+        self._service = service
+    
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        
+        def call(*args, **kwargs):
+            self._latency.sleep(self._service)
+            return attr(*args, **kwargs)
+        return call
+
+
+def make_qdrant(latency):
+    from qdrant_client import QdrantClient
+    from qdrant_client.models import Distance, VectorParams
+    
+    client = QdrantClient(":memory:")
+    for name in ("conversations", "notes", "documents", "contacts"):
+        client.create_collection(collection_name=name,
+                                 vectors_config=VectorParams(size=EMBED_DIM, distance=Distance.COSINE))
+    return SlowProxy(client, latency, 'qdrant')
+
+
+# --- Google Calendar -----------------------------------------------------------
+
+class _Request:
+    def __init__(self, latency, result):
+        self.latency = latency
+        self.result = result
+    
+    def execute(self):
+        self.latency.sleep('calendar')
+        return self.result() if callable(self.result) else self.result
+
+
+class FakeCalendarService:
+    """events().list/insert and freebusy().query over a fixed set of events"""
+    
+    def __init__(self, latency, events_per_day=6, days=14):
+        self.latency = latency
+        self.items = []
+        start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=2)
+        for day in range(days):
+            for slot in range(events_per_day):
+                begin = start + timedelta(days=day, hours=8 + slot * 1.5)
+                self.items.append({
+                    'id': f"evt{day:02d}{slot:02d}",
+                    'status': 'confirmed',
+                    'summary': f"Meeting {slot + 1}",
+                    'location': 'Station 72' if slot % 3 == 0 else None,
+                    'start': {'dateTime': begin.isoformat()},
+                    'end': {'dateTime': (begin + timedelta(hours=1)).isoformat()}
+                })
+    
+    def events(self):
+        return self
+    
+    def freebusy(self):
+        return types.SimpleNamespace(query=self._freebusy)
+    
+    def list(self, calendarId, **params):
+        # Incremental syncs (syncToken) see no changes
+        items = [] if params.get('syncToken') else self.items
+        return _Request(self.latency, {'items': items, 'nextSyncToken': f"sync-{uuid.uuid4().hex[:8]}"})
+    
+    def insert(self, calendarId, body):
+        return _Request(self.latency, lambda: dict(body, id=uuid.uuid4().hex[:12], status='confirmed'))
+    
+    def _freebusy(self, body):
+        busy = [{'start': e['start']['dateTime'], 'end': e['end']['dateTime']} for e in self.items]
+        return _Request(self.latency, {'calendars': {item['id']: {'busy': busy} for item in body['items']}})
+
+
+# --- Twilio ------------------------------------------------------------------
+
+class FakeTwilioClient:
+    sent = []
+    
+    def __init__(self, account_sid, auth_token, latency=None):
+        self.latency = latency
+        self.messages = self
+    
+    def create(self, body, from_, to):
+        self.latency.sleep('twilio')
+        FakeTwilioClient.sent.append((to, body))
+        return types.SimpleNamespace(sid=f"SM{uuid.uuid4().hex}")
+
+
+# --- AWS (moto) ----------------------------------------------------------------
+
+SECRETS = {
+    'chief/anthropic-api-key': {'api_key': 'bench'},
+    'chief/openai-api-key': {'api_key': 'bench'},
+    'chief/qdrant-credentials': {'url': 'http://localhost:6333', 'api_key': 'bench'},
+    'chief/twilio-credentials': {'account_sid': 'AC0', 'auth_token': 'bench',
+                                 'phone_number': '+15550000000', 'user_phone_number': '+15550000001'},
+}
+
+def create_aws_resources():
+    import boto3
+    from setup_dynamodb import TABLES, table_definition
+    
+    dynamodb = boto3.client('dynamodb', region_name='us-east-1')
+    for table, indexes in TABLES.items():
+        dynamodb.create_table(**table_definition(table, indexes))
+    
+    secrets = boto3.client('secretsmanager', region_name='us-east-1')
+    for name, value in SECRETS.items():
+        secrets.create_secret(Name=name, SecretString=json.dumps(value))
+
+
+def _delay_aws(latency):
+    def before_call(model, **kwargs):
+        latency.sleep(model.service_model.endpoint_prefix)
+    return before_call
+
+
+@contextlib.contextmanager
+def offline_services(latency=None, seed=True):
+    """Patch every external client with a fake for the duration of the block
+    
+    Yields a namespace with the fakes (qdrant, calendar, twilio outbox).
+    """
+    latency = latency or Latency.none()
+    
+    os.environ.update({
+        'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing',
+        'AWS_SESSION_TOKEN': 'testing', 'AWS_DEFAULT_REGION': 'us-east-1',
+    })
+    workdir = tempfile.mkdtemp(prefix='chief-bench-')
+    os.environ['CHIEF_CALENDAR_DB'] = os.path.join(workdir, 'calendar.db')
+    
+    try:
+        from moto import mock_aws
+    except ImportError:
+        sys.exit('The benchmarks need moto >= 5: pip install "moto[dynamodb,secretsmanager]"')
+    
+    with mock_aws(), contextlib.ExitStack() as patches:
+        import boto3
+        boto3.setup_default_session()
+        boto3.DEFAULT_SESSION.events.register('before-call', _delay_aws(latency), unique_id='chief-bench-latency')
+        create_aws_resources()
+        
+        import anthropic
+        import openai
+        import qdrant_client
+        from src.agent import orchestrator, document_rag, conversation_store, conversation_recall
+        from src.notes import note_manager, voice_transcription
+        from src.calendar import google_calendar, batch_writes
+        
+        def patch(target, name, value):
+            original = getattr(target, name)
+            setattr(target, name, value)
+            patches.callback(setattr, target, name, original)
+        
+        anthropic_factory = lambda *args, **kwargs: FakeAnthropic(latency, **kwargs)
+        for module in (anthropic, orchestrator, document_rag, conversation_store, note_manager):
+            patch(module, 'Anthropic', anthropic_factory)
+        
+        openai_factory = lambda *args, **kwargs: FakeOpenAI(latency, **kwargs)
+        patch(openai, 'OpenAI', openai_factory)
+        patch(voice_transcription, 'OpenAI', openai_factory)
+        
+        qdrant = make_qdrant(latency)
+        patch(qdrant_client, 'QdrantClient', lambda *args, **kwargs: qdrant)
+        
+        calendar = FakeCalendarService(latency)
+        patch(google_calendar, 'get_calendar_service', lambda: calendar)
+        patch(batch_writes, 'get_calendar_service', lambda: calendar)
+        
+        twilio_client = lambda account_sid, auth_token, **kwargs: FakeTwilioClient(account_sid, auth_token, latency)
+        try:
+            import twilio.rest
+            patch(twilio.rest, 'Client', twilio_client)
+        except ImportError:
+            fake = types.ModuleType('twilio.rest')
+            fake.Client = twilio_client
+            http_client = types.ModuleType('twilio.http.http_client')
+            http_client.TwilioHttpClient = lambda **kwargs: None
+            sys.modules.setdefault('twilio', types.ModuleType('twilio'))
+            sys.modules.setdefault('twilio.http', types.ModuleType('twilio.http'))
+            for name, module in (('twilio.rest', fake), ('twilio.http.http_client', http_client)):
+                patches.callback(sys.modules.pop, name, None)
+                sys.modules[name] = module
+        
+        # Process-wide singletons must not outlive the fakes
+        patch(conversation_store, '_store', None)
+        patch(conversation_recall, '_recall', None)
+        
+        if seed:
+            seed_data()
+        
+        yield types.SimpleNamespace(latency=latency, qdrant=qdrant, calendar=calendar,
+                                    outbox=FakeTwilioClient.sent, workdir=workdir)
+
+
+def seed_data():
+    """The same sample data the scripts/test_*.py files create against live services"""
+    from src.agent.credentials_manager import seed_steven_credentials
+    from src.agent.contacts_manager import seed_steven_contacts
+    from src.agent.document_rag import seed_sample_documents
+    
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        seed_steven_credentials()
+        seed_steven_contacts()
+        seed_sample_documents()
@@ -0,0 +1,292 @@
+"""Offline benchmarks for CHIEF's request paths
+
+Every external service is replaced by a local fake (see fakes.py), so
+the numbers isolate CHIEF's own overhead - or, with injected latency,
+approximate production timings without touching AWS, OpenAI, Anthropic,
+Google or Twilio.
+
+    python scripts/benchmarks/run.py                        # no injected latency
+    python scripts/benchmarks/run.py --latency realistic    # production-like delays
+    python scripts/benchmarks/run.py --latency anthropic=800,dynamodb=5 --jitter 0.2
+    python scripts/benchmarks/run.py --only lambda_sms,process_message -n 200
+    python scripts/benchmarks/run.py --save-baseline        # record for later comparison
+    python scripts/benchmarks/run.py --fail-on-regression   # exit 1 if p95 regressed
+
+Run from the repository root. Results are compared against
+scripts/benchmarks/baseline.json (or --baseline PATH) when it exists.
+"self p50" is the median time not spent waiting on a traced external call.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import itertools
+import urllib.parse
+import types
+from datetime import datetime
+
+sys.path.insert(0, '.')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import Latency, offline_services
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_ITERATIONS = 50
+WARMUP = 3
+
+MESSAGES = [
+    "What's on my calendar today?",
+    "Brief me",
+    "What does our overtime policy say about mandatory holdovers?",
+    "Who is our union president contact?",
+    "Draft a note to the city manager about the Station 72 staffing gap",
+    "What did we decide about Station 72 staffing in the meeting notes?",
+    "Any pending action items?",
+    "Thanks, that's helpful",
+]
+
+NOTE_ENTRIES = [
+    "Budget review: CRR needs two more inspectors before hurricane season",
+    "Union raised concerns about mandatory holdovers on B shift",
+    "Chief to send the overtime memo by Friday",
+    "MIH pilot enrolled 14 new patients this month",
+    "Follow up with procurement on the new cardiac monitors",
+]
+
+DOCUMENT_BODY = ("Sunrise Fire-Rescue standard operating procedure. Members assigned to suppression "
+                 "shall maintain readiness, complete apparatus checks at shift change and document "
+                 "deviations in the daily log. ") * 20
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(p / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Benchmark:
+    """run(arg) is timed; setup() (untimed) prepares arg, teardown() runs after timing
+    
+    Unless the code under test opens its own trace (lambda_handler), each
+    timed call is wrapped in one so the per-service breakdown is recorded.
+    """
+    
+    def __init__(self, name, run, setup=None, teardown=None, traced=True):
+        self.name = name
+        self.run = run
+        self.setup = setup or (lambda: None)
+        self.teardown = teardown or (lambda: None)
+        self.traced = traced
+
+
+def lambda_context():
+    return types.SimpleNamespace(
+        aws_request_id=f"bench-{time.monotonic_ns()}",
+        get_remaining_time_in_millis=lambda: 30000
+    )
+
+
+def build_benchmarks():
+    """Benchmarks are built inside offline_services so every import sees the fakes"""
+    from src.agent.orchestrator import process_message
+    from src.agent.conversation_recall import flush_pending
+    from src.agent.document_rag import DocumentRAG
+    from src.notes.note_manager import NoteSession
+    from lambda_handler import lambda_handler
+    
+    rag = DocumentRAG()
+    notes = NoteSession()
+    messages = itertools.cycle(MESSAGES)
+    entries = itertools.cycle(NOTE_ENTRIES)
+    counter = itertools.count()
+    add_entry_session = {}
+    
+    def next_message():
+        i = next(counter)
+        return f"+1555010{i % 5:04d}", next(messages)
+    
+    def add_entry_setup():
+        # Fresh session every 20 entries keeps the session item a realistic size
+        if next(counter) % 20 == 0 or 'id' not in add_entry_session:
+            add_entry_session['id'] = notes.start_session("Benchmark staff meeting", "operations")
+        return add_entry_session['id'], next(entries)
+    
+    def end_session_setup():
+        session_id = notes.start_session("Benchmark staff meeting", "operations")
+        for _ in range(5):
+            notes.add_entry(session_id, next(entries))
+        return session_id
+    
+    def sms_event():
+        sender, text = next_message()
+        body = urllib.parse.urlencode({'From': sender, 'Body': text})
+        return {'httpMethod': 'POST', 'body': body, 'isBase64Encoded': False}
+    
+    return [
+        Benchmark('process_message', lambda arg: process_message(arg[1], sender=arg[0]),
+                  setup=next_message, teardown=flush_pending),
+        Benchmark('add_document', lambda i: rag.add_document(f"Bench SOP {i}", DOCUMENT_BODY, 'sop'),
+                  setup=lambda: next(counter)),
+        Benchmark('query_with_answer', lambda question: rag.query_with_answer(question),
+                  setup=lambda: "What are the apparatus check requirements at shift change?"),
+        Benchmark('note_add_entry', lambda arg: notes.add_entry(*arg), setup=add_entry_setup),
+        Benchmark('note_end_session', notes.end_session, setup=end_session_setup),
+        Benchmark('lambda_sms', lambda event: lambda_handler(event, lambda_context()),
+                  setup=sms_event, traced=False),
+        Benchmark('lambda_briefing',
+                  lambda event: lambda_handler(event, lambda_context()),
+                  setup=lambda: {'source': 'aws.events', 'briefing_type': 'morning'}, traced=False),
+    ]
+
+
+def measure(benchmark, iterations, exporter):
+    from src.utils.tracing import trace_request
+    
+    durations = []
+    self_times = []
+    for i in range(WARMUP + iterations):
+        arg = benchmark.setup()
+        exporter.clear()
+        
+        start = time.perf_counter()
+        if benchmark.traced:
+            with trace_request(benchmark.name):
+                benchmark.run(arg)
+        else:
+            benchmark.run(arg)
+        elapsed = (time.perf_counter() - start) * 1000
+        
+        benchmark.teardown()
+        if i < WARMUP:
+            continue
+        
+        durations.append(elapsed)
+        trace = exporter.last
+        if trace is not None:
+            external = sum(totals['ms'] for totals in trace.breakdown().values())
+            self_times.append(max(0.0, trace.duration_ms - external))
+    
+    durations.sort()
+    self_times.sort()
+    return {
+        'iterations': iterations,
+        'ops_per_sec': round(len(durations) / (sum(durations) / 1000), 2) if durations else 0.0,
+        'p50_ms': round(percentile(durations, 50), 2),
+        'p95_ms': round(percentile(durations, 95), 2),
+        'p99_ms': round(percentile(durations, 99), 2),
+        'self_p50_ms': round(percentile(self_times, 50), 2)
+    }
+
+
+def load_baseline(path):
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def change(current, previous):
+    if not previous:
+        return None
+    return (current - previous) / previous
+
+
+def _percent(value):
+    return '-' if value is None else f"{value:+.1%}"
+
+
+def report(results, baseline, threshold):
+    """Print the results table; returns the names whose p95 regressed past threshold"""
+    previous = (baseline or {}).get('results', {})
+    regressions = []
+    
+    header = f"{'benchmark':<20} {'n':>5} {'ops/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'self p50':>9}"
+    if baseline:
+        header += f" {'p50 vs base':>12} {'p95 vs base':>12}"
+    print(header)
+    print("-" * len(header))
+    
+    for name, r in results.items():
+        line = (f"{name:<20} {r['iterations']:>5} {r['ops_per_sec']:>9.1f} {r['p50_ms']:>8.1f}ms "
+                f"{r['p95_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms {r['self_p50_ms']:>7.1f}ms")
+        base = previous.get(name)
+        if base:
+            p50 = change(r['p50_ms'], base['p50_ms'])
+            p95 = change(r['p95_ms'], base['p95_ms'])
+            flag = ''
+            if p95 is not None and p95 > threshold:
+                regressions.append(name)
+                flag = '  REGRESSED'
+            line += f" {_percent(p50):>12} {_percent(p95):>12}{flag}"
+        elif baseline:
+            line += f" {'(new)':>12}"
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline CHIEF benchmarks")
+    parser.add_argument('-n', '--iterations', type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument('--latency', default='none', help="'none', 'realistic' or service=ms,... ")
+    parser.add_argument('--jitter', type=float, default=0.0, help="latency jitter as a fraction, e.g. 0.2")
+    parser.add_argument('--only', help="comma-separated benchmark names")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=0.10, help="p95 regression that counts as a failure")
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+    
+    latency = Latency.parse(args.latency, jitter=args.jitter)
+    results = {}
+    
+    with offline_services(latency):
+        from src.utils.tracing import InMemoryExporter, set_exporters, instrument_boto3
+        
+        exporter = InMemoryExporter()
+        set_exporters(exporter)
+        instrument_boto3()
+        
+        benchmarks = build_benchmarks()
+        if args.only:
+            wanted = set(args.only.split(','))
+            unknown = wanted - {b.name for b in benchmarks}
+            if unknown:
+                parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+            benchmarks = [b for b in benchmarks if b.name in wanted]
+        
+        print(f"CHIEF offline benchmarks - latency: {args.latency}, {args.iterations} iterations each\n")
+        for benchmark in benchmarks:
+            results[benchmark.name] = measure(benchmark, args.iterations, exporter)
+    
+    baseline = load_baseline(args.baseline)
+    if baseline and baseline.get('meta', {}).get('latency') != args.latency:
+        print(f"(baseline was recorded with latency {baseline['meta'].get('latency')!r}; comparison skipped)\n")
+        baseline = None
+    regressions = report(results, baseline, args.threshold)
+    
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'meta': {
+                    'latency': args.latency,
+                    'jitter': args.jitter,
+                    'python': platform.python_version(),
+                    'recorded_at': datetime.utcnow().isoformat()
+                },
+                'results': results
+            }, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+    
+    if regressions:
+        print(f"\np95 regressed more than {args.threshold:.0%}: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
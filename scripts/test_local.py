@@ -3,12 +3,13 @@ import sys
 sys.path.insert(0, '.')
 
 from src.agent.orchestrator import process_message
+from src.agent.conversation_store import LocalConversationStore
 
 def main():
     print("CHIEF Assistant - Local Test")
     print("Type 'quit' to exit\n")
     
-    history = []
+    conversation = LocalConversationStore()
     
     while True:
         user_input = input("You: ").strip()
@@ -20,11 +21,8 @@ def main():
         if not user_input:
             continue
         
-        response = process_message(user_input, history)
+        response = process_message(user_input, sender='local', store=conversation, recall=False)
         print(f"\nCHIEF: {response}\n")
-        
-        history.append({"role": "user", "content": user_input})
-        history.append({"role": "assistant", "content": response})
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,136 @@
+"""Create CHIEF's DynamoDB tables and indexes, then backfill the index keys
+
+Safe to re-run: existing tables are kept, missing GSIs are added one at a
+time (DynamoDB only builds one new index per table at once), and the
+backfills only touch items that still lack the new attributes.
+
+    python setup_dynamodb.py              # create / update, then backfill
+    python setup_dynamodb.py --no-backfill
+"""
+import sys
+import time
+import boto3
+from botocore.exceptions import ClientError
+
+
+REGION = 'us-east-1'
+
+# table -> [(index name, partition key, sort key)]; every table is keyed PK/SK (strings)
+TABLES = {
+    'chief_conversations': [],
+    'chief_briefings': [],
+    'chief_note_sessions': [],
+    'chief_documents': [('GSI1', 'GSI1PK', 'GSI1SK')],
+    'chief_action_items': [('GSI1', 'GSI1PK', 'GSI1SK')],
+    'chief_credentials': [('GSI1', 'GSI1PK', 'GSI1SK'), ('GSI2', 'GSI2PK', 'GSI2SK')],
+    'chief_contacts': [('UPDATED', 'PK', 'updated_at'), ('LAST_INTERACTION', 'PK', 'last_interaction')],
+    'chief_usage': [],
+}
+
+# table -> TTL attribute (epoch seconds)
+TTL_ATTRIBUTES = {
+    'chief_conversations': 'expires_at',
+}
+
+
+def _attribute_definitions(keys):
+    return [{'AttributeName': key, 'AttributeType': 'S'} for key in sorted(keys)]
+
+
+def _index_definition(name, pk, sk):
+    return {
+        'IndexName': name,
+        'KeySchema': [{'AttributeName': pk, 'KeyType': 'HASH'}, {'AttributeName': sk, 'KeyType': 'RANGE'}],
+        'Projection': {'ProjectionType': 'ALL'}
+    }
+
+
+def table_definition(table, indexes):
+    """create_table() parameters for one of TABLES"""
+    params = {
+        'TableName': table,
+        'KeySchema': [{'AttributeName': 'PK', 'KeyType': 'HASH'}, {'AttributeName': 'SK', 'KeyType': 'RANGE'}],
+        'AttributeDefinitions': _attribute_definitions({'PK', 'SK'} | {k for _, pk, sk in indexes for k in (pk, sk)}),
+        'BillingMode': 'PAY_PER_REQUEST'
+    }
+    if indexes:
+        params['GlobalSecondaryIndexes'] = [_index_definition(*index) for index in indexes]
+    return params
+
+
+def wait_until_active(client, table, poll_seconds=5):
+    """Wait for the table and all of its indexes to finish creating"""
+    while True:
+        description = client.describe_table(TableName=table)['Table']
+        statuses = [description['TableStatus']] + [
+            index['IndexStatus'] for index in description.get('GlobalSecondaryIndexes', [])
+        ]
+        if all(status == 'ACTIVE' for status in statuses):
+            return description
+        time.sleep(poll_seconds)
+
+
+def ensure_table(client, table, indexes):
+    try:
+        description = client.describe_table(TableName=table)['Table']
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ResourceNotFoundException':
+            raise
+        client.create_table(**table_definition(table, indexes))
+        wait_until_active(client, table)
+        print(f"✅ Created table: {table}")
+        return
+    
+    print(f"⏭️  Table exists: {table}")
+    existing = {index['IndexName'] for index in description.get('GlobalSecondaryIndexes', [])}
+    for name, pk, sk in indexes:
+        if name in existing:
+            continue
+        print(f"   Adding index {table}.{name} ({pk}, {sk})...")
+        client.update_table(
+            TableName=table,
+            AttributeDefinitions=_attribute_definitions({pk, sk}),
+            GlobalSecondaryIndexUpdates=[{'Create': _index_definition(name, pk, sk)}]
+        )
+        wait_until_active(client, table)
+        print(f"✅ Indexed {table}.{name}")
+
+
+def ensure_ttl(client, table, attribute):
+    status = client.describe_time_to_live(TableName=table)['TimeToLiveDescription']
+    if status.get('TimeToLiveStatus') in ('ENABLED', 'ENABLING'):
+        return
+    client.update_time_to_live(
+        TableName=table,
+        TimeToLiveSpecification={'Enabled': True, 'AttributeName': attribute}
+    )
+    print(f"✅ TTL on {table}.{attribute}")
+
+
+def backfill():
+    """Populate keys for the indexes added after items were written"""
+    from src.agent.contacts_manager import ContactsManager
+    from src.agent.credentials_manager import CredentialsManager
+    
+    migrated = ContactsManager().migrate_embedded_interactions()
+    print(f"✅ Contacts: {migrated} contacts moved to interaction items / given last_interaction")
+    
+    updated = CredentialsManager().backfill_expiry_index()
+    print(f"✅ Credentials: {updated} given GSI2 expiry keys")
+
+
+def main():
+    client = boto3.client('dynamodb', region_name=REGION)
+    for table, indexes in TABLES.items():
+        ensure_table(client, table, indexes)
+    for table, attribute in TTL_ATTRIBUTES.items():
+        ensure_ttl(client, table, attribute)
+    
+    if '--no-backfill' not in sys.argv:
+        backfill()
+    
+    print("\n🎉 DynamoDB setup complete!")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 import boto3
 import json
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams
+from qdrant_client.models import Distance, VectorParams, PayloadSchemaType
 
 # Get Qdrant credentials
 secrets = boto3.client('secretsmanager', region_name='us-east-1')
@@ -31,4 +31,20 @@ for name, size in collections:
         else:
             print(f"❌ Error with {name}: {e}")
 
+# Payload indexes for filtered vector search
+payload_indexes = [
+    ("conversations", "sender", PayloadSchemaType.KEYWORD),
+    ("conversations", "workspace", PayloadSchemaType.KEYWORD),
+    ("notes", "workspace", PayloadSchemaType.KEYWORD),
+    ("notes", "kind", PayloadSchemaType.KEYWORD),
+    ("notes", "ts", PayloadSchemaType.FLOAT),
+]
+
+for name, field, schema in payload_indexes:
+    try:
+        client.create_payload_index(collection_name=name, field_name=field, field_schema=schema)
+        print(f"✅ Indexed {name}.{field}")
+    except Exception as e:
+        print(f"❌ Error indexing {name}.{field}: {e}")
+
 print("\n🎉 Qdrant setup complete!")
@@ -0,0 +1,236 @@
+"""Precomputed briefings for CHIEF
+
+A briefing gathers calendar, action items, expiring credentials and recent
+contact interactions concurrently, each with its own deadline, and is stored
+as a snapshot item. Scheduled runs refresh the snapshot; on-demand requests
+("brief me") read it back without touching any of the sources.
+"""
+import json
+import threading
+import boto3
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from concurrent.futures import ThreadPoolExecutor
+
+from ..utils.tracing import span, wrap
+from ..utils.call_policy import AWS_CONFIG
+from ..calendar.free_busy import DEFAULT_TIMEZONE
+
+
+# Seconds each source gets before the briefing goes out without it
+SOURCE_DEADLINES = {
+    'events': 6.0,
+    'actions': 3.0,
+    'credentials': 3.0,
+    'contacts': 3.0,
+}
+SNAPSHOT_MAX_AGE = 6 * 3600  # seconds an on-demand read trusts the snapshot
+SOURCE_WORKERS = 2 * len(SOURCE_DEADLINES)  # room for a stuck source to finish without starving the next build
+
+_source_pool = None
+_source_pool_lock = threading.Lock()
+
+
+def get_dynamodb():
+    return boto3.resource('dynamodb', region_name='us-east-1', config=AWS_CONFIG)
+
+
+def get_source_pool():
+    """Threads for the briefing sources, reused across invocations
+    
+    A per-call pool shut down with wait=False leaves stuck threads behind for
+    Lambda to freeze mid-call; a shared pool keeps their number bounded.
+    """
+    global _source_pool
+    with _source_pool_lock:
+        if _source_pool is None:
+            _source_pool = ThreadPoolExecutor(max_workers=SOURCE_WORKERS, thread_name_prefix='chief-briefing')
+        return _source_pool
+
+
+def _json_default(value):
+    # DynamoDB numbers come back as Decimal
+    return int(value) if value == int(value) else float(value)
+
+
+def fetch_events():
+    from ..calendar.google_calendar import get_events_between
+    from ..calendar.event_store import event_bounds
+    
+    # Local days, the same windows the SMS fast path and tools query
+    start_of_day = datetime.now(ZoneInfo(DEFAULT_TIMEZONE)).replace(hour=0, minute=0, second=0, microsecond=0)
+    boundary = (start_of_day + timedelta(days=1)).timestamp()
+    events = get_events_between(start_of_day, start_of_day + timedelta(days=2))
+    
+    today, tomorrow = [], []
+    for event in events:
+        start, end = event_bounds(event)
+        summary = {
+            'summary': event.get('summary', 'No title'),
+            'start': event['start'],
+            'location': event.get('location'),
+            'calendar_label': event.get('calendar_label')
+        }
+        if start < boundary:
+            today.append(summary)
+        if end > boundary:
+            tomorrow.append(summary)
+    return {'today': today, 'tomorrow': tomorrow}
+
+
+def fetch_actions(user_id):
+    from ..notes.note_manager import NoteSession
+    
+    overdue, due_today = NoteSession(user_id=user_id).get_due_actions()
+    fields = ('description', 'due_date', 'priority', 'workspace')
+    return {
+        'overdue': [{k: a.get(k) for k in fields} for a in overdue],
+        'due_today': [{k: a.get(k) for k in fields} for a in due_today]
+    }
+
+
+def fetch_credentials(user_id):
+    from .credentials_manager import CredentialsManager
+    
+    return [{
+        'name': c['name'],
+        'expiration_date': c.get('expiration_date'),
+        'days_until_expiration': c['days_until_expiration']
+    } for c in CredentialsManager(user_id=user_id).get_expiring_soon(90)]
+
+
+def fetch_contacts(user_id):
+    from .contacts_manager import ContactsManager
+    
+    return ContactsManager(user_id=user_id).get_recent_interactions(days=7)
+
+
+def build_briefing(user_id="steven", deadlines=None):
+    """Gather every source concurrently; sources that miss their deadline are reported as unavailable"""
+    deadlines = dict(SOURCE_DEADLINES, **(deadlines or {}))
+    sources = {
+        'events': fetch_events,
+        'actions': lambda: fetch_actions(user_id),
+        'credentials': lambda: fetch_credentials(user_id),
+        'contacts': lambda: fetch_contacts(user_id),
+    }
+    
+    started = datetime.now(timezone.utc)
+    pool = get_source_pool()
+    futures = {name: pool.submit(wrap(span(f'briefing.{name}')(fetch))) for name, fetch in sources.items()}
+    
+    data = {}
+    unavailable = []
+    for name, future in futures.items():
+        remaining = deadlines[name] - (datetime.now(timezone.utc) - started).total_seconds()
+        try:
+            data[name] = future.result(timeout=max(0, remaining))
+        except Exception:
+            # Timed out or failed - send the briefing without this source
+            future.cancel()  # drops it if it never started; a running fetch finishes in the pool
+            unavailable.append(name)
+    
+    data['unavailable'] = unavailable
+    data['generated_at'] = started.isoformat()
+    return data
+
+
+def _event_time(start):
+    value = start.get('dateTime', start.get('date'))
+    if 'T' not in value:
+        return 'All day'
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).strftime('%I:%M %p')
+
+
+def format_briefing(data, briefing_type='morning'):
+    """SMS text for a briefing"""
+    events = data.get('events', {})
+    if briefing_type == 'eod':
+        lines = ["EOD Summary", "", "📅 TOMORROW'S PREVIEW:"]
+        day_events = events.get('tomorrow', [])
+    else:
+        lines = ["Good morning, Chief." if briefing_type == 'morning' else "Status update", "", "📅 TODAY'S CALENDAR:"]
+        day_events = events.get('today', [])
+    
+    if 'events' in data.get('unavailable', []):
+        lines.append("Calendar unavailable right now.")
+    elif day_events:
+        for event in day_events:
+            line = f"• {_event_time(event['start'])} - {event['summary']}"
+            if event.get('location'):
+                line += f" @ {event['location']}"
+            lines.append(line)
+    else:
+        lines.append("No events scheduled.")
+    
+    actions = data.get('actions', {})
+    if actions.get('overdue') or actions.get('due_today'):
+        lines += ["", "✅ ACTIONS:"]
+        for action in actions.get('overdue', [])[:5]:
+            lines.append(f"• OVERDUE ({action['due_date']}): {action['description']}")
+        for action in actions.get('due_today', [])[:5]:
+            lines.append(f"• Today: {action['description']}")
+    
+    if data.get('credentials'):
+        lines += ["", "📚 EXPIRING SOON:"]
+        for cred in data['credentials'][:3]:
+            lines.append(f"• {cred['name']}: {cred['days_until_expiration']} days")
+    
+    if data.get('contacts'):
+        lines += ["", "👥 RECENT CONTACTS:"]
+        for contact in data['contacts'][:3]:
+            latest = contact['interactions'][-1] if contact.get('interactions') else None
+            detail = f" - {latest['type']}: {latest['summary']}" if latest else ""
+            lines.append(f"• {contact['name']} ({contact['last_interaction']}){detail}")
+    
+    lines.append("")
+    if briefing_type == 'eod':
+        lines.append("Anything else to capture before end of day?")
+    else:
+        lines.append("Reply with any questions or 'note' to start taking notes.")
+    
+    return "\n".join(lines)
+
+
+class BriefingStore:
+    """Briefing snapshots in chief_briefings (created by setup_dynamodb.py)"""
+    
+    def __init__(self, user_id="steven"):
+        self.user_id = user_id
+        self.dynamodb = get_dynamodb()
+        self.table = self.dynamodb.Table('chief_briefings')
+    
+    def save(self, briefing_type, data, text):
+        item = {
+            'PK': f'USER#{self.user_id}',
+            'SK': 'SNAPSHOT#latest',
+            'briefing_type': briefing_type,
+            'generated_at': data['generated_at'],
+            'data': json.dumps(data, default=_json_default),
+            'text': text
+        }
+        self.table.put_item(Item=item)
+        return item
+    
+    def load(self):
+        response = self.table.get_item(Key={'PK': f'USER#{self.user_id}', 'SK': 'SNAPSHOT#latest'})
+        return response.get('Item')
+
+
+def refresh_snapshot(briefing_type='morning', user_id="steven"):
+    """Build a briefing now and store it as the latest snapshot"""
+    data = build_briefing(user_id=user_id)
+    text = format_briefing(data, briefing_type)
+    return BriefingStore(user_id=user_id).save(briefing_type, data, text)
+
+
+def get_briefing_text(user_id="steven", max_age=SNAPSHOT_MAX_AGE):
+    """On-demand briefing: served from the snapshot, rebuilt only if it is missing or stale"""
+    snapshot = BriefingStore(user_id=user_id).load()
+    if snapshot:
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(snapshot['generated_at'])
+        if age.total_seconds() <= max_age:
+            data = json.loads(snapshot['data'])
+            return format_briefing(data, 'status')
+    
+    return refresh_snapshot('status', user_id=user_id)['text']
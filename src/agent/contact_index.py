@@ -0,0 +1,187 @@
+"""In-memory search index over contacts' name, organization and role
+
+Trigram postings give typo-tolerant candidates, a sorted token list
+answers prefix lookups (short queries like "ch"), and ranking weights
+name over organization over role. Contacts are upserted individually, so
+the index can be refreshed incrementally from `updated_at`.
+"""
+import re
+import heapq
+import bisect
+import threading
+from collections import Counter
+
+
+FIELD_WEIGHTS = {'name': 1.0, 'organization': 0.8, 'role': 0.7}
+MIN_SCORE = 0.3
+PREFIX_SCORE = 0.6
+SHORT_QUERY = 3        # queries this short also match word prefixes
+MAX_RANKED = 100
+MAX_CACHED_QUERIES = 256
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def normalize(text):
+    return ' '.join(TOKEN_PATTERN.findall((text or '').lower()))
+
+
+def trigrams(text):
+    """Trigrams of each word, padded so word starts count double"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(query_grams, field_grams):
+    """Dice coefficient over trigram sets"""
+    if not query_grams or not field_grams:
+        return 0.0
+    return 2 * len(query_grams & field_grams) / (len(query_grams) + len(field_grams))
+
+
+class ContactIndex:
+    """Contacts indexed by distinct field values
+    
+    Many contacts share an organization or role, so trigrams and prefixes
+    point at distinct values, and each value maps to the contacts holding it.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._reset()
+    
+    def _reset(self):
+        self.contacts = {}    # SK -> contact item
+        self.holders = {field: {} for field in FIELD_WEIGHTS}   # field -> value -> {SK}
+        self.postings = {field: {} for field in FIELD_WEIGHTS}  # field -> trigram -> {value}
+        self.sizes = {field: {} for field in FIELD_WEIGHTS}     # field -> value -> trigram count
+        self.tokens = []      # sorted (token, field, value) for prefix lookups
+        self.watermark = ''   # newest updated_at seen
+        self.results = {}     # query -> ranked SKs, dropped on every write
+    
+    def __len__(self):
+        return len(self.contacts)
+    
+    def _remove(self, sk):
+        contact = self.contacts.pop(sk, None)
+        if contact is None:
+            return
+        for field in FIELD_WEIGHTS:
+            value = normalize(contact.get(field))
+            holders = self.holders[field].get(value)
+            if holders is None:
+                continue
+            holders.discard(sk)
+            if holders:
+                continue
+            # Last contact with this value - drop the value itself
+            del self.holders[field][value]
+            del self.sizes[field][value]
+            for gram in trigrams(value):
+                values = self.postings[field].get(gram)
+                if values:
+                    values.discard(value)
+                    if not values:
+                        del self.postings[field][gram]
+            self.tokens = [entry for entry in self.tokens if entry[1:] != (field, value)]
+    
+    def _add(self, contact):
+        """Index one contact; returns new (token, field, value) entries for the caller to merge"""
+        sk = contact['SK']
+        tokens = []
+        for field in FIELD_WEIGHTS:
+            value = normalize(contact.get(field))
+            holders = self.holders[field]
+            if value not in holders:
+                holders[value] = set()
+                grams = trigrams(value)
+                self.sizes[field][value] = len(grams)
+                postings = self.postings[field]
+                for gram in grams:
+                    postings.setdefault(gram, set()).add(value)
+                tokens.extend((token, field, value) for token in set(value.split()))
+            holders[value].add(sk)
+        self.contacts[sk] = contact
+        self.watermark = max(self.watermark, contact.get('updated_at') or '')
+        return tokens
+    
+    def upsert(self, contact):
+        """Add or replace one contact"""
+        with self.lock:
+            self._remove(contact['SK'])
+            for entry in self._add(contact):
+                bisect.insort(self.tokens, entry)
+            self.results = {}
+    
+    def rebuild(self, contacts):
+        """Replace the whole index (tokens are sorted once, not per contact)"""
+        with self.lock:
+            self._reset()
+            tokens = []
+            for contact in contacts:
+                tokens.extend(self._add(contact))
+            self.tokens = sorted(tokens)
+    
+    def _prefix_matches(self, prefix):
+        """(field, value) pairs with a word starting with prefix"""
+        i = bisect.bisect_left(self.tokens, (prefix,))
+        matches = set()
+        while i < len(self.tokens) and self.tokens[i][0].startswith(prefix):
+            matches.add(self.tokens[i][1:])
+            i += 1
+        return matches
+    
+    def _rank(self, query):
+        query_grams = trigrams(query)
+        n = len(query_grams)
+        
+        # Score distinct values by shared trigrams (Dice), weighted by field
+        value_scores = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            postings = self.postings[field]
+            sizes = self.sizes[field]
+            shared = Counter()
+            for gram in query_grams:
+                values = postings.get(gram)
+                if values:
+                    shared.update(values)
+            for value, count in shared.items():
+                score = weight * 2 * count / (n + sizes[value])
+                if score >= MIN_SCORE:
+                    value_scores[field, value] = score
+        
+        # Short queries are usually the start of a word being typed
+        if len(query) <= SHORT_QUERY and ' ' not in query:
+            for field, value in self._prefix_matches(query):
+                score = PREFIX_SCORE * FIELD_WEIGHTS[field]
+                if score > value_scores.get((field, value), 0.0):
+                    value_scores[field, value] = score
+        
+        # Walk values best-first; a contact's first appearance is its best score
+        ranked = []
+        seen = set()
+        name = lambda sk: self.contacts[sk].get('name', '')
+        for (field, value), _ in sorted(value_scores.items(), key=lambda pair: -pair[1]):
+            holders = self.holders[field][value] - seen
+            for sk in heapq.nsmallest(MAX_RANKED - len(ranked), holders, key=name):
+                ranked.append(sk)
+            seen |= holders
+            if len(ranked) >= MAX_RANKED:
+                break
+        return ranked
+    
+    def search(self, query, limit=20):
+        """Contacts ranked by how well query matches name, organization or role (typos tolerated)"""
+        query = normalize(query)
+        if not query:
+            return []
+        
+        with self.lock:
+            ranked = self.results.get(query)
+            if ranked is None:
+                if len(self.results) >= MAX_CACHED_QUERIES:
+                    self.results = {}
+                ranked = self.results[query] = self._rank(query)
+            return [self.contacts[sk] for sk in ranked[:limit]]
@@ -1,11 +1,23 @@
 """Contact & Relationship Manager for CHIEF"""
 import json
+import time
 import boto3
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+
+from .contact_index import ContactIndex
+from ..utils.call_policy import AWS_CONFIG
 
 
 def get_dynamodb():
-    return boto3.resource('dynamodb', region_name='us-east-1')
+    return boto3.resource('dynamodb', region_name='us-east-1', config=AWS_CONFIG)
+
+
+def get_dynamodb_client():
+    """Low-level client (typed attribute values) for transactions"""
+    return boto3.client('dynamodb', region_name='us-east-1', config=AWS_CONFIG)
 
 
 # Communication style profiles
@@ -33,20 +45,37 @@ TONE_PROFILES = {
 }
 
 
+NEVER_CONTACTED = '0000-00-00'  # last_interaction for new contacts, so they sort as stale
+INDEX_MISSING_ERRORS = ('ValidationException', 'ResourceNotFoundException')
+INDEX_REFRESH_SECONDS = 30   # how often to pull other writers' changes into the index
+INDEX_OVERLAP_SECONDS = 60   # re-read this far behind the watermark to absorb clock skew
+
+_serializer = TypeSerializer()
+
+
+def serialize(item):
+    """Python values -> DynamoDB attribute values, for low-level transaction calls"""
+    return {k: _serializer.serialize(v) for k, v in item.items()}
+
+
+# Search indexes are per process, shared by every ContactsManager for a user
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
 class ContactsManager:
     def __init__(self, user_id="steven"):
         self.user_id = user_id
         self.dynamodb = get_dynamodb()
         self.table = self.dynamodb.Table('chief_contacts')
+        self.client = get_dynamodb_client()
     
     def add_contact(self, name, role, organization, 
                     communication_style="professional_diplomatic",
                     email=None, phone=None, notes=None):
-        """Add or update a contact"""
+        """Add or update a contact (interaction history is kept)"""
         
-        self.table.put_item(Item={
-            'PK': f'USER#{self.user_id}',
-            'SK': f'CONTACT#{name.upper().replace(" ", "_")}',
+        fields = {
             'name': name,
             'role': role,
             'organization': organization,
@@ -54,66 +83,203 @@ class ContactsManager:
             'email': email,
             'phone': phone,
             'notes': notes,
-            'interactions': [],
             'updated_at': datetime.utcnow().isoformat()
-        })
+        }
+        names = {f'#{k}': k for k in fields}
+        values = {f':{k}': v for k, v in fields.items()}
+        values[':never'] = NEVER_CONTACTED
+        
+        response = self.table.update_item(
+            Key=self._key(name),
+            UpdateExpression='SET ' + ', '.join(f'#{k} = :{k}' for k in fields)
+                             + ', last_interaction = if_not_exists(last_interaction, :never)',
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+            ReturnValues='ALL_NEW'
+        )
+        self._index_contact(response['Attributes'])
         
         return f"Added contact: {name}"
     
-    def log_interaction(self, contact_name, interaction_type, summary, sentiment=None):
-        """Log an interaction with a contact"""
-        key = {
+    def _key(self, contact_name):
+        return {
             'PK': f'USER#{self.user_id}',
             'SK': f'CONTACT#{contact_name.upper().replace(" ", "_")}'
         }
+    
+    def log_interaction(self, contact_name, interaction_type, summary, sentiment=None):
+        """Log an interaction with a contact
         
-        response = self.table.get_item(Key=key)
-        if 'Item' not in response:
-            return None, "Contact not found"
-        
-        contact = response['Item']
-        interactions = contact.get('interactions', [])
+        The interaction is its own item (SK INTERACTION#<contact>#<timestamp>),
+        written in one transaction with the contact's last_interaction fields,
+        so concurrent logs never overwrite each other and history is kept.
+        """
+        key = self._key(contact_name)
+        contact_key = key['SK'].split('#', 1)[1]
+        now = datetime.utcnow().isoformat()
         
-        interactions.append({
-            'date': datetime.utcnow().isoformat()[:10],
+        interaction = {
+            'date': now[:10],
             'type': interaction_type,  # meeting, email, call, text
             'summary': summary,
-            'sentiment': sentiment  # positive, neutral, negative
+            'sentiment': sentiment,  # positive, neutral, negative
+            'timestamp': now
+        }
+        
+        try:
+            self.client.transact_write_items(TransactItems=[
+                {'Put': {
+                    'TableName': self.table.name,
+                    'Item': serialize(dict(
+                        interaction,
+                        PK=key['PK'],
+                        SK=f'INTERACTION#{contact_key}#{now}',
+                        contact_name=contact_name
+                    )),
+                    'ConditionExpression': 'attribute_not_exists(SK)'
+                }},
+                {'Update': {
+                    'TableName': self.table.name,
+                    'Key': serialize(key),
+                    'UpdateExpression': 'SET last_interaction = :l, last_interaction_type = :t, '
+                                        'last_interaction_summary = :s, updated_at = :ts',
+                    'ConditionExpression': 'attribute_exists(SK)',
+                    'ExpressionAttributeValues': serialize({
+                        ':l': interaction['date'],
+                        ':t': interaction_type,
+                        ':s': summary,
+                        ':ts': now
+                    })
+                }}
+            ])
+        except ClientError as e:
+            reasons = e.response.get('CancellationReasons', [])
+            if len(reasons) > 1 and reasons[1].get('Code') == 'ConditionalCheckFailed':
+                return None, "Contact not found"
+            raise
+        
+        self._patch_index(key['SK'], {
+            'last_interaction': interaction['date'],
+            'last_interaction_type': interaction_type,
+            'last_interaction_summary': summary,
+            'updated_at': now
         })
         
-        # Keep last 10 interactions
-        interactions = interactions[-10:]
+        return interaction, "Interaction logged"
+    
+    def get_interactions(self, contact_name, limit=20, start_key=None):
+        """One page of a contact's interactions, newest first
         
-        self.table.update_item(
-            Key=key,
-            UpdateExpression='SET interactions = :i, last_interaction = :l, updated_at = :ts',
-            ExpressionAttributeValues={
-                ':i': interactions,
-                ':l': datetime.utcnow().isoformat()[:10],
-                ':ts': datetime.utcnow().isoformat()
-            }
-        )
+        Returns {'items': [...], 'next_key': ...}; pass next_key back as
+        start_key for the following page (None when there are no more).
+        """
+        contact_key = self._key(contact_name)['SK'].split('#', 1)[1]
+        params = {
+            'KeyConditionExpression': 'PK = :pk AND begins_with(SK, :sk)',
+            'ExpressionAttributeValues': {
+                ':pk': f'USER#{self.user_id}',
+                ':sk': f'INTERACTION#{contact_key}#'
+            },
+            'ScanIndexForward': False,
+            'Limit': limit
+        }
+        if start_key:
+            params['ExclusiveStartKey'] = start_key
+        
+        response = self.table.query(**params)
+        fields = ('date', 'type', 'summary', 'sentiment', 'timestamp')
+        return {
+            'items': [{k: item.get(k) for k in fields} for item in response.get('Items', [])],
+            'next_key': response.get('LastEvaluatedKey')
+        }
+    
+    def get_stale_contacts(self, days=30):
+        """Contacts not spoken to in N days (or ever), longest silence first
         
-        return interactions[-1], "Interaction logged"
+        Uses the LAST_INTERACTION index (PK, last_interaction), so only
+        the matching contacts are read.
+        """
+        cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()[:10]
+        return self._query_all(
+            IndexName='LAST_INTERACTION',
+            KeyConditionExpression='PK = :pk AND last_interaction < :cutoff',
+            ExpressionAttributeValues={':pk': f'USER#{self.user_id}', ':cutoff': cutoff}
+        )
     
     def get_contact(self, contact_name):
         """Get a specific contact"""
-        response = self.table.get_item(Key={
-            'PK': f'USER#{self.user_id}',
-            'SK': f'CONTACT#{contact_name.upper().replace(" ", "_")}'
-        })
+        response = self.table.get_item(Key=self._key(contact_name))
         return response.get('Item')
     
     def get_all_contacts(self):
         """Get all contacts"""
-        response = self.table.query(
+        return self._query_all(
             KeyConditionExpression='PK = :pk AND begins_with(SK, :sk)',
             ExpressionAttributeValues={
                 ':pk': f'USER#{self.user_id}',
                 ':sk': 'CONTACT#'
             }
         )
-        return response.get('Items', [])
+    
+    def _query_all(self, **params):
+        items = []
+        while True:
+            response = self.table.query(**params)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                return items
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    def get_contacts_updated_since(self, since):
+        """Contacts with updated_at after since, via the UPDATED index (PK, updated_at)"""
+        params = {
+            'FilterExpression': 'begins_with(SK, :sk)',
+            'ExpressionAttributeValues': {':pk': f'USER#{self.user_id}', ':since': since, ':sk': 'CONTACT#'}
+        }
+        try:
+            return self._query_all(IndexName='UPDATED',
+                                   KeyConditionExpression='PK = :pk AND updated_at > :since', **params)
+        except ClientError as e:
+            # Only a missing index falls back; throttling must not turn into a full partition read
+            if e.response['Error']['Code'] not in INDEX_MISSING_ERRORS:
+                raise
+        
+        # Index not created yet (see setup_dynamodb.py) - same result from the base table,
+        # reading the whole partition
+        params['FilterExpression'] += ' AND updated_at > :since'
+        return self._query_all(KeyConditionExpression='PK = :pk', **params)
+    
+    def get_contact_index(self):
+        """This process's search index, built once and then refreshed incrementally"""
+        now = time.monotonic()
+        with _indexes_lock:
+            entry = _indexes.get(self.user_id)
+            if entry is None:
+                index = ContactIndex()
+                index.rebuild(self.get_all_contacts())
+                _indexes[self.user_id] = {'index': index, 'checked_at': now}
+                return index
+            
+            index = entry['index']
+            if now - entry['checked_at'] >= INDEX_REFRESH_SECONDS:
+                since = index.watermark
+                if since:
+                    since = (datetime.fromisoformat(since) - timedelta(seconds=INDEX_OVERLAP_SECONDS)).isoformat()
+                for contact in self.get_contacts_updated_since(since):
+                    index.upsert(contact)
+                entry['checked_at'] = now
+            return index
+    
+    def _index_contact(self, contact):
+        """Keep an already-built index current after our own writes"""
+        entry = _indexes.get(self.user_id)
+        if entry is not None:
+            entry['index'].upsert(contact)
+    
+    def _patch_index(self, sk, changes):
+        entry = _indexes.get(self.user_id)
+        if entry is not None and sk in entry['index'].contacts:
+            entry['index'].upsert(dict(entry['index'].contacts[sk], **changes))
     
     def get_tone_guidelines(self, contact_name):
         """Get communication guidelines for a contact"""
@@ -129,7 +295,7 @@ class ContactsManager:
             'role': contact.get('role'),
             'style': style,
             'guidelines': profile['guidelines'],
-            'recent_interactions': contact.get('interactions', [])[-3:]
+            'recent_interactions': self.get_recent_history(contact_name)
         }
     
     def draft_message(self, contact_name, topic, message_type="email"):
@@ -150,24 +316,87 @@ class ContactsManager:
             'topic': topic,
             'message_type': message_type,
             'notes': contact.get('notes'),
-            'recent_interactions': contact.get('interactions', [])[-3:]
+            'recent_interactions': self.get_recent_history(contact_name)
         }
         
         return context
     
-    def search_contacts(self, query):
-        """Search contacts by name or organization"""
-        contacts = self.get_all_contacts()
-        query_lower = query.lower()
+    def get_recent_history(self, contact_name, count=3):
+        """Last few interactions, oldest first"""
+        return list(reversed(self.get_interactions(contact_name, limit=count)['items']))
+    
+    def get_recent_interactions(self, days=7):
+        """Contacts with an interaction in the last N days, most recent first (one index query)"""
+        cutoff = (datetime.utcnow() - timedelta(days=days)).isoformat()[:10]
+        
+        contacts = self._query_all(
+            IndexName='LAST_INTERACTION',
+            KeyConditionExpression='PK = :pk AND last_interaction >= :cutoff',
+            ExpressionAttributeValues={':pk': f'USER#{self.user_id}', ':cutoff': cutoff},
+            ScanIndexForward=False
+        )
         
-        matches = []
-        for contact in contacts:
-            if (query_lower in contact.get('name', '').lower() or
-                query_lower in contact.get('organization', '').lower() or
-                query_lower in contact.get('role', '').lower()):
-                matches.append(contact)
+        return [{
+            'name': contact['name'],
+            'last_interaction': contact['last_interaction'],
+            'interactions': [{
+                'date': contact['last_interaction'],
+                'type': contact.get('last_interaction_type'),
+                'summary': contact.get('last_interaction_summary')
+            }] if contact.get('last_interaction_type') else []
+        } for contact in contacts]
+    
+    def migrate_embedded_interactions(self):
+        """Move interactions stored in the old per-contact list into their own items
         
-        return matches
+        Contacts with no interactions get last_interaction = NEVER_CONTACTED,
+        so the sparse LAST_INTERACTION index still reports them as stale.
+        Returns the number of contacts changed.
+        """
+        migrated = 0
+        for contact in self.get_all_contacts():
+            interactions = contact.get('interactions')
+            if not interactions:
+                if 'last_interaction' in contact and 'interactions' not in contact:
+                    continue
+                self.table.update_item(
+                    Key={'PK': contact['PK'], 'SK': contact['SK']},
+                    UpdateExpression='SET last_interaction = if_not_exists(last_interaction, :never) '
+                                     'REMOVE interactions',
+                    ExpressionAttributeValues={':never': NEVER_CONTACTED}
+                )
+                migrated += 1
+                continue
+            
+            contact_key = contact['SK'].split('#', 1)[1]
+            with self.table.batch_writer() as batch:
+                for i, interaction in enumerate(interactions):
+                    timestamp = f"{interaction['date']}T00:00:00.{i:06d}"
+                    batch.put_item(Item=dict(
+                        interaction,
+                        PK=contact['PK'],
+                        SK=f'INTERACTION#{contact_key}#{timestamp}',
+                        contact_name=contact['name'],
+                        timestamp=timestamp
+                    ))
+            
+            latest = interactions[-1]
+            self.table.update_item(
+                Key={'PK': contact['PK'], 'SK': contact['SK']},
+                UpdateExpression='SET last_interaction = :l, last_interaction_type = :t, '
+                                 'last_interaction_summary = :s REMOVE interactions',
+                ExpressionAttributeValues={
+                    ':l': latest['date'],
+                    ':t': latest['type'],
+                    ':s': latest['summary']
+                }
+            )
+            migrated += 1
+        return migrated
+    
+    def search_contacts(self, query, limit=20):
+        """Search contacts by name, organization or role, best match first (typos tolerated)"""
+        return self.get_contact_index().search(query, limit=limit)
 
 
 def seed_steven_contacts():
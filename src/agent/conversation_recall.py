@@ -0,0 +1,115 @@
+"""Semantic recall of past exchanges via the Qdrant `conversations` collection
+
+Every finished exchange is embedded and upserted in the background with
+sender, workspace and timestamp in its payload. For a new message the
+most similar past exchanges from the same sender are retrieved, so older
+context costs one vector query however many months of history exist.
+"""
+import uuid
+import atexit
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .document_rag import get_embedding, get_qdrant_client
+from ..utils.tracing import span, wrap
+from ..utils.usage import tags
+
+
+COLLECTION = "conversations"
+RECALL_TOP_K = 3
+RECALL_MIN_SCORE = 0.35  # cosine similarity below this is noise, not memory
+MAX_STORED_CHARS = 2000
+
+_pool = ThreadPoolExecutor(max_workers=2)
+_pending = set()
+
+
+def exchange_text(user_text, assistant_text):
+    return f"User: {user_text}\nCHIEF: {assistant_text}"
+
+
+class ConversationRecall:
+    def __init__(self, qdrant=None, embed=get_embedding):
+        self.qdrant = qdrant or get_qdrant_client()
+        self.embed = embed
+        self.collection = COLLECTION
+    
+    def record(self, sender, workspace, user_text, assistant_text, timestamp=None):
+        """Embed one exchange and upsert it"""
+        from qdrant_client.models import PointStruct
+        
+        timestamp = timestamp or datetime.utcnow()
+        point_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{sender}/{timestamp.isoformat()}"))
+        
+        with tags(feature='conversation_index', workspace=workspace):
+            vector = self.embed(exchange_text(user_text, assistant_text))
+        with span('qdrant.upsert', collection=self.collection):
+            self.qdrant.upsert(collection_name=self.collection, points=[PointStruct(
+                id=point_id,
+                vector=vector,
+                payload={
+                    'sender': sender,
+                    'workspace': workspace,
+                    'timestamp': timestamp.isoformat(),
+                    'user_text': user_text[:MAX_STORED_CHARS],
+                    'assistant_text': assistant_text[:MAX_STORED_CHARS]
+                }
+            )])
+        return point_id
+    
+    def record_async(self, sender, workspace, user_text, assistant_text):
+        """record() on a background thread; call flush_pending() before the process may freeze"""
+        future = _pool.submit(wrap(self.record), sender, workspace, user_text, assistant_text, datetime.utcnow())
+        _pending.add(future)
+        future.add_done_callback(_pending.discard)
+        return future
+    
+    def recall(self, sender, query, top_k=RECALL_TOP_K, min_score=RECALL_MIN_SCORE):
+        """This sender's past exchanges most relevant to query, best first"""
+        from qdrant_client.models import Filter, FieldCondition, MatchValue
+        
+        vector = self.embed(query)
+        with span('qdrant.query_points', collection=self.collection):
+            results = self.qdrant.query_points(
+                collection_name=self.collection,
+                query=vector,
+                query_filter=Filter(must=[FieldCondition(key="sender", match=MatchValue(value=sender))]),
+                limit=top_k,
+                score_threshold=min_score
+            )
+        
+        return [{
+            'score': point.score,
+            'timestamp': point.payload['timestamp'],
+            'workspace': point.payload.get('workspace'),
+            'user_text': point.payload['user_text'],
+            'assistant_text': point.payload['assistant_text']
+        } for point in results.points]
+
+
+def format_memories(memories):
+    """System-prompt section for recalled exchanges"""
+    lines = []
+    for memory in memories:
+        lines.append(f"[{memory['timestamp'][:10]}] User: {memory['user_text']}")
+        lines.append(f"CHIEF: {memory['assistant_text']}")
+    return "\n".join(lines)
+
+
+def flush_pending(timeout=5.0):
+    """Wait for background upserts (Lambda freezes threads once the handler returns)"""
+    if _pending:
+        wait(list(_pending), timeout=timeout)
+
+
+atexit.register(flush_pending)
+
+
+_recall = None
+
+
+def get_conversation_recall():
+    global _recall
+    if _recall is None:
+        _recall = ConversationRecall()
+    return _recall
@@ -0,0 +1,216 @@
+"""Per-sender conversation memory for CHIEF
+
+Each exchange is stored as two turn items under the sender (SMS number or
+chat session). Reads return the most recent turns that fit a token
+budget; once the stored turns outgrow it, the oldest are folded into a
+rolling summary and deleted, so a thread's context stays bounded no
+matter how long it runs.
+
+ConversationStore is backed by DynamoDB; LocalConversationStore keeps the
+same data in memory (Streamlit sessions, local runs).
+"""
+import json
+import time
+import boto3
+import threading
+from datetime import datetime
+from anthropic import Anthropic
+
+from ..utils.tracing import span
+from ..utils.usage import record_usage
+from ..utils.call_policy import call, AWS_CONFIG
+
+
+HISTORY_TOKEN_BUDGET = 2000   # tokens of raw turns sent with each message
+SUMMARY_MODEL = "claude-3-5-haiku-20241022"
+SUMMARY_MAX_TOKENS = 400
+TURN_TTL_DAYS = 90
+
+
+def get_secret(secret_id):
+    client = boto3.client('secretsmanager', region_name='us-east-1', config=AWS_CONFIG)
+    response = client.get_secret_value(SecretId=secret_id)
+    return json.loads(response['SecretString'])
+
+
+def get_dynamodb():
+    return boto3.resource('dynamodb', region_name='us-east-1', config=AWS_CONFIG)
+
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token) - close enough for budgeting"""
+    return len(text) // 4 + 4
+
+
+def summarize_turns(summary, turns):
+    """Fold turns into the running summary with one small-model call"""
+    transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+    try:
+        client = Anthropic(api_key=get_secret('chief/anthropic-api-key')['api_key'], max_retries=0)
+        with span('anthropic.messages', feature='conversation_summary') as s:
+            response = call('anthropic_small', client.messages.create,
+                model=SUMMARY_MODEL,
+                max_tokens=SUMMARY_MAX_TOKENS,
+                system="""You maintain a running summary of a conversation between Chief Steven and his assistant CHIEF.
+Merge the new exchanges into the existing summary. Keep names, dates, decisions, commitments and open questions.
+Drop small talk. Return only the updated summary, under 200 words.""",
+                messages=[{
+                    "role": "user",
+                    "content": f"EXISTING SUMMARY:\n{summary or '(none)'}\n\nNEW EXCHANGES:\n{transcript}"
+                }]
+            )
+            s.record_response(response)
+        record_usage('conversation_summary', SUMMARY_MODEL, response)
+        return response.content[0].text.strip()
+    except Exception:
+        # No model available - keep a clipped transcript rather than losing the turns
+        clipped = "\n".join(f"{turn['role']}: {turn['content'][:200]}" for turn in turns)
+        return f"{summary}\n{clipped}".strip()[-SUMMARY_MAX_TOKENS * 4:]
+
+
+def window(turns, token_budget):
+    """Most recent turns within token_budget, starting on a user turn"""
+    kept = []
+    used = 0
+    for turn in reversed(turns):
+        used += estimate_tokens(turn['content'])
+        if used > token_budget:
+            break
+        kept.append(turn)
+    kept.reverse()
+    
+    while kept and kept[0]['role'] != 'user':
+        kept.pop(0)
+    return kept
+
+
+class BaseConversationStore:
+    """Budgeting and compaction; subclasses implement _read/_write/_compact"""
+    
+    def __init__(self, summarizer=summarize_turns, token_budget=HISTORY_TOKEN_BUDGET):
+        self.summarizer = summarizer
+        self.token_budget = token_budget
+    
+    def load(self, key):
+        """{'summary': str, 'turns': [{'role', 'content'}]} for the next model call"""
+        summary, turns = self._read(key)
+        return {
+            'summary': summary,
+            'turns': [{'role': t['role'], 'content': t['content']} for t in window(turns, self.token_budget)]
+        }
+    
+    def append(self, key, user_text, assistant_text):
+        """Record one exchange, compacting older turns if the thread is over budget"""
+        now = datetime.utcnow().isoformat()
+        new_turns = [
+            {'sk': f'TURN#{now}#0', 'role': 'user', 'content': user_text, 'timestamp': now},
+            {'sk': f'TURN#{now}#1', 'role': 'assistant', 'content': assistant_text, 'timestamp': now}
+        ]
+        summary, turns = self._read(key)
+        self._write(key, new_turns)
+        turns += new_turns
+        
+        if sum(estimate_tokens(t['content']) for t in turns) <= self.token_budget:
+            return
+        
+        # Keep about half the budget raw so we don't re-summarize on every message
+        keep = window(turns, self.token_budget // 2)
+        folded = turns[:len(turns) - len(keep)]
+        if folded:
+            self._compact(key, self.summarizer(summary, folded), folded)
+
+
+class LocalConversationStore(BaseConversationStore):
+    """In-memory stand-in for ConversationStore"""
+    
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.threads = {}
+        self.lock = threading.Lock()
+    
+    def _read(self, key):
+        with self.lock:
+            thread = self.threads.get(key, {'summary': '', 'turns': []})
+            return thread['summary'], list(thread['turns'])
+    
+    def _write(self, key, turns):
+        with self.lock:
+            self.threads.setdefault(key, {'summary': '', 'turns': []})['turns'].extend(turns)
+    
+    def _compact(self, key, summary, folded):
+        folded_keys = {t['sk'] for t in folded}
+        with self.lock:
+            thread = self.threads[key]
+            thread['summary'] = summary
+            thread['turns'] = [t for t in thread['turns'] if t['sk'] not in folded_keys]
+
+
+class ConversationStore(BaseConversationStore):
+    """DynamoDB store: PK CONV#<key>, SK SUMMARY or TURN#<timestamp>#<n>
+    
+    Compacted turns are deleted, so one query returns the summary and every
+    live turn.
+    """
+    
+    def __init__(self, table_name='chief_conversations', **kwargs):
+        super().__init__(**kwargs)
+        self.dynamodb = get_dynamodb()
+        self.table = self.dynamodb.Table(table_name)
+    
+    def _read(self, key):
+        items = []
+        params = {
+            'KeyConditionExpression': 'PK = :pk',
+            'ExpressionAttributeValues': {':pk': f'CONV#{key}'}
+        }
+        while True:
+            response = self.table.query(**params)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        
+        summary = ''
+        turns = []
+        for item in items:
+            if item['SK'] == 'SUMMARY':
+                summary = item.get('summary', '')
+            else:
+                turns.append({'sk': item['SK'], 'role': item['role'], 'content': item['content']})
+        return summary, turns
+    
+    def _write(self, key, turns):
+        expires_at = int(time.time()) + TURN_TTL_DAYS * 86400
+        with self.table.batch_writer() as batch:
+            for turn in turns:
+                batch.put_item(Item={
+                    'PK': f'CONV#{key}',
+                    'SK': turn['sk'],
+                    'role': turn['role'],
+                    'content': turn['content'],
+                    'timestamp': turn['timestamp'],
+                    'expires_at': expires_at
+                })
+    
+    def _compact(self, key, summary, folded):
+        self.table.put_item(Item={
+            'PK': f'CONV#{key}',
+            'SK': 'SUMMARY',
+            'summary': summary,
+            'compacted_through': folded[-1]['sk'],
+            'updated_at': datetime.utcnow().isoformat()
+        })
+        with self.table.batch_writer() as batch:
+            for turn in folded:
+                batch.delete_item(Key={'PK': f'CONV#{key}', 'SK': turn['sk']})
+
+
+_store = None
+
+
+def get_conversation_store():
+    """Process-wide DynamoDB store (reused across warm Lambda invocations)"""
+    global _store
+    if _store is None:
+        _store = ConversationStore()
+    return _store
@@ -1,11 +1,85 @@
 """Professional Development & Credentials Manager for CHIEF"""
 import json
+import uuid
 import boto3
 from datetime import datetime, timedelta
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+
+from ..utils.call_policy import AWS_CONFIG
+
+
+MAX_TRANSACT_ITEMS = 100  # DynamoDB limit on actions per transaction
+MAX_CONFLICT_RETRIES = 2  # a concurrent write to the same credential cancels the transaction
 
 
 def get_dynamodb():
-    return boto3.resource('dynamodb', region_name='us-east-1')
+    return boto3.resource('dynamodb', region_name='us-east-1', config=AWS_CONFIG)
+
+
+def get_dynamodb_client():
+    """Low-level client (typed attribute values) for transactions"""
+    return boto3.client('dynamodb', region_name='us-east-1', config=AWS_CONFIG)
+
+
+_serializer = TypeSerializer()
+
+
+def serialize(item):
+    """Python values -> DynamoDB attribute values, for low-level transaction calls"""
+    return {k: _serializer.serialize(v) for k, v in item.items()}
+
+
+def credential_key(name):
+    return name.upper().replace(" ", "_")
+
+
+def days_until(expiration_date, today):
+    """Days from today to an ISO expiration date, or None if there isn't a usable one"""
+    if not expiration_date or expiration_date == 'none':
+        return None
+    try:
+        return (datetime.fromisoformat(expiration_date).date() - today).days
+    except ValueError:
+        return None
+
+
+def summarize_credentials(credentials, expiring_days=90, today=None):
+    """Status counts, CEU progress and expiring credentials in one pass over the list"""
+    today = today or datetime.utcnow().date()
+    active = in_progress = 0
+    ceu_status = []
+    expiring = []
+    
+    for cred in credentials:
+        status = cred.get('status')
+        if status == 'active':
+            active += 1
+        elif status == 'in_progress':
+            in_progress += 1
+        
+        required = int(cred.get('ceu_required', 0))
+        if required > 0:
+            earned = int(cred.get('ceu_earned', 0))
+            ceu_status.append({
+                'name': cred['name'],
+                'earned': earned,
+                'required': required,
+                'remaining': max(0, required - earned),
+                'percent': min(100, int((earned / required) * 100))
+            })
+        
+        days_left = days_until(cred.get('expiration_date'), today)
+        if days_left is not None and days_left <= expiring_days:
+            expiring.append(dict(cred, days_until_expiration=days_left))
+    
+    expiring.sort(key=lambda x: x['days_until_expiration'])
+    return {
+        'active': active,
+        'in_progress': in_progress,
+        'ceu_status': ceu_status,
+        'expiring': expiring
+    }
 
 
 class CredentialsManager:
@@ -13,15 +87,44 @@ class CredentialsManager:
         self.user_id = user_id
         self.dynamodb = get_dynamodb()
         self.table = self.dynamodb.Table('chief_credentials')
+        self._client = None
+    
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = get_dynamodb_client()
+        return self._client
+    
+    def _key(self, credential_name):
+        return {
+            'PK': f'USER#{self.user_id}',
+            'SK': f'CRED#{credential_key(credential_name)}'
+        }
+    
+    def _ledger_entry(self, credential_name, ceus, description=None, date=None, entry_id=None):
+        """CEU ledger item: SK CEU#<credential>#<date>#<id>, kept beside the credential"""
+        now = datetime.utcnow().isoformat()
+        date = date or now[:10]
+        return {
+            'PK': f'USER#{self.user_id}',
+            'SK': f'CEU#{credential_key(credential_name)}#{date}#{entry_id or uuid.uuid4().hex[:12]}',
+            'credential_name': credential_name,
+            'ceus': ceus,
+            'description': description,
+            'date': date,
+            'recorded_at': now
+        }
     
     def add_credential(self, name, credential_type, status="active", 
                        expiration_date=None, ceu_required=0, ceu_earned=0,
                        issuing_body=None, credential_id=None):
         self.table.put_item(Item={
             'PK': f'USER#{self.user_id}',
-            'SK': f'CRED#{name.upper().replace(" ", "_")}',
+            'SK': f'CRED#{credential_key(name)}',
             'GSI1PK': f'TYPE#{credential_type}',
             'GSI1SK': f'EXP#{expiration_date or "none"}',
+            'GSI2PK': f'USER#{self.user_id}',
+            'GSI2SK': f'EXP#{expiration_date or "none"}',
             'name': name,
             'credential_type': credential_type,
             'status': status,
@@ -34,27 +137,52 @@ class CredentialsManager:
         })
         return f"Added: {name}"
     
-    def update_ceu(self, credential_name, ceu_to_add, description=None):
-        key = {
-            'PK': f'USER#{self.user_id}',
-            'SK': f'CRED#{credential_name.upper().replace(" ", "_")}'
-        }
-        response = self.table.get_item(Key=key)
-        if 'Item' not in response:
-            return None, "Credential not found"
+    def update_ceu(self, credential_name, ceu_to_add, description=None, date=None, entry_id=None):
+        """Credit CEUs to a credential
         
-        current = response['Item']
-        new_total = int(current.get('ceu_earned', 0)) + ceu_to_add
+        The ledger entry and the server-side counter bump (ADD ceu_earned)
+        are written in one transaction, so the counter never moves without
+        its ledger row. The ledger put is conditioned on its SK being new:
+        retrying with the same entry_id (e.g. a certificate number) can't
+        count the credit twice. Totals come from a consistent read after
+        the write.
+        """
+        entry = self._ledger_entry(credential_name, ceu_to_add, description, date, entry_id)
+        actions = [
+            {'Put': {
+                'TableName': self.table.name,
+                'Item': serialize(entry),
+                'ConditionExpression': 'attribute_not_exists(SK)'
+            }},
+            {'Update': {
+                'TableName': self.table.name,
+                'Key': serialize(self._key(credential_name)),
+                'UpdateExpression': 'ADD ceu_earned :n SET updated_at = :ts',
+                'ConditionExpression': 'attribute_exists(SK)',
+                'ExpressionAttributeValues': serialize({
+                    ':n': ceu_to_add,
+                    ':ts': entry['recorded_at']
+                })
+            }}
+        ]
         
-        self.table.update_item(
-            Key=key,
-            UpdateExpression='SET ceu_earned = :ceu, updated_at = :ts',
-            ExpressionAttributeValues={
-                ':ceu': new_total,
-                ':ts': datetime.utcnow().isoformat()
-            }
-        )
+        for attempt in range(MAX_CONFLICT_RETRIES + 1):
+            try:
+                self.client.transact_write_items(TransactItems=actions)
+                break
+            except ClientError as e:
+                codes = [reason.get('Code') for reason in e.response.get('CancellationReasons', [])]
+                if len(codes) != 2:
+                    raise
+                if codes[1] == 'ConditionalCheckFailed':
+                    return None, "Credential not found"
+                if codes[0] == 'ConditionalCheckFailed':
+                    return None, "CEU entry already recorded"
+                if 'TransactionConflict' not in codes or attempt == MAX_CONFLICT_RETRIES:
+                    raise
         
+        current = self.table.get_item(Key=self._key(credential_name), ConsistentRead=True)['Item']
+        new_total = int(current.get('ceu_earned', 0))
         required = int(current.get('ceu_required', 0))
         remaining = max(0, required - new_total)
         
@@ -66,11 +194,137 @@ class CredentialsManager:
             'complete': new_total >= required
         }, "CEUs updated"
     
+    def get_ceu_ledger(self, credential_name):
+        """Every CEU credit recorded for a credential, oldest first"""
+        items = []
+        params = {
+            'KeyConditionExpression': 'PK = :pk AND begins_with(SK, :sk)',
+            'ExpressionAttributeValues': {
+                ':pk': f'USER#{self.user_id}',
+                ':sk': f'CEU#{credential_key(credential_name)}#'
+            }
+        }
+        while True:
+            response = self.table.query(**params)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        
+        fields = ('date', 'ceus', 'description', 'recorded_at')
+        return [{k: item.get(k) for k in fields} for item in items]
+    
+    def import_ceus(self, entries):
+        """Bulk-record CEU credits in batched transactions
+        
+        entries: dicts with credential_name, ceus and optional description,
+        date and entry_id (e.g. a certificate number - re-importing the same
+        entry_id is skipped rather than counted twice).
+        
+        A transaction may touch each item once, so each batch holds ledger
+        puts plus one ADD per credential for their sum, at most 100 actions.
+        A batch that is cancelled because of duplicate entries or unknown
+        credentials is retried once without them.
+        
+        Returns {'imported': n, 'totals': {credential: ceu_earned}, 'skipped': [entry]}.
+        """
+        # Group per credential; each chunk is up to 99 ledger puts + 1 counter update
+        chunks = []
+        by_credential = {}
+        for entry in entries:
+            by_credential.setdefault(credential_key(entry['credential_name']), []).append(entry)
+        for group in by_credential.values():
+            for i in range(0, len(group), MAX_TRANSACT_ITEMS - 1):
+                chunks.append(group[i:i + MAX_TRANSACT_ITEMS - 1])
+        
+        # Pack chunks into transactions without touching a credential twice in one
+        batches = []
+        batch, size, credentials = [], 0, set()
+        for chunk in chunks:
+            cred = credential_key(chunk[0]['credential_name'])
+            if size + len(chunk) + 1 > MAX_TRANSACT_ITEMS or cred in credentials:
+                batches.append(batch)
+                batch, size, credentials = [], 0, set()
+            batch.append(chunk)
+            size += len(chunk) + 1
+            credentials.add(cred)
+        if batch:
+            batches.append(batch)
+        
+        result = {'imported': 0, 'totals': {}, 'skipped': []}
+        for batch in batches:
+            self._write_ceu_batch(batch, result, retry=True)
+        
+        # Transactions don't return values; read the new totals once at the end
+        for cred in self.get_all_credentials():
+            if credential_key(cred['name']) in by_credential:
+                result['totals'][cred['name']] = int(cred.get('ceu_earned', 0))
+        return result
+    
+    def _write_ceu_batch(self, batch, result, retry):
+        now = datetime.utcnow().isoformat()
+        actions = []
+        owners = []  # (chunk index, entry or None for the counter update) per action
+        
+        for i, chunk in enumerate(batch):
+            for entry in chunk:
+                item = self._ledger_entry(entry['credential_name'], entry['ceus'], entry.get('description'),
+                                          entry.get('date'), entry.get('entry_id'))
+                actions.append({'Put': {
+                    'TableName': self.table.name,
+                    'Item': serialize(item),
+                    'ConditionExpression': 'attribute_not_exists(SK)'
+                }})
+                owners.append((i, entry))
+            actions.append({'Update': {
+                'TableName': self.table.name,
+                'Key': serialize(self._key(chunk[0]['credential_name'])),
+                'UpdateExpression': 'ADD ceu_earned :n SET updated_at = :ts',
+                'ConditionExpression': 'attribute_exists(SK)',
+                'ExpressionAttributeValues': serialize({
+                    ':n': sum(entry['ceus'] for entry in chunk),
+                    ':ts': now
+                })
+            }})
+            owners.append((i, None))
+        
+        try:
+            self.client.transact_write_items(TransactItems=actions)
+        except ClientError as e:
+            reasons = e.response.get('CancellationReasons')
+            if not reasons or not retry:
+                raise
+            
+            # Drop duplicate entries and whole chunks whose credential doesn't exist
+            failed_chunks = set()
+            duplicates = set()
+            for (i, entry), reason in zip(owners, reasons):
+                if reason.get('Code') != 'ConditionalCheckFailed':
+                    continue
+                if entry is None:
+                    failed_chunks.add(i)
+                else:
+                    duplicates.add(id(entry))
+            if not failed_chunks and not duplicates:
+                raise
+            
+            remaining = []
+            for i, chunk in enumerate(batch):
+                if i in failed_chunks:
+                    result['skipped'].extend(chunk)
+                    continue
+                kept = [entry for entry in chunk if id(entry) not in duplicates]
+                result['skipped'].extend(entry for entry in chunk if id(entry) in duplicates)
+                if kept:
+                    remaining.append(kept)
+            if remaining:
+                self._write_ceu_batch(remaining, result, retry=False)
+            return
+        
+        result['imported'] += sum(len(chunk) for chunk in batch)
+    
     def get_credential(self, credential_name):
-        response = self.table.get_item(Key={
-            'PK': f'USER#{self.user_id}',
-            'SK': f'CRED#{credential_name.upper().replace(" ", "_")}'
-        })
+        response = self.table.get_item(Key=self._key(credential_name))
         return response.get('Item')
     
     def get_all_credentials(self):
@@ -84,48 +338,61 @@ class CredentialsManager:
         return response.get('Items', [])
     
     def get_expiring_soon(self, days=90):
-        credentials = self.get_all_credentials()
-        expiring = []
+        """Credentials expiring within N days (or already expired), soonest first
+        
+        A key-condition range on GSI2 (USER#<id>, EXP#<date>), so only the
+        matching credentials are read. 'EXP#none' sorts after every date and
+        is never returned.
+        """
         today = datetime.utcnow().date()
-        threshold = today + timedelta(days=days)
-        
-        for cred in credentials:
-            exp_date = cred.get('expiration_date')
-            if exp_date and exp_date != 'none':
-                try:
-                    exp = datetime.fromisoformat(exp_date).date()
-                    if exp <= threshold:
-                        days_left = (exp - today).days
-                        cred['days_until_expiration'] = days_left
-                        expiring.append(cred)
-                except:
-                    pass
-        
-        return sorted(expiring, key=lambda x: x.get('days_until_expiration', 999))
+        threshold = (today + timedelta(days=days)).isoformat()
+        
+        response = self.table.query(
+            IndexName='GSI2',
+            KeyConditionExpression='GSI2PK = :pk AND GSI2SK BETWEEN :start AND :end',
+            ExpressionAttributeValues={
+                ':pk': f'USER#{self.user_id}',
+                ':start': 'EXP#0000-00-00',
+                ':end': f'EXP#{threshold}'
+            }
+        )
+        
+        expiring = []
+        for cred in response.get('Items', []):
+            days_left = days_until(cred.get('expiration_date'), today)
+            if days_left is not None:
+                cred['days_until_expiration'] = days_left
+                expiring.append(cred)
+        
+        return expiring
     
     def get_ceu_status(self):
+        return summarize_credentials(self.get_all_credentials())['ceu_status']
+    
+    def get_status(self, expiring_days=90):
+        """All credentials plus their summary, from a single query"""
         credentials = self.get_all_credentials()
-        ceu_status = []
-        
-        for cred in credentials:
-            required = int(cred.get('ceu_required', 0))
-            if required > 0:
-                earned = int(cred.get('ceu_earned', 0))
-                ceu_status.append({
-                    'name': cred['name'],
-                    'earned': earned,
-                    'required': required,
-                    'remaining': max(0, required - earned),
-                    'percent': min(100, int((earned / required) * 100))
-                })
-        
-        return ceu_status
+        return dict(summarize_credentials(credentials, expiring_days), credentials=credentials)
+    
+    def backfill_expiry_index(self):
+        """Add GSI2 keys to credentials written before GSI2 existed"""
+        updated = 0
+        for cred in self.get_all_credentials():
+            if 'GSI2PK' in cred:
+                continue
+            self.table.update_item(
+                Key={'PK': cred['PK'], 'SK': cred['SK']},
+                UpdateExpression='SET GSI2PK = :pk, GSI2SK = :sk',
+                ExpressionAttributeValues={
+                    ':pk': f'USER#{self.user_id}',
+                    ':sk': f'EXP#{cred.get("expiration_date") or "none"}'
+                }
+            )
+            updated += 1
+        return updated
     
     def add_milestone(self, credential_name, milestone, date_achieved=None):
-        key = {
-            'PK': f'USER#{self.user_id}',
-            'SK': f'CRED#{credential_name.upper().replace(" ", "_")}'
-        }
+        key = self._key(credential_name)
         response = self.table.get_item(Key=key)
         if 'Item' not in response:
             return None, "Credential not found"
@@ -147,25 +414,23 @@ class CredentialsManager:
         )
         return milestones, "Milestone added"
     
-    def format_status_report(self):
-        credentials = self.get_all_credentials()
-        active = len([c for c in credentials if c.get('status') == 'active'])
-        in_progress = len([c for c in credentials if c.get('status') == 'in_progress'])
+    def format_status_report(self, status=None):
+        status = status or self.get_status(90)
         
         lines = [
             "PROFESSIONAL DEVELOPMENT STATUS",
             "=" * 35,
-            f"Active Credentials: {active}",
-            f"In Progress: {in_progress}",
+            f"Active Credentials: {status['active']}",
+            f"In Progress: {status['in_progress']}",
             "",
             "CEU PROGRESS:"
         ]
         
-        for ceu in self.get_ceu_status():
+        for ceu in status['ceu_status']:
             bar = "#" * (ceu['percent'] // 10) + "-" * (10 - ceu['percent'] // 10)
             lines.append(f"  {ceu['name']}: [{bar}] {ceu['earned']}/{ceu['required']}")
         
-        expiring = self.get_expiring_soon(90)
+        expiring = status['expiring']
         if expiring:
             lines.append("")
             lines.append("EXPIRING SOON:")
@@ -7,15 +7,19 @@ from datetime import datetime
 from anthropic import Anthropic
 import openai
 
+from ..utils.tracing import span, payload_size
+from ..utils.usage import record_usage, model_for, tags
+from ..utils.call_policy import call, AWS_CONFIG
+
 
 def get_secret(secret_id):
-    client = boto3.client('secretsmanager', region_name='us-east-1')
+    client = boto3.client('secretsmanager', region_name='us-east-1', config=AWS_CONFIG)
     response = client.get_secret_value(SecretId=secret_id)
     return json.loads(response['SecretString'])
 
 
 def get_dynamodb():
-    return boto3.resource('dynamodb', region_name='us-east-1')
+    return boto3.resource('dynamodb', region_name='us-east-1', config=AWS_CONFIG)
 
 
 def get_qdrant_client():
@@ -24,18 +28,39 @@ def get_qdrant_client():
     return QdrantClient(url=creds['url'], api_key=creds['api_key'])
 
 
-def get_embedding(text):
-    """Get embedding using OpenAI"""
+def get_embedding(text, feature=None):
+    """Get embedding using OpenAI (usage is billed to feature, or the enclosing usage tags)"""
     creds = get_secret('chief/openai-api-key')
-    client = openai.OpenAI(api_key=creds['api_key'])
+    client = openai.OpenAI(api_key=creds['api_key'], max_retries=0)
     
-    response = client.embeddings.create(
-        model="text-embedding-3-small",
-        input=text
-    )
+    with span('openai.embeddings', bytes_in=payload_size(text)) as s:
+        response = call('embeddings', client.embeddings.create,
+            model="text-embedding-3-small",
+            input=text
+        )
+        s.record_response(response)
+    record_usage(feature, "text-embedding-3-small", response)
     return response.data[0].embedding
 
 
+def get_embeddings(texts, batch_size=100, feature=None):
+    """Embeddings for many texts, one API request per batch"""
+    creds = get_secret('chief/openai-api-key')
+    client = openai.OpenAI(api_key=creds['api_key'], max_retries=0)
+    
+    embeddings = []
+    for i in range(0, len(texts), batch_size):
+        with span('openai.embeddings', batch=len(texts[i:i + batch_size])) as s:
+            response = call('embeddings', client.embeddings.create,
+                model="text-embedding-3-small",
+                input=texts[i:i + batch_size]
+            )
+            s.record_response(response)
+        record_usage(feature, "text-embedding-3-small", response)
+        embeddings.extend(item.embedding for item in sorted(response.data, key=lambda d: d.index))
+    return embeddings
+
+
 class DocumentRAG:
     def __init__(self, user_id="steven"):
         self.user_id = user_id
@@ -79,7 +104,7 @@ class DocumentRAG:
         
         points = []
         for i, chunk in enumerate(chunks):
-            embedding = get_embedding(chunk)
+            embedding = get_embedding(chunk, feature='document_index')
             point_id = int(hashlib.md5(f"{doc_id}{i}".encode()).hexdigest()[:8], 16)
             
             points.append(PointStruct(
@@ -95,7 +120,8 @@ class DocumentRAG:
                 }
             ))
         
-        self.qdrant.upsert(collection_name=self.collection, points=points)
+        with span('qdrant.upsert', collection=self.collection, points=len(points)):
+            self.qdrant.upsert(collection_name=self.collection, points=points)
         
         return {
             'doc_id': doc_id,
@@ -116,12 +142,13 @@ class DocumentRAG:
             )
         
         # Use query instead of search for newer qdrant-client
-        results = self.qdrant.query_points(
-            collection_name=self.collection,
-            query=query_embedding,
-            query_filter=search_filter,
-            limit=top_k
-        )
+        with span('qdrant.query_points', collection=self.collection):
+            results = self.qdrant.query_points(
+                collection_name=self.collection,
+                query=query_embedding,
+                query_filter=search_filter,
+                limit=top_k
+            )
         
         citations = []
         for i, result in enumerate(results.points):
@@ -139,7 +166,8 @@ class DocumentRAG:
     
     def query_with_answer(self, question, doc_type=None):
         """Search docs and generate answer with citations"""
-        citations = self.search(question, doc_type=doc_type, top_k=5)
+        with tags(feature='document_answer'):
+            citations = self.search(question, doc_type=doc_type, top_k=5)
         
         if not citations:
             return {
@@ -153,18 +181,20 @@ class DocumentRAG:
         ])
         
         creds = get_secret('chief/anthropic-api-key')
-        client = Anthropic(api_key=creds['api_key'])
+        client = Anthropic(api_key=creds['api_key'], max_retries=0)
+        model = model_for('document_answer', "claude-sonnet-4-20250514")
         
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=800,
-            system="""You are CHIEF, answering questions based on provided documents.
+        with span('anthropic.messages', feature='document_answer', model=model) as s:
+            response = call('anthropic', client.messages.create,
+                model=model,
+                max_tokens=800,
+                system="""You are CHIEF, answering questions based on provided documents.
 Always cite your sources using [Source N] format.
 If the documents don't contain the answer, say so.
 Be concise and direct.""",
-            messages=[{
-                "role": "user",
-                "content": f"""Based on these documents, answer the question.
+                messages=[{
+                    "role": "user",
+                    "content": f"""Based on these documents, answer the question.
 
 DOCUMENTS:
 {context}
@@ -172,8 +202,10 @@ DOCUMENTS:
 QUESTION: {question}
 
 Provide a clear answer with citations."""
-            }]
-        )
+                }]
+            )
+            s.record_response(response)
+        record_usage('document_answer', model, response)
         
         return {
             'answer': response.content[0].text,
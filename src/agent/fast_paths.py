@@ -0,0 +1,176 @@
+"""Direct handlers for intents that don't need the general model
+
+Calendar lookups, briefings, note sessions, action lists and credential
+status are answered straight from the calendar, notes and credentials
+modules and formatted deterministically. A handler returns None when it
+can't answer, and the message falls through to the full model.
+
+While a note session is open, every message that isn't a command or a
+question is added to the session instead of going to the model. Sessions
+older than NOTE_SESSION_MAX_AGE stop catching messages.
+"""
+import re
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from ..calendar.free_busy import DEFAULT_TIMEZONE
+
+
+TITLE_PATTERN = re.compile(r'\b(?:for|on|about|during|at)\s+(?:the\s+|my\s+|a\s+)?(.+?)[.!?]*$', re.IGNORECASE)
+MAX_LISTED = 10
+QUESTION_PATTERN = re.compile(
+    r'\?\s*$|^\s*(?:what|when|where|who|why|how|which|can you|could you|do i|am i|is there|are there)\b',
+    re.IGNORECASE
+)
+
+
+def _has(text, pattern):
+    return re.search(pattern, text, re.IGNORECASE) is not None
+
+
+def _local_day(offset_days=0, tz_name=DEFAULT_TIMEZONE):
+    """(start, end) of a local calendar day as aware datetimes"""
+    tz = ZoneInfo(tz_name)
+    start = datetime.now(tz).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=offset_days)
+    return start, start + timedelta(days=1)
+
+
+def handle_calendar_query(state, hits):
+    """Today's / tomorrow's / this week's events, or open slots when asked about free time"""
+    from ..calendar.google_calendar import get_events_between, find_free_time, format_events_for_display
+    
+    text = state["user_input"]
+    
+    if _has(text, r'\bweek\w*\b'):
+        start, _ = _local_day()
+        end = start + timedelta(days=7)
+        period, label = "this week", "THIS WEEK"
+    elif _has(text, r'\btomorrow\b'):
+        start, end = _local_day(1)
+        period, label = "tomorrow", f"TOMORROW ({start.strftime('%a %m/%d')})"
+    else:
+        start, end = _local_day()
+        period, label = "today", f"TODAY ({start.strftime('%a %m/%d')})"
+    
+    if _has(text, r'\b(free|availab\w*|open slot\w*)\b'):
+        # find_free_time starts no earlier than now
+        slots = find_free_time(duration_minutes=30, start=start, end=end)
+        if not slots:
+            return f"No open time in working hours {period}."
+        lines = [f"🕐 OPEN TIME {label}:"]
+        for slot in slots[:MAX_LISTED]:
+            lines.append(f"• {slot['start'].strftime('%a %m/%d %I:%M %p')} - "
+                         f"{slot['end'].strftime('%I:%M %p')} ({slot['duration_minutes']} min)")
+        return "\n".join(lines)
+    
+    events = get_events_between(start, end)
+    return f"📅 {label}:\n{format_events_for_display(events)}"
+
+
+def handle_briefing(state, hits):
+    """Briefings are precomputed - serve the snapshot"""
+    from .briefing import get_briefing_text
+    return get_briefing_text()
+
+
+def note_title(text):
+    """Session title from 'start notes for the union meeting' style requests"""
+    match = TITLE_PATTERN.search(text.strip())
+    if match:
+        return match.group(1).strip()[:100]
+    return f"Notes {datetime.now(ZoneInfo(DEFAULT_TIMEZONE)).strftime('%m/%d %I:%M %p')}"
+
+
+def handle_note_start(state, hits):
+    from ..notes.note_manager import get_note_session
+    
+    notes = get_note_session()
+    active = notes.get_active_session()
+    if active:
+        return f"Already taking notes: {active['title']}. Reply 'done with notes' to close it."
+    
+    title = note_title(state["user_input"])
+    notes.start_session(title, state["workspace"])
+    return f"📝 Taking notes: {title} [{state['workspace'].upper()}]\nText me anything to add. Reply 'done with notes' to finish."
+
+
+def handle_note_end(state, hits):
+    from ..notes.note_manager import get_note_session
+    
+    notes = get_note_session()
+    active = notes.get_active_session()
+    if not active:
+        return "No note session is open."
+    
+    summary, _ = notes.end_session(active['session_id'])
+    return f"✅ Notes closed: {active['title']}\n\n{summary}"
+
+
+def handle_note_add(state, hits):
+    """Add to the open session; without one the message goes to the model"""
+    from ..notes.note_manager import get_note_session, NOTE_SESSION_MAX_AGE
+    
+    notes = get_note_session()
+    active = notes.get_active_session(max_age=NOTE_SESSION_MAX_AGE)
+    if not active:
+        return None
+    
+    actions, _ = notes.add_entry(active['session_id'], state["user_input"], input_type="sms")
+    if not actions:
+        return f"Noted ({active['title']})."
+    lines = [f"Noted ({active['title']}). Action items:"]
+    lines += [f"• {action['description']}" for action in actions]
+    return "\n".join(lines)
+
+
+def handle_action_query(state, hits):
+    from ..notes.note_manager import get_note_session
+    
+    actions = get_note_session().get_pending_actions()
+    if not actions:
+        return "No pending action items. 👍"
+    
+    # Dated items first, soonest first
+    actions.sort(key=lambda a: (a.get('due_date') in (None, 'none'), a.get('due_date') or ''))
+    lines = [f"✅ PENDING ACTIONS ({len(actions)}):"]
+    for action in actions[:MAX_LISTED]:
+        due = action.get('due_date')
+        due = f" (due {due})" if due and due != 'none' else ""
+        flag = "❗" if action.get('priority') == 'high' else ""
+        lines.append(f"• {flag}{action['description']}{due}")
+    if len(actions) > MAX_LISTED:
+        lines.append(f"…and {len(actions) - MAX_LISTED} more")
+    return "\n".join(lines)
+
+
+def handle_credential_query(state, hits):
+    from .credentials_manager import CredentialsManager
+    return CredentialsManager().format_status_report()
+
+
+FAST_PATHS = {
+    "calendar_query": handle_calendar_query,
+    "briefing": handle_briefing,
+    "note_start": handle_note_start,
+    "note_end": handle_note_end,
+    "note_add": handle_note_add,
+    "action_query": handle_action_query,
+    "credential_query": handle_credential_query,
+}
+
+
+# Intents that are acted on even while a note session is open
+COMMAND_INTENTS = set(FAST_PATHS) - {"note_add"} | {"calendar_create", "calendar_modify"}
+
+
+def route(state, hits):
+    """Answer from a fast path if one handles this intent, else None"""
+    if state["intent"] not in COMMAND_INTENTS:
+        # Questions are for the model; anything else is noted if a session is open
+        if QUESTION_PATTERN.search(state["user_input"]):
+            return None
+        return handle_note_add(state, hits)
+    handler = FAST_PATHS.get(state["intent"])
+    if handler is None:
+        return None
+    return handler(state, hits)
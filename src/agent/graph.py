@@ -0,0 +1,125 @@
+"""Tool-use loop for CHIEF as a LangGraph state graph
+
+    agent --(tool_use)--> tools --> agent --(text)--> END
+
+The agent node calls Claude with the tool schemas; the tools node runs
+every tool call from that turn concurrently. Each node has a latency
+budget, and after MAX_ITERATIONS tool rounds the model must answer with
+what it has.
+"""
+import time
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import StateGraph, END
+
+from .state import AgentState
+from .tools import TOOL_SCHEMAS, run_tools
+from ..utils.tracing import span
+from ..utils.usage import record_usage, model_for
+from ..utils.call_policy import call, budget
+
+
+MODEL = "claude-sonnet-4-20250514"
+MAX_TOKENS = 1024
+MAX_ITERATIONS = 3
+NODE_BUDGETS = {
+    'agent': 25.0,  # seconds per model call
+    'tools': 8.0,   # seconds for one round of parallel tools
+}
+
+TOOL_GUIDANCE = """
+
+## Tools:
+You can look up the user's calendar, documents, meeting notes, action items, contacts and credentials.
+When a question needs several sources, request every tool you need in the same turn - they run in parallel.
+Don't call a tool whose answer you already have in this conversation."""
+
+
+def _block_to_dict(block):
+    if block.type == 'text':
+        return {'type': 'text', 'text': block.text}
+    if block.type == 'tool_use':
+        return {'type': 'tool_use', 'id': block.id, 'name': block.name, 'input': block.input}
+    return block.model_dump()
+
+
+def build_agent_graph(budgets=None, max_iterations=MAX_ITERATIONS):
+    """Compile the agent/tools loop
+    
+    The Anthropic client and system prompt are per request and come in
+    through config["configurable"], so the graph itself is compiled once.
+    """
+    budgets = dict(NODE_BUDGETS, **(budgets or {}))
+    
+    def agent(state: AgentState, config: RunnableConfig):
+        client = config["configurable"]["client"]
+        system = config["configurable"]["system"] + TOOL_GUIDANCE
+        request = {}
+        if state["iterations"] >= max_iterations:
+            # Out of tool rounds - answer from the results so far
+            request['tool_choice'] = {'type': 'none'}
+        
+        started = time.monotonic()
+        model = model_for('agent', MODEL)
+        with span('anthropic.messages', feature='agent', model=model, iteration=state["iterations"]) as s:
+            response = call('anthropic', client.messages.create,
+                model=model,
+                max_tokens=MAX_TOKENS,
+                system=system,
+                tools=TOOL_SCHEMAS,
+                messages=state["messages"],
+                timeout=budgets['agent'],
+                **request
+            )
+            s.record_response(response)
+        record_usage('agent', model, response, workspace=state["workspace"])
+        
+        content = [_block_to_dict(block) for block in response.content]
+        text = "\n".join(block['text'] for block in content if block['type'] == 'text')
+        return {
+            "messages": state["messages"] + [{"role": "assistant", "content": content}],
+            "response": text,
+            "context": state["context"] + [f"agent: {response.stop_reason} in {time.monotonic() - started:.2f}s"]
+        }
+    
+    def tools(state: AgentState):
+        tool_uses = [block for block in state["messages"][-1]["content"] if block['type'] == 'tool_use']
+        
+        started = time.monotonic()
+        results = run_tools(tool_uses, timeout=budget(budgets['tools']))
+        
+        return {
+            "messages": state["messages"] + [{"role": "user", "content": results}],
+            "iterations": state["iterations"] + 1,
+            "actions_taken": state["actions_taken"] + [block['name'] for block in tool_uses],
+            "context": state["context"] + [f"tools: {len(tool_uses)} in {time.monotonic() - started:.2f}s"]
+        }
+    
+    def next_step(state: AgentState):
+        last = state["messages"][-1]["content"]
+        if any(block['type'] == 'tool_use' for block in last):
+            return "tools"
+        return END
+    
+    graph = StateGraph(AgentState)
+    graph.add_node("agent", agent)
+    graph.add_node("tools", tools)
+    graph.set_entry_point("agent")
+    graph.add_conditional_edges("agent", next_step, {"tools": "tools", END: END})
+    graph.add_edge("tools", "agent")
+    return graph.compile()
+
+
+_graph = None
+
+
+def run_agent(client, system, state: AgentState):
+    """Run the tool loop from state["messages"]; returns the final state"""
+    global _graph
+    if _graph is None:
+        _graph = build_agent_graph()
+    
+    return _graph.invoke(state, {
+        "configurable": {"client": client, "system": system},
+        # agent + tools per iteration, plus the final answer
+        "recursion_limit": 2 * MAX_ITERATIONS + 3
+    })
@@ -0,0 +1,157 @@
+"""Compiled keyword matching for CHIEF routing
+
+All routing keywords (workspaces and intent cues) are compiled into one
+trie-factored alternation regex anchored on word boundaries, so a message is
+scanned once and "cba" no longer fires inside unrelated words. A keyword
+ending in '*' matches as a word prefix ('schedul*' matches 'scheduling').
+"""
+import os
+import re
+import json
+import time
+import threading
+
+
+def _trie_regex(keywords):
+    """Regex for a set of keywords, factored into a character trie
+    
+    Python's re tries alternatives one by one, so a flat "a|b|c|..." costs
+    one attempt per keyword at every word start. Sharing prefixes keeps each
+    attempt to roughly one branch per character.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[''] = True
+    
+    def build(node):
+        branches = []
+        optional = False
+        # Literal continuations before '*', so "schedule a" still matches alongside "schedul*"
+        for ch, child in sorted(node.items(), key=lambda item: (item[0] == '*', item[0])):
+            if ch == '':
+                optional = True
+            elif ch == '*':
+                branches.append(r'\w*')
+            else:
+                branches.append(re.escape(ch) + build(child))
+        if not branches:
+            return ''
+        if len(branches) == 1 and not optional:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')' + ('?' if optional else '')
+    
+    return build(trie)
+
+
+class KeywordMatcher:
+    MAX_RESOLVED = 10000
+    
+    def __init__(self, rules):
+        """rules: {label: [keyword, ...]}"""
+        self.rules = rules
+        self.exact = {}
+        self.stems = {}
+        for label, keywords in rules.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword.endswith('*'):
+                    self.stems.setdefault(keyword[:-1], set()).add(label)
+                else:
+                    self.exact.setdefault(keyword, set()).add(label)
+        self.stem_lengths = sorted({len(stem) for stem in self.stems})
+        self.resolved = {}
+        
+        keywords = list(self.exact) + [stem + '*' for stem in self.stems]
+        # Lookahead so keywords starting at different words can overlap
+        self.regex = re.compile(r'\b(?=(' + _trie_regex(keywords) + r')\b)') if keywords else None
+    
+    def _labels(self, found):
+        """Labels for a matched span, including shorter keywords that start at the same word"""
+        labels = self.resolved.get(found)
+        if labels is None:
+            labels = set()
+            words = found.split(' ')
+            for k in range(1, len(words) + 1):
+                labels |= self.exact.get(' '.join(words[:k]), set())
+            for n in self.stem_lengths:
+                labels |= self.stems.get(found[:n], set())
+            if len(self.resolved) >= self.MAX_RESOLVED:
+                self.resolved.clear()
+            self.resolved[found] = labels = frozenset(labels)
+        return labels
+    
+    def match(self, text):
+        """Set of labels with at least one keyword hit in text, found in a single scan"""
+        hits = set()
+        if self.regex is None:
+            return hits
+        for found in self.regex.findall(text.lower()):
+            hits |= self._labels(found)
+        return hits
+
+
+def load_rules(path):
+    """Routing rules from a JSON file: {"workspaces": {name: {"keywords": [...], "priority": n}}, "intents": {group: [...]}}"""
+    with open(path) as f:
+        return json.load(f)
+
+
+class ReloadingMatcher:
+    """KeywordMatcher that rebuilds itself when its rules file changes
+
+    Without a rules file the default rules are used. The file's mtime is
+    checked at most once per `check_interval` seconds.
+    """
+    
+    def __init__(self, default_rules, path=None, check_interval=5.0):
+        self.default_rules = default_rules
+        self.path = path
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.mtime = None
+        self.checked_at = float('-inf')
+        self.rules = default_rules
+        self.matcher = KeywordMatcher(flatten_rules(default_rules))
+    
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if not self.path or now - self.checked_at < self.check_interval:
+            return
+        with self.lock:
+            self.checked_at = now
+            try:
+                mtime = os.path.getmtime(self.path)
+            except OSError:
+                return
+            if mtime == self.mtime:
+                return
+            try:
+                rules = dict(self.default_rules, **load_rules(self.path))
+                matcher = KeywordMatcher(flatten_rules(rules))
+            except (OSError, ValueError, KeyError):
+                # Half-written or invalid file - keep the current rules
+                return
+            self.matcher = matcher
+            self.rules = rules
+            self.mtime = mtime
+    
+    def current_rules(self):
+        self._maybe_reload()
+        return self.rules
+    
+    def match(self, text):
+        self._maybe_reload()
+        return self.matcher.match(text)
+
+
+def flatten_rules(rules):
+    """{'workspaces': ..., 'intents': ...} -> {'workspace:<name>': [...], 'intent:<group>': [...]}"""
+    flat = {}
+    for workspace, rule in rules.get('workspaces', {}).items():
+        flat[f'workspace:{workspace}'] = rule['keywords']
+    for group, keywords in rules.get('intents', {}).items():
+        flat[f'intent:{group}'] = keywords
+    return flat
@@ -2,18 +2,26 @@
 import json
 import boto3
 from datetime import datetime
+from zoneinfo import ZoneInfo
 from anthropic import Anthropic
 from typing import Optional
 
-from .state import AgentState, detect_workspace, get_priority_for_workspace, NoteSession
+from .state import AgentState, detect_workspace, get_priority_for_workspace, match_keywords, NoteSession
+from .fast_paths import route
+from .graph import run_agent
+from .conversation_recall import get_conversation_recall, format_memories
+from ..calendar.free_busy import DEFAULT_TIMEZONE
+from ..utils.usage import tags, flush_usage
+from ..utils.call_policy import DeadlineExceeded, AWS_CONFIG
 
 
 def get_anthropic_client():
     """Get Anthropic client with API key from Secrets Manager"""
-    secrets = boto3.client('secretsmanager', region_name='us-east-1')
+    secrets = boto3.client('secretsmanager', region_name='us-east-1', config=AWS_CONFIG)
     response = secrets.get_secret_value(SecretId='chief/anthropic-api-key')
     secret = json.loads(response['SecretString'])
-    return Anthropic(api_key=secret['api_key'])
+    # Timeouts and retries come from utils.call_policy
+    return Anthropic(api_key=secret['api_key'], max_retries=0)
 
 
 SYSTEM_PROMPT = """You are CHIEF (Contextual Helper for Integrated Executive Functions), a personal executive assistant for a Fire Rescue Chief Officer.
@@ -51,12 +59,19 @@ Respond helpfully to the user's request."""
 
 class ChiefOrchestrator:
     def __init__(self):
-        self.client = get_anthropic_client()
+        self._client = None
         self.state: Optional[AgentState] = None
     
-    def initialize_state(self, user_input: str) -> AgentState:
+    @property
+    def client(self):
+        # Fetched on first use so fast-path answers never touch the Anthropic secret
+        if self._client is None:
+            self._client = get_anthropic_client()
+        return self._client
+    
+    def initialize_state(self, user_input: str, hits: Optional[set] = None) -> AgentState:
         """Initialize agent state from user input"""
-        workspace = detect_workspace(user_input)
+        workspace = detect_workspace(user_input, hits)
         
         return AgentState(
             user_input=user_input,
@@ -69,69 +84,145 @@ class ChiefOrchestrator:
             pending_notifications=[],
             active_note_session=None,
             response="",
-            messages=[]
+            messages=[],
+            iterations=0
         )
     
-    def classify_intent(self, user_input: str) -> str:
+    def classify_intent(self, user_input: str, hits: Optional[set] = None) -> str:
         """Classify the user's intent"""
-        input_lower = user_input.lower()
+        if hits is None:
+            hits = match_keywords(user_input)
         
-        # Calendar intents
-        if any(word in input_lower for word in ["calendar", "schedule", "meeting", "event", "free", "busy", "block"]):
-            if any(word in input_lower for word in ["what", "show", "today", "tomorrow", "week"]):
-                return "calendar_query"
-            elif any(word in input_lower for word in ["schedule", "create", "add", "block"]):
-                return "calendar_create"
-            elif any(word in input_lower for word in ["move", "reschedule", "cancel"]):
+        # Calendar intents - changes win over lookups ("cancel my meeting tomorrow")
+        if "intent:calendar_topic" in hits:
+            if "intent:calendar_modify" in hits:
                 return "calendar_modify"
+            elif "intent:calendar_create" in hits:
+                return "calendar_create"
+            elif "intent:calendar_query" in hits:
+                return "calendar_query"
+        
+        # Action item lookups ("what's on my to do list?")
+        if "intent:action_topic" in hits and "intent:list_query" in hits:
+            if "intent:note_start" not in hits:
+                return "action_query"
         
         # Note intents
-        if any(word in input_lower for word in ["note", "taking notes", "remember", "action item"]):
-            if any(word in input_lower for word in ["start", "taking", "begin"]):
+        if "intent:note_topic" in hits:
+            if "intent:note_start" in hits:
                 return "note_start"
-            elif any(word in input_lower for word in ["done", "end", "stop", "finish"]):
+            elif "intent:note_end" in hits:
                 return "note_end"
             else:
                 return "note_add"
         
+        # Credential and CEU lookups
+        if "intent:credential_topic" in hits and "intent:list_query" in hits:
+            return "credential_query"
+        
         # Briefing intents
-        if any(word in input_lower for word in ["brief", "summary", "status", "update"]):
+        if "intent:briefing" in hits:
             return "briefing"
         
         # Default to conversation
         return "conversation"
     
-    def process(self, user_input: str, conversation_history: list = None) -> str:
-        """Process user input and return response"""
-        self.state = self.initialize_state(user_input)
-        self.state["intent"] = self.classify_intent(user_input)
+    def process(self, user_input: str, conversation_history: list = None, summary: str = None,
+                recall_sender: str = None) -> str:
+        """Process user input and return response
+        
+        conversation_history is not modified; summary is the compacted
+        earlier part of the thread, if any. With recall_sender, relevant
+        past exchanges from that sender are recalled for the model.
+        """
+        hits = match_keywords(user_input)
+        self.state = self.initialize_state(user_input, hits)
+        self.state["intent"] = self.classify_intent(user_input, hits)
+        
+        # Lookups and note commands are answered directly, and while a note session is
+        # open every other message is added to it; the rest reaches the model
+        fast_response = route(self.state, hits)
+        if fast_response is not None:
+            self.state["response"] = fast_response
+            return fast_response
         
         # Build messages
-        messages = conversation_history or []
-        messages.append({"role": "user", "content": user_input})
+        messages = list(conversation_history or []) + [{"role": "user", "content": user_input}]
         
         # Format system prompt with context
         system = SYSTEM_PROMPT.format(
             workspace=self.state["workspace"].upper(),
-            current_time=datetime.now().strftime("%Y-%m-%d %H:%M"),
+            current_time=datetime.now(ZoneInfo(DEFAULT_TIMEZONE)).strftime("%A %Y-%m-%d %H:%M %Z"),
             note_session="None active"
         )
+        if summary:
+            system += f"\n\n## Earlier in this conversation:\n{summary}"
         
-        # Call Claude
-        response = self.client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=1024,
-            system=system,
-            messages=messages
-        )
+        # Model and embedding usage below is billed to 'chat' in this workspace
+        with tags(feature='chat', workspace=self.state["workspace"]):
+            if recall_sender:
+                memories = self.recall(recall_sender, user_input, messages)
+                if memories:
+                    system += f"\n\n## Relevant past exchanges:\n{format_memories(memories)}"
+            
+            # Tool-use loop: Claude pulls calendar, documents, actions, contacts and credentials as needed
+            self.state["messages"] = messages
+            try:
+                self.state = run_agent(self.client, system, self.state)
+            except DeadlineExceeded:
+                # Reply inside the Lambda deadline rather than being cut off mid-request
+                self.state["response"] = "Sorry, that's taking longer than it should. Please try again in a minute."
         
-        assistant_message = response.content[0].text
-        self.state["response"] = assistant_message
+        return self.state["response"]
+    
+    def recall(self, sender: str, user_input: str, messages: list) -> list:
+        """Past exchanges relevant to user_input that aren't already in messages"""
+        try:
+            memories = get_conversation_recall().recall(sender, user_input)
+        except Exception:
+            # Recall is an enrichment - answer without it if Qdrant or embeddings are down
+            return []
         
-        return assistant_message
+        recent = {m["content"] for m in messages if isinstance(m["content"], str)}
+        return [m for m in memories if m["user_text"] not in recent]
+
+
+def process_message(user_input: str, conversation_history: list = None, sender: str = None,
+                    store=None, recall: bool = True) -> str:
+    """Main entry point for processing messages
+    
+    With a sender (phone number or chat session ID) the thread's recent
+    turns and rolling summary are loaded from the conversation store, and
+    the new exchange is saved back to it. With recall, the exchange is
+    also indexed for semantic recall (in the background) and relevant past
+    exchanges are retrieved for the model.
+    
+    Usage recorded by this request is flushed before returning; usage from
+    the background recall indexing is flushed by the caller after
+    flush_pending() (see lambda_handler).
+    """
+    try:
+        return _process_message(user_input, conversation_history, sender, store, recall)
+    finally:
+        flush_usage()
 
 
-def process_message(user_input: str, conversation_history: list = None) -> str:
-    """Main entry point for processing messages"""
+def _process_message(user_input, conversation_history, sender, store, recall):
     orchestrator = ChiefOrchestrator()
-    return orchestrator.process(user_input, conversation_history)
+    if sender is None:
+        return orchestrator.process(user_input, conversation_history)
+    
+    from .conversation_store import get_conversation_store
+    store = store or get_conversation_store()
+    context = store.load(sender)
+    response = orchestrator.process(user_input, context['turns'], context['summary'],
+                                    recall_sender=sender if recall else None)
+    store.append(sender, user_input, response)
+    
+    if recall:
+        try:
+            get_conversation_recall().record_async(sender, orchestrator.state["workspace"], user_input, response)
+        except Exception:
+            # Qdrant unreachable - the reply already went out, recall just misses this exchange
+            pass
+    return response
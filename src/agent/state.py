@@ -1,7 +1,10 @@
 """State management for CHIEF Agent"""
-from typing import TypedDict, Optional, List, Annotated
+import os
+from typing import TypedDict, Optional, List, Annotated, Set
 from datetime import datetime
 
+from .keyword_matcher import ReloadingMatcher
+
 
 class ActionItem(TypedDict):
     item_id: str
@@ -36,43 +39,78 @@ class AgentState(TypedDict):
     active_note_session: Optional[NoteSession]
     response: str
     messages: List[dict]
+    iterations: int  # tool rounds taken by the agent loop
 
 
-# Workspace detection keywords
+# Workspace detection keywords, matched on word boundaries ('*' = word prefix,
+# so plurals and compounds like "councilmembers" still count)
 WORKSPACE_RULES = {
     "command": {
-        "keywords": ["city manager", "council", "union", "cba", "policy", "strategic", "budget approval", "commission"],
+        "keywords": ["city manager*", "council*", "union*", "cba", "policy", "policies", "strategic",
+                     "budget approval*", "commission*"],
         "priority": 1
     },
     "operations": {
-        "keywords": ["sunrise", "station", "crr", "mih", "everbridge", "shift", "response", "apparatus", "overtime"],
+        "keywords": ["sunrise", "station*", "crr", "mih", "everbridge", "shift*", "response*", "apparatus",
+                     "overtime"],
         "priority": 2
     },
     "planning": {
-        "keywords": ["efo", "phd", "dissertation", "paper", "class", "ucf", "nfa", "leadership broward", "research"],
+        "keywords": ["efo", "phd*", "dissertation*", "paper*", "class*", "ucf", "nfa", "leadership broward",
+                     "research*"],
         "priority": 3
     },
     "logistics": {
-        "keywords": ["conference", "ftfc", "eagles", "speakers", "sponsors", "vendor", "procurement"],
+        "keywords": ["conference*", "ftfc", "eagles", "speaker*", "sponsor*", "vendor*", "procurement"],
         "priority": 4
     },
     "personal": {
-        "keywords": ["family", "kids", "home", "personal", "vacation", "appointment"],
+        "keywords": ["family", "families", "kid*", "home*", "personal*", "vacation*", "appointment*"],
         "priority": 5
     }
 }
 
 
-def detect_workspace(text: str) -> str:
+# Intent cue words, matched on word boundaries ('*' = word prefix)
+INTENT_RULES = {
+    "calendar_topic": ["calendar*", "schedul*", "meeting*", "event*", "free", "busy", "block*"],
+    # Canned calendar answers need a day they can show, not just "what"
+    "calendar_query": ["today", "tonight", "tomorrow", "this week"],
+    # "schedule" alone is also the topic noun ("what's on my schedule") - only the verb creates
+    "calendar_create": ["schedule a", "schedule an", "schedule me", "create", "add", "block*"],
+    "calendar_modify": ["move", "reschedul*", "cancel*"],
+    "note_topic": ["note*", "taking notes", "remember", "action item*"],
+    "note_start": ["start*", "taking", "begin*"],
+    "note_end": ["done", "end", "ended", "ending", "stop*", "finish*"],
+    # Only unmistakable requests for the briefing itself get the snapshot
+    "briefing": ["brief me", "my brief*", "morning brief*", "daily brief*", "eod brief*",
+                 "end of day brief*", "today's brief*"],
+    "action_topic": ["action item*", "to do*", "todo*", "task*"],
+    "credential_topic": ["credential*", "certification*", "cert", "certs", "license*", "ceu*", "expir*"],
+    "list_query": ["what", "which", "how many", "show*", "list*", "any", "pending", "open", "outstanding",
+                   "due", "soon", "left", "remaining", "status"]
+}
+
+# Rules can be overridden (and hot-reloaded) from a JSON file - see keyword_matcher.load_rules
+ROUTING_MATCHER = ReloadingMatcher(
+    {"workspaces": WORKSPACE_RULES, "intents": INTENT_RULES},
+    path=os.environ.get('CHIEF_ROUTING_RULES')
+)
+
+
+def match_keywords(text: str) -> Set[str]:
+    """All workspace and intent labels hit by text, found in a single pass"""
+    return ROUTING_MATCHER.match(text)
+
+
+def detect_workspace(text: str, hits: Optional[Set[str]] = None) -> str:
     """Detect workspace from text content"""
-    text_lower = text.lower()
+    if hits is None:
+        hits = match_keywords(text)
     
-    matches = []
-    for workspace, rules in WORKSPACE_RULES.items():
-        for keyword in rules["keywords"]:
-            if keyword in text_lower:
-                matches.append((workspace, rules["priority"]))
-                break
+    workspaces = ROUTING_MATCHER.current_rules()["workspaces"]
+    matches = [(workspace, rules["priority"]) for workspace, rules in workspaces.items()
+               if f"workspace:{workspace}" in hits]
     
     if matches:
         # Return highest priority (lowest number) workspace
@@ -84,4 +122,4 @@ def detect_workspace(text: str) -> str:
 
 def get_priority_for_workspace(workspace: str) -> int:
     """Get priority level for a workspace"""
-    return WORKSPACE_RULES.get(workspace, {}).get("priority", 5)
+    return ROUTING_MATCHER.current_rules()["workspaces"].get(workspace, {}).get("priority", 5)
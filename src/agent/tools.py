@@ -0,0 +1,280 @@
+"""Tools the CHIEF agent can call, over the existing managers
+
+Each tool is an Anthropic tool schema plus a function taking the tool's
+input dict. run_tools executes every tool call from one model turn
+concurrently under a shared deadline.
+"""
+import json
+import time
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as ToolTimeout
+from zoneinfo import ZoneInfo
+
+from ..calendar.free_busy import DEFAULT_TIMEZONE
+from ..utils.tracing import wrap
+
+
+TOOL_WORKERS = 12  # shared by every turn, with room for stuck tools to finish
+MAX_RESULT_CHARS = 6000  # keep one tool result from flooding the context
+
+# Tools with side effects: a timed-out call may still complete, so the model must not repeat it
+WRITE_TOOLS = {'create_calendar_event'}
+
+_tool_pool = None
+_tool_pool_lock = threading.Lock()
+
+
+def get_tool_pool():
+    """Threads for tool calls, reused across turns and invocations"""
+    global _tool_pool
+    with _tool_pool_lock:
+        if _tool_pool is None:
+            _tool_pool = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix='chief-tool')
+        return _tool_pool
+
+
+def _local_date(value, tz_name=DEFAULT_TIMEZONE):
+    """Aware local midnight for a YYYY-MM-DD string"""
+    return datetime.fromisoformat(value).replace(tzinfo=ZoneInfo(tz_name))
+
+
+def _local_time(value, tz_name=DEFAULT_TIMEZONE):
+    dt = datetime.fromisoformat(value)
+    return dt if dt.tzinfo else dt.replace(tzinfo=ZoneInfo(tz_name))
+
+
+def get_calendar_events(start_date, end_date=None):
+    from ..calendar.google_calendar import get_events_between
+    
+    start = _local_date(start_date)
+    end = _local_date(end_date) + timedelta(days=1) if end_date else start + timedelta(days=1)
+    return [{
+        'summary': event.get('summary', 'No title'),
+        'start': event['start'].get('dateTime', event['start'].get('date')),
+        'end': event.get('end', {}).get('dateTime', event.get('end', {}).get('date')),
+        'location': event.get('location'),
+        'calendar': event.get('calendar_label')
+    } for event in get_events_between(start, end)]
+
+
+def find_free_time(duration_minutes=60, days_ahead=7):
+    from ..calendar.google_calendar import find_free_time as find_slots
+    
+    return [{
+        'start': slot['start'].isoformat(),
+        'end': slot['end'].isoformat(),
+        'duration_minutes': slot['duration_minutes']
+    } for slot in find_slots(duration_minutes=duration_minutes, days_ahead=days_ahead)]
+
+
+def create_calendar_event(summary, start, end, location=None, description=None):
+    from ..calendar.google_calendar import create_event
+    
+    event = create_event(summary, _local_time(start), _local_time(end), description, location)
+    return {'id': event.get('id'), 'summary': event.get('summary'), 'link': event.get('htmlLink')}
+
+
+def search_documents(query, doc_type=None):
+    from .document_rag import DocumentRAG
+    
+    return [{
+        'title': c['title'],
+        'doc_type': c['doc_type'],
+        'score': round(c['score'], 3),
+        'text': c['text']
+    } for c in DocumentRAG().search(query, doc_type=doc_type, top_k=5)]
+
+
+def search_notes(query, workspace=None, start_date=None, end_date=None):
+    from ..notes.note_manager import NoteSession
+    
+    return [{
+        'title': n['title'],
+        'date': n['timestamp'][:10],
+        'kind': n['kind'],
+        'workspace': n['workspace'],
+        'text': n['text']
+    } for n in NoteSession().search_notes(query, workspace, start_date, end_date)]
+
+
+def get_pending_actions():
+    from ..notes.note_manager import NoteSession
+    
+    fields = ('description', 'assignee', 'due_date', 'priority', 'workspace')
+    return [{k: a.get(k) for k in fields} for a in NoteSession().get_pending_actions()]
+
+
+def search_contacts(query):
+    from .contacts_manager import ContactsManager
+    
+    fields = ('name', 'role', 'organization', 'communication_style', 'last_interaction', 'notes')
+    return [{k: c.get(k) for k in fields} for c in ContactsManager().search_contacts(query)]
+
+
+def get_contact_guidelines(name):
+    from .contacts_manager import ContactsManager
+    
+    return ContactsManager().get_tone_guidelines(name) or {'error': f'No contact named {name}'}
+
+
+def get_credentials(expiring_within_days=90):
+    from .credentials_manager import CredentialsManager
+    
+    status = CredentialsManager().get_status(expiring_within_days)
+    return {
+        'ceu_status': status['ceu_status'],
+        'expiring': [{
+            'name': c['name'],
+            'expiration_date': c.get('expiration_date'),
+            'days_until_expiration': c['days_until_expiration']
+        } for c in status['expiring']]
+    }
+
+
+TOOLS = {
+    'get_calendar_events': (get_calendar_events, {
+        'description': "Events on the user's calendars between two local dates (inclusive). Omit end_date for a single day.",
+        'input_schema': {
+            'type': 'object',
+            'properties': {
+                'start_date': {'type': 'string', 'description': 'YYYY-MM-DD'},
+                'end_date': {'type': 'string', 'description': 'YYYY-MM-DD'}
+            },
+            'required': ['start_date']
+        }
+    }),
+    'find_free_time': (find_free_time, {
+        'description': 'Open working-hours slots of at least duration_minutes over the next days_ahead days.',
+        'input_schema': {
+            'type': 'object',
+            'properties': {
+                'duration_minutes': {'type': 'integer'},
+                'days_ahead': {'type': 'integer'}
+            }
+        }
+    }),
+    'create_calendar_event': (create_calendar_event, {
+        'description': 'Create an event on the primary calendar. Times are local ISO 8601 (YYYY-MM-DDTHH:MM).',
+        'input_schema': {
+            'type': 'object',
+            'properties': {
+                'summary': {'type': 'string'},
+                'start': {'type': 'string'},
+                'end': {'type': 'string'},
+                'location': {'type': 'string'},
+                'description': {'type': 'string'}
+            },
+            'required': ['summary', 'start', 'end']
+        }
+    }),
+    'search_documents': (search_documents, {
+        'description': 'Semantic search over indexed policies, SOPs, contracts and other documents. Cite results by title.',
+        'input_schema': {
+            'type': 'object',
+            'properties': {
+                'query': {'type': 'string'},
+                'doc_type': {'type': 'string', 'description': 'Optional filter, e.g. policy, sop, contract'}
+            },
+            'required': ['query']
+        }
+    }),
+    'search_notes': (search_notes, {
+        'description': "Semantic search over the user's closed meeting notes and their summaries.",
+        'input_schema': {
+            'type': 'object',
+            'properties': {
+                'query': {'type': 'string'},
+                'workspace': {'type': 'string', 'enum': ['command', 'operations', 'planning', 'logistics', 'personal']},
+                'start_date': {'type': 'string', 'description': 'YYYY-MM-DD'},
+                'end_date': {'type': 'string', 'description': 'YYYY-MM-DD, inclusive'}
+            },
+            'required': ['query']
+        }
+    }),
+    'get_pending_actions': (get_pending_actions, {
+        'description': 'All pending action items with assignee, due date, priority and workspace.',
+        'input_schema': {'type': 'object', 'properties': {}}
+    }),
+    'search_contacts': (search_contacts, {
+        'description': 'Find contacts by name, organization or role.',
+        'input_schema': {
+            'type': 'object',
+            'properties': {'query': {'type': 'string'}},
+            'required': ['query']
+        }
+    }),
+    'get_contact_guidelines': (get_contact_guidelines, {
+        'description': 'Tone guidelines and recent interactions for one contact, for drafting messages.',
+        'input_schema': {
+            'type': 'object',
+            'properties': {'name': {'type': 'string'}},
+            'required': ['name']
+        }
+    }),
+    'get_credentials': (get_credentials, {
+        'description': 'CEU progress for every credential and credentials expiring within the given number of days.',
+        'input_schema': {
+            'type': 'object',
+            'properties': {'expiring_within_days': {'type': 'integer'}}
+        }
+    }),
+}
+
+TOOL_SCHEMAS = [dict(schema, name=name) for name, (_, schema) in TOOLS.items()]
+
+
+def _result_block(tool_use_id, content, is_error=False):
+    block = {'type': 'tool_result', 'tool_use_id': tool_use_id, 'content': content}
+    if is_error:
+        block['is_error'] = True
+    return block
+
+
+def _call(name, tool_input):
+    func = TOOLS[name][0]
+    result = json.dumps(func(**tool_input), default=str)
+    if len(result) > MAX_RESULT_CHARS:
+        result = result[:MAX_RESULT_CHARS] + '… [truncated]'
+    return result
+
+
+def run_tools(tool_uses, timeout):
+    """Run every tool_use block concurrently; returns tool_result blocks in the same order
+    
+    A tool that raises or misses the shared deadline comes back as an error
+    result, so the model can answer with what it has. A write that misses
+    the deadline after starting is reported as having an unknown outcome.
+    """
+    if not tool_uses:
+        return []
+    
+    pool = get_tool_pool()
+    futures = []
+    for tool_use in tool_uses:
+        if tool_use['name'] in TOOLS:
+            futures.append(pool.submit(wrap(_call), tool_use['name'], tool_use.get('input') or {}))
+        else:
+            futures.append(None)
+    
+    started = time.monotonic()
+    results = []
+    for tool_use, future in zip(tool_uses, futures):
+        if future is None:
+            results.append(_result_block(tool_use['id'], f"Unknown tool: {tool_use['name']}", is_error=True))
+            continue
+        remaining = timeout - (time.monotonic() - started)
+        try:
+            results.append(_result_block(tool_use['id'], future.result(timeout=max(0, remaining))))
+        except ToolTimeout:
+            # cancel() only succeeds if the call never started; a running one finishes in the pool
+            if future.cancel() or tool_use['name'] not in WRITE_TOOLS:
+                message = 'Timed out - answer without this source'
+            else:
+                message = ('Timed out - the change may or may not have been made. Do not retry; '
+                           'tell the user to check before asking again')
+            results.append(_result_block(tool_use['id'], message, is_error=True))
+        except Exception as e:
+            results.append(_result_block(tool_use['id'], f'{type(e).__name__}: {e}', is_error=True))
+    
+    return results
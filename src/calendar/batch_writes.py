@@ -0,0 +1,162 @@
+"""Batched Google Calendar writes for CHIEF
+
+Inserts, updates and deletes are grouped into Google API batch HTTP
+requests (one round trip per BATCH_SIZE calls). Results are reported per
+operation, and only the items that hit rate limits or server errors are
+retried, with jittered exponential backoff. A batch request that fails as
+a whole is retried the same way for the items it carried.
+
+Inserts aren't idempotent, so create_events gives each one a client-side
+event id: a retried insert the server had already committed comes back
+409 (duplicate) and counts as done.
+"""
+import time
+import uuid
+import base64
+import random
+from googleapiclient.errors import HttpError
+
+from .google_calendar import get_calendar_service, build_event_body
+from .event_store import get_event_store
+from ..utils.tracing import span
+
+
+BATCH_SIZE = 50  # Google recommends no more than 50 calls per batch
+MAX_RETRIES = 5
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+
+
+def is_retryable(exception):
+    """Rate-limit and transient server errors are worth retrying"""
+    if not isinstance(exception, HttpError):
+        return False
+    status = exception.resp.status
+    if status in RETRYABLE_STATUS:
+        return True
+    return status == 403 and any(reason in str(exception) for reason in RATE_LIMIT_REASONS)
+
+
+def new_event_id():
+    """Client-generated event id (base32hex: 0-9 and a-v)"""
+    return base64.b32hexencode(uuid.uuid4().bytes).decode().rstrip('=').lower()
+
+
+def _already_inserted(operation, result, exception):
+    """A retried insert with a client id that the server had already created"""
+    return (operation['op'] == 'insert' and 'id' in operation.get('body', {}) and result['attempts'] > 1
+            and isinstance(exception, HttpError) and exception.resp.status == 409)
+
+
+def _request(service, calendar_id, operation):
+    op = operation['op']
+    if op == 'insert':
+        return service.events().insert(calendarId=calendar_id, body=operation['body'])
+    if op == 'update':
+        return service.events().update(calendarId=calendar_id, eventId=operation['event_id'], body=operation['body'])
+    if op == 'patch':
+        return service.events().patch(calendarId=calendar_id, eventId=operation['event_id'], body=operation['body'])
+    if op == 'delete':
+        return service.events().delete(calendarId=calendar_id, eventId=operation['event_id'])
+    raise ValueError(f"Unknown calendar operation: {op}")
+
+
+def bulk_apply(operations, calendar_id='primary', batch_size=BATCH_SIZE, max_retries=MAX_RETRIES):
+    """Apply calendar writes in batch requests
+    
+    Each operation is a dict with 'op' ('insert', 'update', 'patch' or
+    'delete'), plus 'body' and/or 'event_id' as the call needs. Returns one
+    result per operation, in input order:
+    {'index', 'op', 'status': 'ok' | 'error', 'event', 'error', 'attempts'}
+    """
+    service = get_calendar_service()
+    results = [{'index': i, 'op': op['op'], 'status': 'pending', 'event': None, 'error': None, 'attempts': 0}
+               for i, op in enumerate(operations)]
+    retry = []
+    
+    def callback(request_id, response, exception):
+        result = results[int(request_id)]
+        result['attempts'] += 1
+        if exception is None:
+            result['status'] = 'ok'
+            result['event'] = response or None
+            result['error'] = None
+        elif _already_inserted(operations[result['index']], result, exception):
+            result['status'] = 'ok'
+            result['event'] = operations[result['index']]['body']
+            result['error'] = None
+        elif is_retryable(exception):
+            result['error'] = str(exception)
+            retry.append(result['index'])
+        else:
+            result['status'] = 'error'
+            result['error'] = str(exception)
+    
+    def batch_failed(chunk, exception):
+        # The batch request itself failed (429/5xx on the envelope, transport
+        # error); items whose callback already ran keep that outcome
+        for index in chunk:
+            result = results[index]
+            if result['status'] != 'pending' or index in retry:
+                continue
+            result['attempts'] += 1
+            result['error'] = str(exception)
+            if is_retryable(exception):
+                retry.append(index)
+            else:
+                result['status'] = 'error'
+    
+    pending = list(range(len(operations)))
+    for attempt in range(max_retries + 1):
+        retry.clear()
+        for k in range(0, len(pending), batch_size):
+            chunk = pending[k:k + batch_size]
+            batch = service.new_batch_http_request()
+            for index in chunk:
+                batch.add(_request(service, calendar_id, operations[index]), callback=callback, request_id=str(index))
+            with span('gcal.batch', calendar=calendar_id, operations=len(chunk), retries=attempt):
+                try:
+                    batch.execute()
+                except Exception as e:
+                    batch_failed(chunk, e)
+        
+        if not retry:
+            break
+        pending = sorted(retry)
+        if attempt < max_retries:
+            time.sleep(min(32, 2 ** attempt) * (0.5 + random.random() / 2))
+    
+    for index in retry:
+        results[index]['status'] = 'error'
+    
+    _update_mirror(calendar_id, operations, results)
+    return results
+
+
+def _update_mirror(calendar_id, operations, results):
+    """Reflect successful writes in the local event store"""
+    changes = []
+    for operation, result in zip(operations, results):
+        if result['status'] != 'ok':
+            continue
+        if operation['op'] == 'delete':
+            changes.append({'id': operation['event_id'], 'status': 'cancelled'})
+        elif result['event']:
+            changes.append(result['event'])
+    if changes:
+        get_event_store().apply_changes(calendar_id, changes)
+
+
+def create_events(events, calendar_id='primary'):
+    """Create many events at once (study blocks, conference schedules)
+    
+    Each item takes the create_event arguments: summary, start_time,
+    end_time and optional description/location.
+    """
+    operations = [{'op': 'insert', 'body': dict(build_event_body(**event), id=new_event_id())} for event in events]
+    return bulk_apply(operations, calendar_id=calendar_id)
+
+
+def delete_events(event_ids, calendar_id='primary'):
+    """Delete many events at once"""
+    return bulk_apply([{'op': 'delete', 'event_id': event_id} for event_id in event_ids], calendar_id=calendar_id)
@@ -0,0 +1,247 @@
+"""Local calendar mirror for CHIEF, kept current with incremental sync
+
+Events are stored in SQLite (/tmp by default so it works inside Lambda) and
+refreshed with the Calendar API's syncToken: after the first full sync only
+changed and deleted events are fetched. A 410 Gone from Google invalidates
+the token and triggers a full resync.
+
+/tmp doesn't survive a cold start, so the full sync is bounded to a window
+around now (SYNC_LOOKBACK_DAYS back, SYNC_HORIZON_DAYS ahead) rather than
+the whole calendar history; reads outside the synced window go to the API.
+"""
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from googleapiclient.errors import HttpError
+
+from .free_busy import DEFAULT_TIMEZONE
+from ..utils.tracing import span
+
+
+DEFAULT_DB_PATH = os.environ.get('CHIEF_CALENDAR_DB', '/tmp/chief_calendar.db')
+SYNC_MAX_AGE = 300  # seconds before a read triggers an incremental sync
+SYNC_PAGE_SIZE = 2500  # API maximum - fields projection keeps pages small
+SYNC_LOOKBACK_DAYS = 30
+SYNC_HORIZON_DAYS = 180
+SYNC_RENEW_DAYS = 90  # full resync once the synced window ends sooner than this
+
+# Partial response: only what we render or use for free/busy
+EVENT_FIELDS = 'id,status,summary,start,end,location,transparency,attendees(self,responseStatus)'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    calendar_id TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (calendar_id, event_id)
+);
+CREATE INDEX IF NOT EXISTS events_by_time ON events (start_ts, end_ts);
+CREATE TABLE IF NOT EXISTS sync_state (
+    calendar_id TEXT PRIMARY KEY,
+    sync_token TEXT,
+    synced_at REAL NOT NULL,
+    window_start REAL,
+    window_end REAL
+);
+"""
+
+
+def _to_timestamp(value, tz_name=DEFAULT_TIMEZONE):
+    """Epoch seconds for an event start/end ({'dateTime': ...} or all-day {'date': ...})
+    
+    All-day dates are midnight in the calendar's time zone, matching the
+    local-day windows readers query with.
+    """
+    if 'dateTime' in value:
+        dt = datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00'))
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+    else:
+        dt = datetime.fromisoformat(value['date']).replace(tzinfo=ZoneInfo(tz_name))
+    return dt.timestamp()
+
+
+def _epoch(dt):
+    """Epoch seconds for a datetime; naive values are treated as UTC"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def event_bounds(event):
+    """(start, end) of an event as epoch seconds"""
+    start = _to_timestamp(event['start'])
+    end = _to_timestamp(event.get('end', event['start']))
+    return start, max(start, end)
+
+
+class EventStore:
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            columns = {row[1] for row in self.conn.execute('PRAGMA table_info(sync_state)')}
+            if columns and 'window_end' not in columns:
+                # Written before syncs were windowed - forget the tokens so each calendar resyncs
+                self.conn.execute('DROP TABLE sync_state')
+            self.conn.executescript(SCHEMA)
+    
+    def apply_changes(self, calendar_id, events):
+        """Upsert changed events and drop cancelled ones"""
+        upserts = []
+        deletes = []
+        for event in events:
+            if event.get('status') == 'cancelled' or 'start' not in event:
+                deletes.append((calendar_id, event['id']))
+            else:
+                start, end = event_bounds(event)
+                upserts.append((calendar_id, event['id'], start, end, json.dumps(event)))
+        
+        with self.lock, self.conn:
+            self.conn.executemany(
+                'DELETE FROM events WHERE calendar_id = ? AND event_id = ?', deletes
+            )
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO events (calendar_id, event_id, start_ts, end_ts, body) VALUES (?, ?, ?, ?, ?)',
+                upserts
+            )
+    
+    def events_between(self, start, end, calendar_ids=None):
+        """Events overlapping [start, end) across calendars, ordered by start time and tagged with calendar_id"""
+        sql = 'SELECT calendar_id, body FROM events WHERE start_ts < ? AND end_ts > ?'
+        params = [_epoch(end), _epoch(start)]
+        if calendar_ids:
+            sql += f" AND calendar_id IN ({', '.join('?' for _ in calendar_ids)})"
+            params.extend(calendar_ids)
+        sql += ' ORDER BY start_ts, end_ts'
+        
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [dict(json.loads(body), calendar_id=calendar_id) for calendar_id, body in rows]
+    
+    def get_sync_state(self, calendar_id):
+        """(sync_token, synced_at) for a calendar, or (None, None) if never synced"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT sync_token, synced_at FROM sync_state WHERE calendar_id = ?', (calendar_id,)
+            ).fetchone()
+        return row if row else (None, None)
+    
+    def get_sync_window(self, calendar_id):
+        """(start, end) epoch seconds the mirror holds for a calendar, or None if never synced"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT window_start, window_end FROM sync_state WHERE calendar_id = ?', (calendar_id,)
+            ).fetchone()
+        return row if row and row[0] is not None else None
+    
+    def covers(self, calendar_id, start, end):
+        """Whether [start, end) lies inside the calendar's synced window"""
+        window = self.get_sync_window(calendar_id)
+        return window is not None and window[0] <= _epoch(start) and _epoch(end) <= window[1]
+    
+    def set_sync_state(self, calendar_id, sync_token, window=None):
+        """Record a sync token; window (start, end) is set by full syncs and kept by incremental ones"""
+        window_start, window_end = window or (None, None)
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT INTO sync_state (calendar_id, sync_token, synced_at, window_start, window_end) '
+                'VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (calendar_id) DO UPDATE SET sync_token = excluded.sync_token, '
+                'synced_at = excluded.synced_at, '
+                'window_start = COALESCE(excluded.window_start, window_start), '
+                'window_end = COALESCE(excluded.window_end, window_end)',
+                (calendar_id, sync_token, time.time(), window_start, window_end)
+            )
+    
+    def clear_calendar(self, calendar_id):
+        """Forget a calendar's events and sync token (before a full resync)"""
+        with self.lock, self.conn:
+            self.conn.execute('DELETE FROM events WHERE calendar_id = ?', (calendar_id,))
+            self.conn.execute('DELETE FROM sync_state WHERE calendar_id = ?', (calendar_id,))
+
+
+def iter_event_pages(service, **params):
+    """Yield each events.list page, following nextPageToken"""
+    params = dict(params)
+    while True:
+        with span('gcal.events.list', calendar=params.get('calendarId')) as s:
+            page = service.events().list(**params).execute()
+            s.set(items=len(page.get('items', [])))
+        yield page
+        page_token = page.get('nextPageToken')
+        if not page_token:
+            return
+        params['pageToken'] = page_token
+
+
+def sync_calendar(service, store, calendar_id='primary'):
+    """Bring the store up to date with Google; returns the number of changed events
+    
+    A full sync only fetches SYNC_LOOKBACK_DAYS back to SYNC_HORIZON_DAYS
+    ahead. Incremental syncs (which can't take a time range) keep that
+    window, and a new full sync starts once it ends within SYNC_RENEW_DAYS.
+    """
+    sync_token, _ = store.get_sync_state(calendar_id)
+    window = store.get_sync_window(calendar_id)
+    if sync_token and (window is None or window[1] - time.time() < SYNC_RENEW_DAYS * 86400):
+        store.clear_calendar(calendar_id)
+        sync_token = None
+    
+    params = {
+        'calendarId': calendar_id,
+        'singleEvents': True,
+        'maxResults': SYNC_PAGE_SIZE,
+        'fields': f'nextPageToken,nextSyncToken,items({EVENT_FIELDS})',
+    }
+    if sync_token:
+        params['syncToken'] = sync_token
+        window = None
+    else:
+        now = datetime.now(timezone.utc)
+        start, end = now - timedelta(days=SYNC_LOOKBACK_DAYS), now + timedelta(days=SYNC_HORIZON_DAYS)
+        params['timeMin'] = start.isoformat()
+        params['timeMax'] = end.isoformat()
+        window = (start.timestamp(), end.timestamp())
+    
+    changed = 0
+    try:
+        for page in iter_event_pages(service, **params):
+            items = page.get('items', [])
+            store.apply_changes(calendar_id, items)
+            changed += len(items)
+            if 'nextSyncToken' in page:
+                store.set_sync_state(calendar_id, page['nextSyncToken'], window)
+    except HttpError as e:
+        if e.resp.status == 410 and sync_token:
+            # Sync token expired - start over with a full sync
+            store.clear_calendar(calendar_id)
+            return sync_calendar(service, store, calendar_id)
+        raise
+    
+    return changed
+
+
+def is_stale(store, calendar_id, max_age=SYNC_MAX_AGE):
+    _, synced_at = store.get_sync_state(calendar_id)
+    return synced_at is None or time.time() - synced_at > max_age
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_event_store():
+    """Process-wide event store"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = EventStore()
+        return _store
@@ -0,0 +1,135 @@
+"""Interval-based free/busy engine for CHIEF scheduling
+
+Busy time comes from the local event store or the Calendar freebusy API,
+is merged with a single sort-and-sweep pass, and is subtracted from
+timezone-aware working-hour windows.
+"""
+from datetime import datetime, timedelta, time, timezone
+from zoneinfo import ZoneInfo
+
+from ..utils.tracing import span
+
+
+DEFAULT_TIMEZONE = 'America/New_York'
+WORK_START = time(8, 0)
+WORK_END = time(18, 0)
+WORK_DAYS = (0, 1, 2, 3, 4)  # Monday - Friday
+FREEBUSY_MAX_DAYS = 60  # keep each freebusy query under the API's range limit
+FREEBUSY_MAX_CALENDARS = 50
+
+
+def parse_time(value, tz_name=DEFAULT_TIMEZONE):
+    """Aware UTC datetime from an RFC 3339 string or an event start/end dict
+    
+    All-day dates ({'date': ...}) start at midnight in tz_name.
+    """
+    if isinstance(value, dict):
+        if 'dateTime' not in value:
+            return datetime.fromisoformat(value['date']).replace(tzinfo=ZoneInfo(tz_name)).astimezone(timezone.utc)
+        value = value['dateTime']
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def merge_intervals(intervals):
+    """Merge overlapping or touching (start, end) intervals - O(n log n)"""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def working_windows(start, end, tz_name=DEFAULT_TIMEZONE, day_start=WORK_START,
+                    day_end=WORK_END, work_days=WORK_DAYS):
+    """Working-hour windows between start and end, built in local time so DST is handled"""
+    tz = ZoneInfo(tz_name)
+    day = start.astimezone(tz).date()
+    last_day = end.astimezone(tz).date()
+    
+    windows = []
+    while day <= last_day:
+        if day.weekday() in work_days:
+            window_start = datetime.combine(day, day_start, tzinfo=tz).astimezone(timezone.utc)
+            window_end = datetime.combine(day, day_end, tzinfo=tz).astimezone(timezone.utc)
+            window_start = max(window_start, start)
+            window_end = min(window_end, end)
+            if window_start < window_end:
+                windows.append((window_start, window_end))
+        day += timedelta(days=1)
+    return windows
+
+
+def subtract_intervals(windows, busy, min_duration=timedelta(0)):
+    """Free gaps: windows minus merged busy intervals, in one linear sweep
+    
+    Both inputs must be sorted and non-overlapping. Gaps shorter than
+    min_duration are dropped.
+    """
+    free = []
+    i = 0
+    for window_start, window_end in windows:
+        cursor = window_start
+        while i < len(busy) and busy[i][1] <= cursor:
+            i += 1
+        j = i
+        while j < len(busy) and busy[j][0] < window_end:
+            busy_start, busy_end = busy[j]
+            if busy_start > cursor and busy_start - cursor >= min_duration:
+                free.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+            j += 1
+        if window_end > cursor and window_end - cursor >= min_duration:
+            free.append((cursor, window_end))
+    return free
+
+
+def busy_from_events(events):
+    """Busy intervals from event resources, skipping free ('transparent') and declined events"""
+    intervals = []
+    for event in events:
+        if event.get('status') == 'cancelled' or event.get('transparency') == 'transparent':
+            continue
+        if any(a.get('self') and a.get('responseStatus') == 'declined' for a in event.get('attendees', [])):
+            continue
+        intervals.append((parse_time(event['start']), parse_time(event.get('end', event['start']))))
+    return intervals
+
+
+def busy_from_freebusy(service, calendar_ids, start, end):
+    """Busy intervals for several calendars from the freebusy API, chunked by range and calendar count"""
+    intervals = []
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = min(end, chunk_start + timedelta(days=FREEBUSY_MAX_DAYS))
+        for k in range(0, len(calendar_ids), FREEBUSY_MAX_CALENDARS):
+            with span('gcal.freebusy.query', calendars=len(calendar_ids[k:k + FREEBUSY_MAX_CALENDARS])):
+                result = service.freebusy().query(body={
+                    'timeMin': chunk_start.isoformat(),
+                    'timeMax': chunk_end.isoformat(),
+                    'items': [{'id': cid} for cid in calendar_ids[k:k + FREEBUSY_MAX_CALENDARS]]
+                }).execute()
+            for calendar in result.get('calendars', {}).values():
+                for period in calendar.get('busy', []):
+                    intervals.append((parse_time(period['start']), parse_time(period['end'])))
+        chunk_start = chunk_end
+    return intervals
+
+
+def find_free_slots(busy, start, end, duration_minutes=60, tz_name=DEFAULT_TIMEZONE,
+                    day_start=WORK_START, day_end=WORK_END, work_days=WORK_DAYS):
+    """Every working-hours gap of at least duration_minutes between start and end"""
+    tz = ZoneInfo(tz_name)
+    windows = working_windows(start, end, tz_name, day_start, day_end, work_days)
+    gaps = subtract_intervals(windows, merge_intervals(busy), timedelta(minutes=duration_minutes))
+    
+    return [{
+        'start': gap_start.astimezone(tz),
+        'end': gap_end.astimezone(tz),
+        'duration_minutes': int((gap_end - gap_start).total_seconds() // 60)
+    } for gap_start, gap_end in gaps]
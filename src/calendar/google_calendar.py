@@ -2,76 +2,268 @@
 import os
 import json
 import boto3
-from datetime import datetime, timedelta
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from botocore.exceptions import ClientError
+from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from googleapiclient.discovery import build
+import httplib2
 from googleapiclient.errors import HttpError
 
+from .event_store import EVENT_FIELDS, event_bounds, get_event_store, iter_event_pages, sync_calendar, is_stale
+from .free_busy import DEFAULT_TIMEZONE, busy_from_events, busy_from_freebusy, find_free_slots
+from ..utils.tracing import span, wrap
+from ..utils.call_policy import AWS_CONFIG, GOOGLE_TIMEOUT
 
-def get_google_credentials():
+
+GOOGLE_SECRET_ID = 'chief/google-oauth'
+LIST_PAGE_SIZE = 250
+FANOUT_WORKERS = 4
+
+# Credentials are shared across threads; services are not (httplib2 is not thread-safe)
+_credentials = None
+_secret = None
+_persisted_token = None
+_generation = 0
+_credentials_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_secrets_client():
+    return boto3.client('secretsmanager', region_name='us-east-1', config=AWS_CONFIG)
+
+
+def load_google_credentials():
     """Retrieve Google OAuth credentials from AWS Secrets Manager"""
-    client = boto3.client('secretsmanager', region_name='us-east-1')
-    response = client.get_secret_value(SecretId='chief/google-oauth')
-    secret = json.loads(response['SecretString'])
+    global _secret
+    response = get_secrets_client().get_secret_value(SecretId=GOOGLE_SECRET_ID)
+    _secret = json.loads(response['SecretString'])
     
+    expiry = _secret.get('expiry')
     credentials = Credentials(
-        token=secret.get('access_token'),
-        refresh_token=secret.get('refresh_token'),
+        token=_secret.get('access_token'),
+        refresh_token=_secret.get('refresh_token'),
         token_uri='https://oauth2.googleapis.com/token',
-        client_id=secret.get('client_id'),
-        client_secret=secret.get('client_secret')
+        client_id=_secret.get('client_id'),
+        client_secret=_secret.get('client_secret'),
+        # No recorded expiry means we can't trust the stored token - refresh it once and record one
+        expiry=datetime.fromisoformat(expiry) if expiry else datetime.utcnow()
     )
     return credentials
 
 
+def save_google_credentials(credentials):
+    """Write a refreshed access token back to Secrets Manager so cold starts can reuse it"""
+    global _persisted_token
+    secret = dict(_secret or {})
+    secret['access_token'] = credentials.token
+    secret['expiry'] = credentials.expiry.isoformat() if credentials.expiry else None
+    if credentials.refresh_token:
+        secret['refresh_token'] = credentials.refresh_token
+    
+    try:
+        get_secrets_client().put_secret_value(SecretId=GOOGLE_SECRET_ID, SecretString=json.dumps(secret))
+    except ClientError:
+        # No write access - the token stays cached in this process until it expires
+        pass
+    _persisted_token = credentials.token
+
+
+def get_google_credentials():
+    """Return cached Google OAuth credentials, refreshing (and persisting) them only when expired"""
+    global _credentials, _persisted_token
+    with _credentials_lock:
+        if _credentials is None:
+            _credentials = load_google_credentials()
+            _persisted_token = _credentials.token
+        
+        if not _credentials.valid:
+            _credentials.refresh(Request())
+        
+        # Also catches refreshes done by the HTTP transport after a 401
+        if _credentials.token != _persisted_token:
+            save_google_credentials(_credentials)
+        
+        return _credentials
+
+
 def get_calendar_service():
-    """Build and return Google Calendar service"""
+    """Return this thread's Google Calendar service, building it once
+    
+    Uses the discovery document bundled with google-api-python-client, so
+    building the service makes no network request. Requests time out after
+    GOOGLE_TIMEOUT seconds.
+    """
     credentials = get_google_credentials()
-    service = build('calendar', 'v3', credentials=credentials)
+    service = getattr(_local, 'service', None)
+    if service is None or getattr(_local, 'generation', None) != _generation:
+        http = AuthorizedHttp(credentials, http=httplib2.Http(timeout=GOOGLE_TIMEOUT))
+        service = build('calendar', 'v3', http=http,
+                        static_discovery=True, cache_discovery=False)
+        _local.service = service
+        _local.generation = _generation
     return service
 
 
-def get_todays_events():
-    """Get all events for today"""
-    service = get_calendar_service()
+def reset_calendar_service():
+    """Drop cached credentials and services (e.g. after rotating the OAuth secret)"""
+    global _credentials, _persisted_token, _generation
+    with _credentials_lock:
+        _credentials = None
+        _persisted_token = None
+        _generation += 1
+
+
+def iter_events(start, end, calendar_id='primary', page_size=LIST_PAGE_SIZE):
+    """Live events.list across every page, fetching only the fields we use"""
+    pages = iter_event_pages(
+        get_calendar_service(),
+        calendarId=calendar_id,
+        timeMin=start.isoformat() + ('Z' if start.tzinfo is None else ''),
+        timeMax=end.isoformat() + ('Z' if end.tzinfo is None else ''),
+        singleEvents=True,
+        orderBy='startTime',
+        maxResults=page_size,
+        fields=f'nextPageToken,items({EVENT_FIELDS})'
+    )
+    for page in pages:
+        yield from page.get('items', [])
+
+
+def get_configured_calendars():
+    """Calendars to read, as {calendar_id: label}, from CHIEF_CALENDARS (JSON)
     
-    now = datetime.utcnow()
+    e.g. {"primary": "city", "dept@group.calendar.google.com": "department"}
+    """
+    raw = os.environ.get('CHIEF_CALENDARS')
+    return json.loads(raw) if raw else {'primary': 'primary'}
+
+
+def fan_out(func, calendar_ids, max_workers=FANOUT_WORKERS):
+    """Run func(calendar_id) for each calendar concurrently
+    
+    Returns {calendar_id: (result, error)}. Workers call get_calendar_service()
+    themselves, so each thread gets its own service instance.
+    """
+    if len(calendar_ids) == 1:
+        calendar_id = calendar_ids[0]
+        try:
+            return {calendar_id: (func(calendar_id), None)}
+        except Exception as e:
+            return {calendar_id: (None, e)}
+    
+    def run(calendar_id):
+        try:
+            return calendar_id, (func(calendar_id), None)
+        except Exception as e:
+            return calendar_id, (None, e)
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calendar_ids))) as pool:
+        return dict(pool.map(wrap(run), calendar_ids))
+
+
+def sync_calendars(calendar_ids):
+    """Incrementally sync every stale calendar concurrently
+    
+    A calendar that fails to sync keeps serving its last synced copy; one
+    that has never synced is skipped unless every calendar failed that way.
+    """
+    store = get_event_store()
+    stale = [calendar_id for calendar_id in calendar_ids if is_stale(store, calendar_id)]
+    if not stale:
+        return
+    
+    results = fan_out(lambda calendar_id: sync_calendar(get_calendar_service(), store, calendar_id), stale)
+    
+    missing = [error for calendar_id, (_, error) in results.items()
+               if error is not None and store.get_sync_state(calendar_id)[1] is None]
+    if missing and len(missing) == len(calendar_ids):
+        raise missing[0]
+
+
+def get_events_between(start, end, calendar_ids=None, live=False):
+    """Events from one or more calendars as a single time-ordered list
+    
+    Reads come from the local mirror, syncing stale calendars first (in
+    parallel). If Google is unreachable the last synced copy is served.
+    Ranges outside the mirror's synced window are read live.
+    live=True bypasses the mirror and pages through the API for every
+    calendar concurrently. Each event is tagged with calendar_id and
+    calendar_label.
+    """
+    labels = get_configured_calendars()
+    if calendar_ids is None:
+        calendar_ids = list(labels)
+    elif isinstance(calendar_ids, str):
+        calendar_ids = [calendar_ids]
+    
+    if not live:
+        sync_calendars(calendar_ids)
+        store = get_event_store()
+        # The mirror only holds each calendar's synced window - go to the API for anything outside it
+        live = not all(store.covers(calendar_id, start, end) for calendar_id in calendar_ids
+                       if store.get_sync_window(calendar_id) is not None)
+    
+    if live:
+        results = fan_out(lambda calendar_id: list(iter_events(start, end, calendar_id)), calendar_ids)
+        streams = []
+        for calendar_id, (events, error) in results.items():
+            if error is not None:
+                raise error
+            streams.append([dict(event, calendar_id=calendar_id) for event in events])
+        events = list(heapq.merge(*streams, key=lambda event: event_bounds(event)[0]))
+    else:
+        events = store.events_between(start, end, calendar_ids)
+    
+    for event in events:
+        event['calendar_label'] = labels.get(event['calendar_id'], event['calendar_id'])
+    return events
+
+
+def get_todays_events():
+    """Get all events for today (local day)"""
+    now = datetime.now(ZoneInfo(DEFAULT_TIMEZONE))
     start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
     end_of_day = start_of_day + timedelta(days=1)
     
-    events_result = service.events().list(
-        calendarId='primary',
-        timeMin=start_of_day.isoformat() + 'Z',
-        timeMax=end_of_day.isoformat() + 'Z',
-        singleEvents=True,
-        orderBy='startTime'
-    ).execute()
-    
-    return events_result.get('items', [])
+    return get_events_between(start_of_day, end_of_day)
 
 
 def get_upcoming_events(days=7):
     """Get events for the next N days"""
-    service = get_calendar_service()
-    
     now = datetime.utcnow()
     end_date = now + timedelta(days=days)
     
-    events_result = service.events().list(
-        calendarId='primary',
-        timeMin=now.isoformat() + 'Z',
-        timeMax=end_date.isoformat() + 'Z',
-        singleEvents=True,
-        orderBy='startTime'
-    ).execute()
-    
-    return events_result.get('items', [])
+    return get_events_between(now, end_date)
 
 
-def create_event(summary, start_time, end_time, description=None, location=None):
-    """Create a new calendar event"""
-    service = get_calendar_service()
+def get_dashboard_events(days=7):
+    """Today's events (local day) and the next N days' events from a single fetch"""
+    now = datetime.now(ZoneInfo(DEFAULT_TIMEZONE))
+    start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    end_of_day = start_of_day + timedelta(days=1)
+    end_date = now + timedelta(days=days)
     
+    events = get_events_between(start_of_day, max(end_of_day, end_date))
+    
+    todays, upcoming = [], []
+    for event in events:
+        start, end = event_bounds(event)
+        if start < end_of_day.timestamp():
+            todays.append(event)
+        if end > now.timestamp() and start < end_date.timestamp():
+            upcoming.append(event)
+    
+    return todays, upcoming
+
+
+def build_event_body(summary, start_time, end_time, description=None, location=None):
+    """Event resource for insert/update calls"""
     event = {
         'summary': summary,
         'start': {
@@ -89,35 +281,40 @@ def create_event(summary, start_time, end_time, description=None, location=None)
     if location:
         event['location'] = location
     
-    created_event = service.events().insert(calendarId='primary', body=event).execute()
+    return event
+
+
+def create_event(summary, start_time, end_time, description=None, location=None, calendar_id='primary'):
+    """Create a new calendar event"""
+    service = get_calendar_service()
+    
+    event = build_event_body(summary, start_time, end_time, description, location)
+    
+    with span('gcal.events.insert', calendar=calendar_id):
+        created_event = service.events().insert(calendarId=calendar_id, body=event).execute()
+    get_event_store().apply_changes(calendar_id, [created_event])
     return created_event
 
 
-def find_free_time(duration_minutes=60, days_ahead=7):
-    """Find available time slots"""
-    events = get_upcoming_events(days=days_ahead)
+def find_free_time(duration_minutes=60, days_ahead=7, calendar_ids=None, source='store',
+                   timezone_name=DEFAULT_TIMEZONE, start=None, end=None):
+    """Find every working-hours gap of at least duration_minutes
     
-    # Simple implementation - find gaps between events
-    free_slots = []
-    now = datetime.utcnow()
+    Searches from start (default now) to end (default days_ahead later).
+    Busy time comes from the local event store (source='store') or the
+    freebusy API (source='freebusy'), across all calendar_ids.
+    """
+    calendar_ids = calendar_ids or list(get_configured_calendars())
+    now = datetime.now(timezone.utc)
+    start = max(start or now, now)
+    end = end or now + timedelta(days=days_ahead)
     
-    # Business hours: 8 AM - 6 PM
-    for day_offset in range(days_ahead):
-        day = now + timedelta(days=day_offset)
-        day_start = day.replace(hour=13, minute=0, second=0, microsecond=0)  # 8 AM EST in UTC
-        day_end = day.replace(hour=23, minute=0, second=0, microsecond=0)    # 6 PM EST in UTC
-        
-        # Get events for this day
-        day_events = [e for e in events if e.get('start', {}).get('dateTime', '').startswith(day.strftime('%Y-%m-%d'))]
-        
-        if not day_events:
-            free_slots.append({
-                'start': day_start,
-                'end': day_end,
-                'duration_minutes': (day_end - day_start).seconds // 60
-            })
+    if source == 'freebusy':
+        busy = busy_from_freebusy(get_calendar_service(), calendar_ids, start, end)
+    else:
+        busy = busy_from_events(get_events_between(start, end, calendar_ids))
     
-    return free_slots
+    return find_free_slots(busy, start, end, duration_minutes, timezone_name)
 
 
 def format_events_for_display(events):
@@ -140,6 +337,8 @@ def format_events_for_display(events):
         line = f"• {time_str} - {summary}"
         if location:
             line += f" @ {location}"
+        if event.get('calendar_label', 'primary') != 'primary':
+            line += f" [{event['calendar_label']}]"
         lines.append(line)
     
     return "\n".join(lines)
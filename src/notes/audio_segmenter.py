@@ -0,0 +1,282 @@
+"""Segmented, parallel transcription for long recordings
+
+WAV/PCM audio is decoded with the standard library, split at silence (or at
+fixed windows with overlap), and the segments are transcribed concurrently.
+The transcription client only needs `client.audio.transcriptions.create(...)`
+(called with a `timeout=` keyword by the call policy), so a stub can be passed
+in to run everything offline.
+"""
+import io
+import sys
+import wave
+import operator
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+from ..utils.tracing import span, wrap
+from ..utils.usage import record_usage
+from ..utils.call_policy import call
+
+
+MAX_SEGMENT_BYTES = 24 * 1024 * 1024  # stay under the 25 MB Whisper upload limit
+FRAME_MS = 50  # energy analysis frame
+SILENCE_RATIO = 0.01  # RMS below 1% of full scale (-40 dBFS) counts as silence
+ENERGY_STRIDE = 8  # sample every Nth value when measuring energy
+
+
+class Segment:
+    """A slice of the recording; [keep_start, keep_end) is the part this segment owns in the stitched result"""
+    
+    def __init__(self, index, start, end, keep_start=None, keep_end=None):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.keep_start = start if keep_start is None else keep_start
+        self.keep_end = end if keep_end is None else keep_end
+    
+    def __repr__(self):
+        return f"Segment({self.index}, {self.start:.2f}-{self.end:.2f})"
+
+
+def is_wav(path):
+    """True if the file is a PCM WAV the standard library can decode"""
+    try:
+        with wave.open(path, 'rb'):
+            return True
+    except (wave.Error, EOFError):
+        return False
+
+
+def _samples(data, sampwidth):
+    """Decode little-endian PCM bytes into signed integer samples"""
+    if sampwidth == 1:
+        return array('b', bytes((b - 128) & 0xFF for b in data))
+    if sampwidth == 3:
+        # Drop the least significant byte of 24-bit audio and treat it as 16-bit
+        narrowed = bytearray(len(data) // 3 * 2)
+        narrowed[0::2] = data[1::3]
+        narrowed[1::2] = data[2::3]
+        data, sampwidth = bytes(narrowed), 2
+    samples = array('h' if sampwidth == 2 else 'i', data)
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return samples
+
+
+def frame_energies(path, frame_ms=FRAME_MS, stride=ENERGY_STRIDE):
+    """RMS energy per analysis frame, normalised to 0..1 of full scale"""
+    energies = []
+    with wave.open(path, 'rb') as wav:
+        sampwidth = wav.getsampwidth()
+        channels = wav.getnchannels()
+        frames_per_chunk = max(1, int(wav.getframerate() * frame_ms / 1000))
+        full_scale = float(1 << (8 * min(sampwidth, 2) - 1)) if sampwidth != 4 else float(1 << 31)
+        
+        while True:
+            data = wav.readframes(frames_per_chunk)
+            if not data:
+                break
+            samples = _samples(data, sampwidth)[::stride * channels]
+            if not samples:
+                energies.append(0.0)
+                continue
+            mean_square = sum(map(operator.mul, samples, samples)) / len(samples)
+            energies.append((mean_square ** 0.5) / full_scale)
+    return energies
+
+
+def plan_fixed_segments(duration, window, overlap):
+    """Fixed windows that overlap; each segment owns up to the midpoint of its overlaps"""
+    if window <= overlap:
+        raise ValueError("window must be longer than overlap")
+    
+    segments = []
+    start = 0.0
+    while start < duration:
+        end = min(duration, start + window)
+        segments.append(Segment(len(segments), start, end))
+        if end >= duration:
+            break
+        start = end - overlap
+    
+    for prev, nxt in zip(segments, segments[1:]):
+        boundary = (nxt.start + prev.end) / 2
+        prev.keep_end = boundary
+        nxt.keep_start = boundary
+    return segments
+
+
+def plan_silence_segments(energies, max_seconds, frame_ms=FRAME_MS, overlap=2.0,
+                          silence_ratio=SILENCE_RATIO, min_fraction=0.5):
+    """Cut at the quietest frame in the back half of each window
+    
+    When no frame in the search range is below the silence threshold the cut
+    falls back to a fixed boundary with `overlap` seconds of shared audio.
+    Every segment advances the cursor by at least one frame.
+    """
+    if max_seconds <= overlap:
+        raise ValueError("window must be longer than overlap")
+    
+    frame_s = frame_ms / 1000
+    duration = len(energies) * frame_s
+    max_frames = max(1, int(max_seconds / frame_s))
+    overlap_frames = int(overlap / frame_s)
+    
+    segments = []
+    cursor = 0
+    keep_from = 0.0
+    while cursor < len(energies):
+        limit = cursor + max_frames
+        if limit >= len(energies):
+            segments.append(Segment(len(segments), cursor * frame_s, duration, keep_from, duration))
+            break
+        
+        # Never cut at the cursor itself, or the next segment starts where this one did
+        search_from = cursor + max(1, int(max_frames * min_fraction))
+        quietest = min(range(search_from, limit), key=energies.__getitem__) if search_from < limit else None
+        
+        if quietest is not None and energies[quietest] < silence_ratio:
+            cut = quietest * frame_s
+            segments.append(Segment(len(segments), cursor * frame_s, cut, keep_from, cut))
+            cursor = quietest
+            keep_from = cut
+        else:
+            end = limit * frame_s
+            next_start = max(cursor + 1, limit - overlap_frames)
+            boundary = (next_start * frame_s + end) / 2
+            segments.append(Segment(len(segments), cursor * frame_s, end, keep_from, boundary))
+            cursor = next_start
+            keep_from = boundary
+    return segments
+
+
+def max_segment_seconds(path, max_bytes=MAX_SEGMENT_BYTES):
+    """Longest segment (in seconds) whose WAV encoding fits under max_bytes"""
+    with wave.open(path, 'rb') as wav:
+        byte_rate = wav.getframerate() * wav.getnchannels() * wav.getsampwidth()
+    return (max_bytes - 1024) / byte_rate
+
+
+def wav_duration(path):
+    with wave.open(path, 'rb') as wav:
+        return wav.getnframes() / wav.getframerate()
+
+
+def extract_wav(path, start, end):
+    """Return [start, end) seconds of a WAV file as an in-memory WAV"""
+    with wave.open(path, 'rb') as wav:
+        rate = wav.getframerate()
+        first = int(start * rate)
+        wav.setpos(min(first, wav.getnframes()))
+        data = wav.readframes(max(0, int(end * rate) - first))
+        params = wav.getparams()
+    
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as out:
+        out.setparams(params)
+        out.writeframes(data)
+    buffer.seek(0)
+    return buffer
+
+
+def _pieces(response, segment):
+    """Timed text pieces from a transcription response, offset to recording time"""
+    segments = getattr(response, 'segments', None)
+    if segments is None and isinstance(response, dict):
+        segments = response.get('segments')
+    
+    if not segments:
+        if isinstance(response, str):
+            text = response
+        elif isinstance(response, dict):
+            text = response.get('text', '')
+        else:
+            text = getattr(response, 'text', '')
+        return [{'start': segment.start, 'end': segment.end, 'text': text.strip()}]
+    
+    pieces = []
+    for s in segments:
+        get = s.get if isinstance(s, dict) else lambda k: getattr(s, k)
+        pieces.append({
+            'start': segment.start + float(get('start')),
+            'end': segment.start + float(get('end')),
+            'text': get('text').strip()
+        })
+    return pieces
+
+
+def _trim_repeated_words(previous, text, min_words=3, max_words=40):
+    """Drop words at the start of `text` that repeat the end of `previous`"""
+    prev_words = previous.split()
+    words = text.split()
+    for n in range(min(max_words, len(prev_words), len(words)), min_words - 1, -1):
+        if [w.lower() for w in prev_words[-n:]] == [w.lower() for w in words[:n]]:
+            return ' '.join(words[n:])
+    return text
+
+
+def stitch(results):
+    """Merge per-segment pieces into one time-ordered transcript
+    
+    A timed piece is kept by the segment that owns its midpoint. Untimed
+    responses (plain text) cover the whole segment, so any words repeated
+    across an overlap are trimmed at the join.
+    """
+    stitched = []
+    for segment, pieces in sorted(results, key=lambda r: r[0].index):
+        for piece in pieces:
+            midpoint = (piece['start'] + piece['end']) / 2
+            if not (segment.keep_start <= midpoint < segment.keep_end or
+                    (piece['start'] == segment.start and piece['end'] == segment.end)):
+                continue
+            if stitched and piece['start'] < stitched[-1]['end']:
+                piece = dict(piece, text=_trim_repeated_words(stitched[-1]['text'], piece['text']))
+            if piece['text']:
+                stitched.append(piece)
+    
+    return {
+        'text': ' '.join(p['text'] for p in stitched),
+        'segments': stitched,
+        'duration': max((s.end for s, _ in results), default=0.0)
+    }
+
+
+def transcribe_segmented(client, path, mode='silence', window=None, overlap=2.0,
+                         max_workers=4, model="whisper-1"):
+    """Split a WAV recording and transcribe the segments in parallel
+    
+    mode='silence' cuts at quiet frames, mode='fixed' uses windows of
+    `window` seconds overlapping by `overlap` seconds. Returns a dict with the
+    stitched text, timed segments and total duration.
+    """
+    limit = max_segment_seconds(path)
+    window = min(window or limit, limit)
+    
+    if mode == 'silence':
+        segments = plan_silence_segments(frame_energies(path), window, overlap=overlap)
+    elif mode == 'fixed':
+        segments = plan_fixed_segments(wav_duration(path), window, overlap)
+    else:
+        raise ValueError(f"Unknown segmentation mode: {mode}")
+    
+    def transcribe(segment):
+        audio = extract_wav(path, segment.start, segment.end)
+        
+        def request(timeout):
+            audio.seek(0)
+            return client.audio.transcriptions.create(
+                model=model,
+                file=(f"segment_{segment.index:04d}.wav", audio),
+                response_format="verbose_json",
+                timeout=timeout
+            )
+        
+        with span('openai.transcriptions', segment=segment.index, bytes_in=len(audio.getbuffer())):
+            response = call('whisper', request)
+        record_usage('transcription', model, audio_seconds=segment.end - segment.start)
+        return segment, _pieces(response, segment)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(wrap(transcribe), segments))
+    
+    return stitch(results)
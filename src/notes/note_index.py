@@ -0,0 +1,126 @@
+"""Semantic index of closed note sessions in the Qdrant `notes` collection
+
+When a session closes, its summary and every entry are embedded in
+batches and upserted with workspace and timestamp payloads, so searches
+like "what did we decide about Station 72 staffing?" can be filtered by
+workspace and date range instead of scanning chief_note_sessions.
+"""
+import uuid
+from datetime import datetime, timezone
+
+from ..agent.document_rag import get_embeddings, get_qdrant_client
+from ..utils.tracing import span
+from ..utils.usage import tags
+
+
+COLLECTION = "notes"
+EMBED_BATCH_SIZE = 100
+UPSERT_BATCH_SIZE = 256
+
+
+def _epoch(value):
+    """Seconds since epoch for an ISO string or date (naive values are UTC)"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def session_documents(session):
+    """(point_id, text, payload) for a session's summary and each entry"""
+    session_id = session['PK'].split('#', 1)[1]
+    base = {
+        'session_id': session_id,
+        'title': session.get('title'),
+        'workspace': session.get('workspace'),
+        'user_id': session.get('user_id')
+    }
+    
+    documents = []
+    summary = session.get('summary')
+    if summary and summary != "Summary unavailable":
+        timestamp = session.get('ended_at') or session['started_at']
+        documents.append((
+            str(uuid.uuid5(uuid.NAMESPACE_URL, f"{session_id}/summary")),
+            f"{session.get('title')}\n{summary}",
+            dict(base, kind='summary', text=summary, timestamp=timestamp, ts=_epoch(timestamp))
+        ))
+    
+    for i, entry in enumerate(session.get('entries', [])):
+        documents.append((
+            str(uuid.uuid5(uuid.NAMESPACE_URL, f"{session_id}/entry/{i}")),
+            entry['content'],
+            dict(base, kind='entry', entry_index=i, text=entry['content'],
+                 input_type=entry.get('input_type'), timestamp=entry['timestamp'], ts=_epoch(entry['timestamp']))
+        ))
+    return documents
+
+
+class NoteIndex:
+    def __init__(self, qdrant=None, embed=get_embeddings):
+        self.qdrant = qdrant or get_qdrant_client()
+        self.embed = embed
+        self.collection = COLLECTION
+    
+    def index_session(self, session):
+        """Embed and upsert a session's summary and entries; returns the number of points
+        
+        Point IDs are derived from the session and entry position, so
+        re-indexing a session overwrites its points instead of duplicating them.
+        """
+        from qdrant_client.models import PointStruct
+        
+        documents = session_documents(session)
+        if not documents:
+            return 0
+        
+        with tags(feature='note_index', workspace=session.get('workspace')):
+            vectors = self.embed([text for _, text, _ in documents], batch_size=EMBED_BATCH_SIZE)
+        points = [PointStruct(id=point_id, vector=vector, payload=payload)
+                  for (point_id, _, payload), vector in zip(documents, vectors)]
+        
+        for i in range(0, len(points), UPSERT_BATCH_SIZE):
+            with span('qdrant.upsert', collection=self.collection, points=len(points[i:i + UPSERT_BATCH_SIZE])):
+                self.qdrant.upsert(collection_name=self.collection, points=points[i:i + UPSERT_BATCH_SIZE])
+        return len(points)
+    
+    def search(self, query, workspace=None, start_date=None, end_date=None, kind=None, top_k=5):
+        """Note entries/summaries most relevant to query
+        
+        start_date and end_date (ISO strings or dates) bound the note
+        timestamp; end_date is inclusive of the whole day.
+        """
+        from qdrant_client.models import Filter, FieldCondition, MatchValue, Range
+        
+        conditions = []
+        if workspace:
+            conditions.append(FieldCondition(key="workspace", match=MatchValue(value=workspace)))
+        if kind:
+            conditions.append(FieldCondition(key="kind", match=MatchValue(value=kind)))
+        if start_date or end_date:
+            conditions.append(FieldCondition(key="ts", range=Range(
+                gte=_epoch(start_date) if start_date else None,
+                lt=_epoch(end_date) + 86400 if end_date else None
+            )))
+        
+        vector = self.embed([query])[0]
+        with span('qdrant.query_points', collection=self.collection):
+            results = self.qdrant.query_points(
+                collection_name=self.collection,
+                query=vector,
+                query_filter=Filter(must=conditions) if conditions else None,
+                limit=top_k
+            )
+        
+        return [{
+            'score': point.score,
+            'session_id': point.payload['session_id'],
+            'title': point.payload.get('title'),
+            'workspace': point.payload.get('workspace'),
+            'kind': point.payload['kind'],
+            'timestamp': point.payload['timestamp'],
+            'text': point.payload['text']
+        } for point in results.points]
@@ -1,19 +1,34 @@
 """Note-taking and action item extraction for CHIEF"""
 import json
+import time
 import boto3
 import uuid
+import threading
 from datetime import datetime
-from anthropic import Anthropic
+from zoneinfo import ZoneInfo
+from anthropic import Anthropic, APIError
+from botocore.exceptions import ClientError
+
+from ..utils.tracing import span
+from ..utils.usage import record_usage, model_for, tags
+from ..utils.call_policy import call, DeadlineExceeded, AWS_CONFIG
+from ..calendar.free_busy import DEFAULT_TIMEZONE
+
+
+NOTE_SESSION_MAX_AGE = 6 * 3600  # seconds an open session keeps catching SMS messages
+
+_note_session = None
+_note_session_lock = threading.Lock()
 
 
 def get_secret(secret_id):
-    client = boto3.client('secretsmanager', region_name='us-east-1')
+    client = boto3.client('secretsmanager', region_name='us-east-1', config=AWS_CONFIG)
     response = client.get_secret_value(SecretId=secret_id)
     return json.loads(response['SecretString'])
 
 
 def get_dynamodb():
-    return boto3.resource('dynamodb', region_name='us-east-1')
+    return boto3.resource('dynamodb', region_name='us-east-1', config=AWS_CONFIG)
 
 
 class NoteSession:
@@ -38,8 +53,32 @@ class NoteSession:
             'entries': []
         })
         
+        # Pointer so SMS follow-ups ("done with notes") can find the open session
+        self.sessions_table.put_item(Item={
+            'PK': f'USER#{self.user_id}',
+            'SK': 'ACTIVE_SESSION',
+            'session_id': session_id,
+            'title': title,
+            'workspace': workspace,
+            'started_ts': int(time.time())
+        })
+        
         return session_id
     
+    def get_active_session(self, max_age=None):
+        """The user's open session pointer ({session_id, title, workspace}) or None
+        
+        With max_age, a pointer started more than max_age seconds ago counts
+        as closed (a forgotten session shouldn't swallow messages forever).
+        """
+        response = self.sessions_table.get_item(
+            Key={'PK': f'USER#{self.user_id}', 'SK': 'ACTIVE_SESSION'}
+        )
+        active = response.get('Item')
+        if active and max_age is not None and time.time() - float(active.get('started_ts', 0)) > max_age:
+            return None
+        return active
+    
     def add_entry(self, session_id, content, input_type="text"):
         """Add an entry to an active session"""
         timestamp = datetime.utcnow().isoformat()
@@ -76,31 +115,42 @@ class NoteSession:
         return actions, "Entry added"
     
     def extract_actions(self, content, workspace):
-        """Use Claude to extract action items from note content"""
+        """Use Claude to extract action items from note content
+        
+        Returns [] when the model can't be reached in time or its reply
+        isn't a JSON list; the entry itself is still saved.
+        """
         try:
             creds = get_secret('chief/anthropic-api-key')
-            client = Anthropic(api_key=creds['api_key'])
+            client = Anthropic(api_key=creds['api_key'], max_retries=0)
+            model = model_for('extract_actions', "claude-sonnet-4-20250514")
             
-            response = client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=500,
-                system="""Extract action items from the note. Return JSON array:
+            with span('anthropic.messages', feature='extract_actions', model=model) as s:
+                response = call('anthropic_small', client.messages.create,
+                    model=model,
+                    max_tokens=500,
+                    system="""Extract action items from the note. Return JSON array:
 [{"description": "task", "assignee": "name or null", "due_date": "date or null", "priority": "high/medium/low"}]
 If no actions found, return empty array: []
 Only return valid JSON, nothing else.""",
-                messages=[{"role": "user", "content": content}]
-            )
-            
-            result = response.content[0].text.strip()
-            actions = json.loads(result)
-            
-            # Save action items
-            for action in actions:
-                self.save_action(action, workspace)
+                    messages=[{"role": "user", "content": content}]
+                )
+                s.record_response(response)
+            record_usage('extract_actions', model, response, workspace=workspace)
             
-            return actions
-        except:
+            actions = json.loads(response.content[0].text.strip())
+        except (APIError, DeadlineExceeded, ClientError, json.JSONDecodeError):
             return []
+        
+        if not isinstance(actions, list):
+            return []
+        actions = [a for a in actions if isinstance(a, dict) and a.get('description')]
+        
+        # Save action items
+        for action in actions:
+            self.save_action(action, workspace)
+        
+        return actions
     
     def save_action(self, action, workspace):
         """Save an action item to DynamoDB"""
@@ -119,6 +169,22 @@ Only return valid JSON, nothing else.""",
             'workspace': workspace,
             'created_at': datetime.utcnow().isoformat()
         })
+        
+        return item_id
+    
+    def complete_action(self, item_id):
+        """Mark an action item as completed"""
+        self.actions_table.update_item(
+            Key={'PK': f'ACTION#{item_id}', 'SK': f'USER#{self.user_id}'},
+            UpdateExpression='SET #s = :s, GSI1PK = :gsi, completed_at = :ts',
+            ExpressionAttributeNames={'#s': 'status'},
+            ExpressionAttributeValues={
+                ':s': 'completed',
+                ':gsi': 'STATUS#completed',
+                ':ts': datetime.utcnow().isoformat()
+            }
+        )
+        return item_id
     
     def end_session(self, session_id):
         """End a note session and generate summary"""
@@ -133,7 +199,9 @@ Only return valid JSON, nothing else.""",
         
         # Generate summary
         all_content = '\n'.join([e['content'] for e in session.get('entries', [])])
-        summary = self.generate_summary(all_content)
+        with tags(workspace=session.get('workspace')):
+            summary = self.generate_summary(all_content)
+        ended_at = datetime.utcnow().isoformat()
         
         # Update session
         self.sessions_table.update_item(
@@ -142,30 +210,110 @@ Only return valid JSON, nothing else.""",
             ExpressionAttributeNames={'#s': 'status'},
             ExpressionAttributeValues={
                 ':s': 'closed',
-                ':e': datetime.utcnow().isoformat(),
+                ':e': ended_at,
                 ':sum': summary
             }
         )
         
+        session.update(status='closed', summary=summary, ended_at=ended_at)
+        self.index_session(session)
+        
+        try:
+            self.sessions_table.delete_item(
+                Key={'PK': f'USER#{self.user_id}', 'SK': 'ACTIVE_SESSION'},
+                ConditionExpression='session_id = :id',
+                ExpressionAttributeValues={':id': session_id}
+            )
+        except ClientError:
+            # A newer session is active - leave its pointer alone
+            pass
+        
         return summary, "Session closed"
     
+    def index_session(self, session):
+        """Add a closed session to the semantic notes index and mark it indexed
+        
+        Failures leave the session unmarked for index_closed_sessions to retry.
+        """
+        from .note_index import NoteIndex
+        
+        try:
+            NoteIndex().index_session(session)
+        except Exception:
+            return False
+        
+        self.sessions_table.update_item(
+            Key={'PK': session['PK'], 'SK': 'META'},
+            UpdateExpression='SET indexed_at = :ts',
+            ExpressionAttributeValues={':ts': datetime.utcnow().isoformat()}
+        )
+        return True
+    
+    def index_closed_sessions(self):
+        """Index closed sessions that haven't been indexed yet (backfill / retry)"""
+        params = {
+            'FilterExpression': 'SK = :meta AND #s = :closed AND attribute_not_exists(indexed_at)',
+            'ExpressionAttributeNames': {'#s': 'status'},
+            'ExpressionAttributeValues': {':meta': 'META', ':closed': 'closed'}
+        }
+        indexed = 0
+        while True:
+            response = self.sessions_table.scan(**params)
+            for session in response.get('Items', []):
+                indexed += self.index_session(session)
+            if 'LastEvaluatedKey' not in response:
+                return indexed
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    def search_notes(self, query, workspace=None, start_date=None, end_date=None, top_k=5):
+        """Semantic search over closed sessions' entries and summaries"""
+        from .note_index import NoteIndex
+        return NoteIndex().search(query, workspace=workspace, start_date=start_date,
+                                  end_date=end_date, top_k=top_k)
+    
     def generate_summary(self, content):
         """Generate a summary of the note session"""
         try:
             creds = get_secret('chief/anthropic-api-key')
-            client = Anthropic(api_key=creds['api_key'])
+            client = Anthropic(api_key=creds['api_key'], max_retries=0)
+            model = model_for('note_summary', "claude-sonnet-4-20250514")
             
-            response = client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=300,
-                system="Summarize these notes in 2-3 bullet points. Be concise.",
-                messages=[{"role": "user", "content": content}]
-            )
+            with span('anthropic.messages', feature='note_summary', model=model) as s:
+                response = call('anthropic_small', client.messages.create,
+                    model=model,
+                    max_tokens=300,
+                    system="Summarize these notes in 2-3 bullet points. Be concise.",
+                    messages=[{"role": "user", "content": content}]
+                )
+                s.record_response(response)
+            record_usage('note_summary', model, response)
             
             return response.content[0].text
-        except:
+        except (APIError, DeadlineExceeded, ClientError):
             return "Summary unavailable"
     
+    def get_due_actions(self, as_of=None):
+        """Pending actions that are overdue or due on as_of (default today, local time)
+        
+        Only ISO-dated actions sort into the DUE#<date> range; 'DUE#none' and
+        free-form dates fall outside it.
+        """
+        as_of = as_of or datetime.now(ZoneInfo(DEFAULT_TIMEZONE)).date().isoformat()
+        response = self.actions_table.query(
+            IndexName='GSI1',
+            KeyConditionExpression='GSI1PK = :status AND GSI1SK BETWEEN :start AND :end',
+            ExpressionAttributeValues={
+                ':status': 'STATUS#pending',
+                ':start': 'DUE#0000-00-00',
+                ':end': f'DUE#{as_of}'
+            }
+        )
+        
+        overdue, due_today = [], []
+        for action in response.get('Items', []):
+            (due_today if action.get('due_date') == as_of else overdue).append(action)
+        return overdue, due_today
+    
     def get_pending_actions(self):
         """Get all pending action items"""
         response = self.actions_table.query(
@@ -174,3 +322,12 @@ Only return valid JSON, nothing else.""",
             ExpressionAttributeValues={':status': 'STATUS#pending'}
         )
         return response.get('Items', [])
+
+
+def get_note_session():
+    """Process-wide NoteSession for the default user"""
+    global _note_session
+    with _note_session_lock:
+        if _note_session is None:
+            _note_session = NoteSession()
+        return _note_session
@@ -0,0 +1,72 @@
+"""Transcript cache for CHIEF voice notes, keyed by audio content hash"""
+import os
+import json
+import hashlib
+from datetime import datetime
+from botocore.exceptions import ClientError
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    """Stores transcripts as transcripts/<model>/<sha256>.json in S3, or in a local directory"""
+    
+    def __init__(self, s3=None, bucket=None, local_dir=None, model="whisper-1"):
+        self.s3 = s3
+        self.bucket = bucket
+        self.local_dir = local_dir
+        self.model = model
+    
+    def _key(self, audio_hash):
+        return f"transcripts/{self.model}/{audio_hash}.json"
+    
+    def get(self, audio_hash):
+        """Return the cached transcript for an audio hash, or None"""
+        key = self._key(audio_hash)
+        
+        if self.local_dir:
+            path = os.path.join(self.local_dir, key)
+            if not os.path.exists(path):
+                return None
+            with open(path) as f:
+                return json.load(f)['transcript']
+        
+        try:
+            response = self.s3.get_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                return None
+            raise
+        return json.loads(response['Body'].read())['transcript']
+    
+    def put(self, audio_hash, transcript):
+        """Store a transcript under its audio hash"""
+        key = self._key(audio_hash)
+        body = json.dumps({
+            'audio_sha256': audio_hash,
+            'model': self.model,
+            'transcript': transcript,
+            'created_at': datetime.utcnow().isoformat()
+        })
+        
+        if self.local_dir:
+            path = os.path.join(self.local_dir, key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(body)
+            return key
+        
+        self.s3.put_object(
+            Bucket=self.bucket,
+            Key=key,
+            Body=body.encode('utf-8'),
+            ContentType='application/json'
+        )
+        return key
@@ -2,60 +2,250 @@
 import os
 import json
 import boto3
+import hashlib
 import tempfile
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
 from openai import OpenAI
 
+from .transcript_cache import TranscriptCache, hash_file
+from .audio_segmenter import is_wav, wav_duration, transcribe_segmented
+from ..utils.tracing import span
+from ..utils.usage import record_usage, estimate_audio_seconds
+from ..utils.call_policy import call, AWS_CONFIG
+
 
 def get_secret(secret_id):
-    client = boto3.client('secretsmanager', region_name='us-east-1')
+    client = boto3.client('secretsmanager', region_name='us-east-1', config=AWS_CONFIG)
     response = client.get_secret_value(SecretId=secret_id)
     return json.loads(response['SecretString'])
 
 
 def get_s3_client():
-    return boto3.client('s3', region_name='us-east-1')
+    return boto3.client('s3', region_name='us-east-1', config=AWS_CONFIG)
+
+
+MAX_AUDIO_BYTES = 25 * 1024 * 1024  # Whisper upload limit (per request / segment)
+MAX_DOWNLOAD_BYTES = 300 * 1024 * 1024  # longer recordings are split by transcribe_long; fits Lambda's /tmp
+DOWNLOAD_TIMEOUT = (5, 30)  # (connect, read) seconds
+CHUNK_SIZE = 64 * 1024
+
+AUDIO_EXTENSIONS = {
+    'audio/mpeg': '.mp3',
+    'audio/mp3': '.mp3',
+    'audio/mp4': '.m4a',
+    'audio/x-m4a': '.m4a',
+    'audio/wav': '.wav',
+    'audio/x-wav': '.wav',
+    'audio/ogg': '.ogg',
+    'audio/webm': '.webm',
+}
+
+_http_session = None
+
+
+def get_http_session():
+    """Shared requests.Session so media downloads reuse pooled connections"""
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=2)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        _http_session = session
+    return _http_session
+
+
+def audio_extension(content_type, default='.mp3'):
+    """Pick a file extension Whisper can use to detect the audio format"""
+    if not content_type:
+        return default
+    return AUDIO_EXTENSIONS.get(content_type.split(';')[0].strip().lower(), default)
+
+
+class HashingReader:
+    """File-like wrapper that hashes and size-checks audio as it is read"""
+    
+    def __init__(self, stream, max_bytes=MAX_AUDIO_BYTES):
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self.digest = hashlib.sha256()
+    
+    def read(self, size=-1):
+        chunk = self.stream.read(size)
+        self.bytes_read += len(chunk)
+        if self.bytes_read > self.max_bytes:
+            raise ValueError(f"Audio exceeds {self.max_bytes} byte limit")
+        self.digest.update(chunk)
+        return chunk
+    
+    def hexdigest(self):
+        return self.digest.hexdigest()
+
+
+def audio_seconds(audio_path):
+    """Exact for WAV; other formats are estimated from the file size"""
+    if is_wav(audio_path):
+        return wav_duration(audio_path)
+    return estimate_audio_seconds(os.path.getsize(audio_path))
 
 
 class VoiceTranscriber:
     def __init__(self):
         creds = get_secret('chief/openai-api-key')
-        self.client = OpenAI(api_key=creds['api_key'])
+        self.client = OpenAI(api_key=creds['api_key'], max_retries=0)
         self.s3 = get_s3_client()
         
         # Get bucket name
         s3_config = get_secret('chief/s3-config')
         self.bucket = s3_config['bucket_name']
+        
+        # Transcripts are cached by audio hash; set CHIEF_TRANSCRIPT_CACHE_DIR to keep them on local disk
+        self.cache = TranscriptCache(
+            s3=self.s3,
+            bucket=self.bucket,
+            local_dir=os.environ.get('CHIEF_TRANSCRIPT_CACHE_DIR')
+        )
     
-    def transcribe_file(self, audio_path):
-        """Transcribe an audio file using Whisper"""
+    def transcribe_file(self, audio_path, audio_hash=None):
+        """Transcribe an audio file using Whisper (cached by audio content hash)"""
+        audio_hash = audio_hash or hash_file(audio_path)
+        cached = self.cache.get(audio_hash)
+        if cached is not None:
+            return cached
+        
+        # Too large for a single Whisper upload - split it locally
+        if os.path.getsize(audio_path) > MAX_AUDIO_BYTES:
+            return self.transcribe_long(audio_path, audio_hash=audio_hash)['text']
+        
         with open(audio_path, 'rb') as audio_file:
-            response = self.client.audio.transcriptions.create(
+            def request(timeout):
+                # A retry re-sends the file from the start
+                audio_file.seek(0)
+                return self.client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=audio_file,
+                    response_format="text",
+                    timeout=timeout
+                )
+            
+            with span('openai.transcriptions', bytes_in=os.path.getsize(audio_path)) as s:
+                response = call('whisper', request)
+                s.record_response(response)
+        record_usage('transcription', 'whisper-1', audio_seconds=audio_seconds(audio_path))
+        
+        self.cache.put(audio_hash, response)
+        return response
+    
+    def transcribe_long(self, audio_path, mode='silence', max_workers=4, audio_hash=None):
+        """Transcribe a long WAV recording as parallel segments
+        
+        Returns the segmenter result (stitched text, timed segments, duration).
+        Only WAV/PCM can be split locally; other formats must fit in one upload.
+        """
+        if not is_wav(audio_path):
+            raise ValueError("Only WAV/PCM recordings can be split for segmented transcription")
+        
+        result = transcribe_segmented(self.client, audio_path, mode=mode, max_workers=max_workers)
+        self.cache.put(audio_hash or hash_file(audio_path), result['text'])
+        return result
+    
+    def transcribe_stream(self, stream, filename="audio.mp3", audio_hash=None):
+        """Send a file-like stream straight to Whisper without a temp file
+        
+        The content hash is only known once the upload has been read, so the
+        cache can be checked up front only when the caller supplies audio_hash.
+        """
+        if audio_hash:
+            cached = self.cache.get(audio_hash)
+            if cached is not None:
+                return cached
+        
+        reader = stream if isinstance(stream, HashingReader) else HashingReader(stream)
+        with span('openai.transcriptions', filename=filename) as s:
+            # The stream can only be read once, so there is no retry
+            response = call('whisper', self.client.audio.transcriptions.create,
                 model="whisper-1",
-                file=audio_file,
-                response_format="text"
+                file=(filename, reader),
+                response_format="text",
+                max_attempts=1
             )
+            s.record_response(response)
+        record_usage('transcription', 'whisper-1', audio_seconds=estimate_audio_seconds(reader.bytes_read))
+        
+        self.cache.put(audio_hash or reader.hexdigest(), response)
         return response
     
-    def transcribe_url(self, audio_url):
-        """Download and transcribe audio from URL"""
-        # Download audio to temp file
-        response = requests.get(audio_url)
+    def transcribe_url(self, audio_url, stream=False):
+        """Download and transcribe audio from URL
         
-        with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp:
-            tmp.write(response.content)
-            tmp_path = tmp.name
+        The download is streamed in chunks over a pooled session and capped at
+        MAX_DOWNLOAD_BYTES. It is spooled to a temp file so the transcript
+        cache can be checked before calling Whisper, and recordings over the
+        MAX_AUDIO_BYTES upload limit go to transcribe_long. With stream=True
+        a body known to fit in one upload is piped directly to Whisper instead.
+        """
+        session = get_http_session()
+        
+        with session.get(audio_url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+            response.raise_for_status()
+            
+            length = int(response.headers.get('Content-Length') or 0)
+            if length > MAX_DOWNLOAD_BYTES:
+                raise ValueError(f"Audio is {length} bytes, limit is {MAX_DOWNLOAD_BYTES}")
+            
+            suffix = audio_extension(response.headers.get('Content-Type'))
+            
+            if stream and 0 < length <= MAX_AUDIO_BYTES:
+                response.raw.decode_content = True
+                return self.transcribe_stream(response.raw, filename=f"audio{suffix}")
+            
+            digest = hashlib.sha256()
+            size = 0
+            with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+                tmp_path = tmp.name
+                try:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > MAX_DOWNLOAD_BYTES:
+                            raise ValueError(f"Audio exceeds {MAX_DOWNLOAD_BYTES} byte limit")
+                        digest.update(chunk)
+                        tmp.write(chunk)
+                except Exception:
+                    tmp.close()
+                    os.unlink(tmp_path)
+                    raise
         
         try:
-            transcript = self.transcribe_file(tmp_path)
+            transcript = self.transcribe_file(tmp_path, audio_hash=digest.hexdigest())
             return transcript
         finally:
             os.unlink(tmp_path)
     
-    def transcribe_s3(self, s3_key):
-        """Transcribe audio from S3"""
-        with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as tmp:
+    def transcribe_s3(self, s3_key, stream=False):
+        """Transcribe audio from S3
+        
+        With stream=True the object body is piped directly to Whisper. Objects
+        written by save_audio_to_s3 carry their SHA-256 in metadata, so the
+        transcript cache is checked before any audio bytes are read. Objects
+        over the MAX_AUDIO_BYTES upload limit are downloaded and split by
+        transcribe_long even when stream=True.
+        """
+        if stream:
+            obj = self.s3.get_object(Bucket=self.bucket, Key=s3_key)
+            if obj.get('ContentLength', 0) <= MAX_AUDIO_BYTES:
+                audio_hash = obj.get('Metadata', {}).get('sha256')
+                try:
+                    return self.transcribe_stream(obj['Body'], filename=os.path.basename(s3_key),
+                                                  audio_hash=audio_hash)
+                finally:
+                    obj['Body'].close()
+            obj['Body'].close()
+        
+        suffix = os.path.splitext(s3_key)[1] or '.mp3'
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
             self.s3.download_file(self.bucket, s3_key, tmp.name)
             tmp_path = tmp.name
         
@@ -73,12 +263,13 @@ class VoiceTranscriber:
         self.s3.put_object(
             Bucket=self.bucket,
             Key=filename,
-            Body=audio_data
+            Body=audio_data,
+            Metadata={'sha256': hashlib.sha256(audio_data).hexdigest()}
         )
         
         return filename
     
-    def transcribe_and_process(self, audio_source, source_type='file'):
+    def transcribe_and_process(self, audio_source, source_type='file', stream=False):
         """Transcribe audio and extract action items"""
         from .note_manager import NoteSession
         
@@ -86,9 +277,9 @@ class VoiceTranscriber:
         if source_type == 'file':
             transcript = self.transcribe_file(audio_source)
         elif source_type == 'url':
-            transcript = self.transcribe_url(audio_source)
+            transcript = self.transcribe_url(audio_source, stream=stream)
         elif source_type == 's3':
-            transcript = self.transcribe_s3(audio_source)
+            transcript = self.transcribe_s3(audio_source, stream=stream)
         else:
             raise ValueError(f"Unknown source type: {source_type}")
         
@@ -110,10 +301,7 @@ def handle_twilio_voice_message(media_url, from_number):
     """Handle incoming voice/audio message from Twilio"""
     transcriber = VoiceTranscriber()
     
-    # Transcribe the audio
-    transcript = transcriber.transcribe_url(media_url)
-    
-    # Process as a note
+    # Transcribe once and process as a note
     result = transcriber.transcribe_and_process(media_url, source_type='url')
     
     return result
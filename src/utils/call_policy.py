@@ -0,0 +1,247 @@
+"""Timeouts, retries and hedging for CHIEF's model and API calls
+
+Every Anthropic, embedding and Whisper request goes through a named
+CallPolicy:
+
+    response = call('anthropic', client.messages.create, model=..., messages=...)
+
+The policy passes a per-attempt `timeout=` to the SDK method, retries
+connection errors, timeouts, 429s and 5xx with jittered exponential
+backoff, and never starts an attempt (or a backoff sleep) that would run
+past the request deadline. The deadline comes from the Lambda context
+via `deadline_from_context(context)` and nests through contextvars, so
+tool threads started with tracing.wrap see it too. SDK clients are built
+with max_retries=0 so retries aren't multiplied.
+
+Policies listed in CHIEF_HEDGED_CALLS (default: embeddings) also hedge:
+when an attempt is still running after that policy's recent p95 latency,
+a duplicate request is started and whichever answers first wins. Only
+idempotent, cheap calls should be hedged - the slower duplicate is still
+billed.
+
+The other external clients get fixed timeouts from here: AWS_CONFIG for
+every boto3 client/resource (DynamoDB, Secrets Manager, S3),
+GOOGLE_TIMEOUT for the Calendar service's httplib2 connection and
+TWILIO_TIMEOUT for Twilio's HTTP client.
+"""
+import os
+import time
+import random
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import anthropic
+import openai
+from botocore.config import Config
+
+from .tracing import current_span, wrap
+
+
+RETRYABLE_STATUS = (408, 409, 429, 500, 502, 503, 504, 529)  # 529: Anthropic overloaded
+MIN_CALL_SECONDS = 1.0       # don't start an attempt with less time than this left
+RESPONSE_RESERVE_SECONDS = 3.0  # kept back from the Lambda deadline to send the reply
+LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+HEDGE_PERCENTILE = 95
+HEDGE_WORKERS = 8
+DEFAULT_DEADLINE_SECONDS = 30.0  # invocations without a Lambda context (local runs, tests)
+
+# botocore retries throttling and 5xx itself ('standard' mode backs off with jitter)
+AWS_CONFIG = Config(connect_timeout=2, read_timeout=10, retries={'max_attempts': 3, 'mode': 'standard'})
+GOOGLE_TIMEOUT = 10  # seconds per Calendar API request
+TWILIO_TIMEOUT = 10  # seconds per Twilio API request
+
+_deadline = contextvars.ContextVar('chief_call_deadline', default=None)
+_hedge_pool = None
+_hedge_pool_lock = threading.Lock()
+
+
+class DeadlineExceeded(TimeoutError):
+    """Not enough of the request deadline is left to make (or retry) a call"""
+
+
+@contextmanager
+def deadline(seconds):
+    """Calls inside the block must finish within seconds (an outer deadline still applies)"""
+    at = time.monotonic() + seconds
+    outer = _deadline.get()
+    token = _deadline.set(at if outer is None else min(at, outer))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def deadline_from_context(context, reserve=RESPONSE_RESERVE_SECONDS):
+    """deadline() for a Lambda invocation, keeping reserve seconds to respond
+    
+    Without a context (local or test invocations) DEFAULT_DEADLINE_SECONDS applies.
+    """
+    if context is None or not hasattr(context, 'get_remaining_time_in_millis'):
+        return deadline(DEFAULT_DEADLINE_SECONDS - reserve)
+    return deadline(context.get_remaining_time_in_millis() / 1000 - reserve)
+
+
+def time_left():
+    """Seconds until the current deadline, or None outside one"""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def budget(seconds):
+    """seconds, cut down to the time left before the deadline (never negative)"""
+    left = time_left()
+    return seconds if left is None else max(0.0, min(seconds, left))
+
+
+def is_retryable(exception):
+    """Connection errors, timeouts, rate limits and transient server errors"""
+    if isinstance(exception, (anthropic.APIConnectionError, openai.APIConnectionError)):
+        # Includes APITimeoutError in both SDKs
+        return True
+    if isinstance(exception, (anthropic.APIStatusError, openai.APIStatusError)):
+        return exception.status_code in RETRYABLE_STATUS
+    return False
+
+
+def _retry_after(exception):
+    response = getattr(exception, 'response', None)
+    try:
+        return float(response.headers.get('retry-after'))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def get_hedge_pool():
+    global _hedge_pool
+    with _hedge_pool_lock:
+        if _hedge_pool is None:
+            _hedge_pool = ThreadPoolExecutor(max_workers=HEDGE_WORKERS, thread_name_prefix='chief-hedge')
+        return _hedge_pool
+
+
+class CallPolicy:
+    def __init__(self, name, timeout, max_attempts=3, base_delay=0.5, max_delay=8.0, hedge=False):
+        self.name = name
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.hedge = hedge
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)  # seconds, successful attempts only
+    
+    def backoff(self, attempt, exception=None):
+        """Jittered exponential delay before retry number attempt + 1 (honours Retry-After)"""
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt) * (0.5 + random.random() / 2)
+        retry_after = _retry_after(exception)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+    
+    def hedge_delay(self):
+        """Recent p95 latency, once enough calls have been seen to trust it"""
+        with self.lock:
+            if not self.hedge or len(self.latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            return _percentile(self.latencies, HEDGE_PERCENTILE)
+    
+    def call(self, func, *args, timeout=None, max_attempts=None, **kwargs):
+        """func(*args, timeout=<seconds>, **kwargs) under this policy
+        
+        timeout, when given, caps this policy's per-attempt timeout;
+        max_attempts=1 is for requests that can't be re-sent (one-shot
+        streams). Raises DeadlineExceeded when the deadline leaves no room
+        for an attempt, otherwise the last attempt's error.
+        """
+        limit = self.timeout if timeout is None else min(self.timeout, timeout)
+        max_attempts = max_attempts or self.max_attempts
+        attempt = 0
+        while True:
+            attempt_timeout = budget(limit)
+            if attempt_timeout < MIN_CALL_SECONDS:
+                raise DeadlineExceeded(f"{self.name}: only {attempt_timeout:.1f}s left for the call")
+            
+            started = time.monotonic()
+            try:
+                result = self._attempt(func, args, kwargs, attempt_timeout)
+            except Exception as exception:
+                attempt += 1
+                if attempt >= max_attempts or not is_retryable(exception):
+                    raise
+                pause = self.backoff(attempt - 1, exception)
+                left = time_left()
+                if left is not None and left - pause < MIN_CALL_SECONDS:
+                    raise
+                _count(retries=1)
+                time.sleep(pause)
+                continue
+            
+            with self.lock:
+                self.latencies.append(time.monotonic() - started)
+            return result
+    
+    def _attempt(self, func, args, kwargs, timeout):
+        delay = self.hedge_delay()
+        if delay is None or delay >= timeout - MIN_CALL_SECONDS:
+            return func(*args, timeout=timeout, **kwargs)
+        
+        pool = get_hedge_pool()
+        started = time.monotonic()
+        first = pool.submit(wrap(func), *args, timeout=timeout, **kwargs)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+        
+        _count(hedges=1)
+        second = pool.submit(wrap(func), *args, timeout=timeout - (time.monotonic() - started), **kwargs)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+
+def _count(**counters):
+    """Add to counters on the enclosing trace span, if any"""
+    span = current_span()
+    if span is not None:
+        span.set(**{name: span.attributes.get(name, 0) + n for name, n in counters.items()})
+
+
+def _hedged_policies():
+    return set(filter(None, os.environ.get('CHIEF_HEDGED_CALLS', 'embeddings').split(',')))
+
+
+def build_policies(hedged=None):
+    hedged = _hedged_policies() if hedged is None else set(hedged)
+    policies = [
+        CallPolicy('anthropic', timeout=25.0, max_attempts=3, base_delay=1.0),
+        CallPolicy('anthropic_small', timeout=15.0, max_attempts=2, base_delay=1.0),  # extraction, summaries
+        CallPolicy('embeddings', timeout=10.0, max_attempts=3, base_delay=0.25, max_delay=2.0),
+        CallPolicy('whisper', timeout=120.0, max_attempts=2, base_delay=2.0),
+    ]
+    for policy in policies:
+        policy.hedge = policy.name in hedged
+    return {policy.name: policy for policy in policies}
+
+
+POLICIES = build_policies()
+
+
+def call(policy, func, *args, **kwargs):
+    """Run func under the named policy (or a CallPolicy instance)"""
+    policy = POLICIES[policy] if isinstance(policy, str) else policy
+    return policy.call(func, *args, **kwargs)
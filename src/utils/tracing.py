@@ -0,0 +1,350 @@
+"""Per-request latency tracing for CHIEF
+
+A trace covers one request (an SMS, a scheduled briefing); spans inside
+it time each external hop - Secrets Manager, DynamoDB, Qdrant, OpenAI,
+Anthropic, Google Calendar, Twilio. `span` works as a context manager or
+decorator and nests through contextvars, so spans opened in helpers are
+attributed to the right request without passing anything around.
+
+When a trace ends, one JSON line is written to stdout in CloudWatch
+Embedded Metric Format (per-service milliseconds and call counts become
+metrics, the span list rides along as properties). InMemoryExporter
+keeps finished traces for tests and benchmarks.
+
+boto3 calls are traced by instrument_boto3(), which hooks botocore's
+before-call/after-call events and records AWS request IDs and retries.
+"""
+import sys
+import json
+import time
+import uuid
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+
+NAMESPACE = "CHIEF"
+
+_current_trace = contextvars.ContextVar('chief_trace', default=None)
+_current_span = contextvars.ContextVar('chief_span', default=None)
+
+
+class Span:
+    def __init__(self, name, trace, parent, attributes):
+        self.name = name
+        self.service = name.split('.', 1)[0]
+        self.trace = trace
+        self.parent = parent
+        self.attributes = attributes
+        self.error = None
+        self.start = time.perf_counter()
+        self.end = None
+    
+    @property
+    def duration_ms(self):
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+    
+    def set(self, **attributes):
+        """Attach attributes (request_id, retries, bytes_in, bytes_out, ...)"""
+        self.attributes.update(attributes)
+        return self
+    
+    def record_response(self, response):
+        """Request ID and token usage from an Anthropic or OpenAI SDK response"""
+        self.attributes['request_id'] = getattr(response, '_request_id', None)
+        usage = getattr(response, 'usage', None)
+        for field in ('input_tokens', 'output_tokens', 'prompt_tokens', 'total_tokens'):
+            value = getattr(usage, field, None)
+            if isinstance(value, int):
+                self.attributes[field] = value
+        return response
+    
+    def to_dict(self):
+        return dict(
+            self.attributes,
+            name=self.name,
+            parent=self.parent.name if self.parent else None,
+            offset_ms=round((self.start - self.trace.start) * 1000, 1) if self.trace else 0.0,
+            duration_ms=round(self.duration_ms, 1),
+            error=self.error
+        )
+
+
+class Trace:
+    def __init__(self, name, request_id=None, **attributes):
+        self.name = name
+        self.request_id = request_id or str(uuid.uuid4())
+        self.attributes = attributes
+        self.spans = []
+        self.lock = threading.Lock()
+        self.timestamp = time.time()
+        self.start = time.perf_counter()
+        self.end = None
+    
+    @property
+    def duration_ms(self):
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+    
+    def add(self, span):
+        with self.lock:
+            self.spans.append(span)
+    
+    def breakdown(self):
+        """{service: {'ms': total, 'calls': n, 'retries': n}} over outermost spans of each service
+        
+        Concurrent calls are summed, so a service can exceed the request total.
+        """
+        services = {}
+        with self.lock:
+            spans = list(self.spans)
+        for span in spans:
+            # A span inside another span of the same service is already counted
+            parent = span.parent
+            while parent and parent.service != span.service:
+                parent = parent.parent
+            if parent:
+                continue
+            totals = services.setdefault(span.service, {'ms': 0.0, 'calls': 0, 'retries': 0})
+            totals['ms'] += span.duration_ms
+            totals['calls'] += 1
+            totals['retries'] += span.attributes.get('retries', 0)
+        return services
+    
+    def to_emf(self):
+        """One CloudWatch EMF document for the whole request"""
+        breakdown = self.breakdown()
+        metrics = [{'Name': 'TotalMs', 'Unit': 'Milliseconds'}]
+        document = dict(self.attributes, Operation=self.name, RequestId=self.request_id,
+                        TotalMs=round(self.duration_ms, 1))
+        
+        for service, totals in sorted(breakdown.items()):
+            metrics.append({'Name': f'{service}.Ms', 'Unit': 'Milliseconds'})
+            metrics.append({'Name': f'{service}.Calls', 'Unit': 'Count'})
+            document[f'{service}.Ms'] = round(totals['ms'], 1)
+            document[f'{service}.Calls'] = totals['calls']
+            if totals['retries']:
+                metrics.append({'Name': f'{service}.Retries', 'Unit': 'Count'})
+                document[f'{service}.Retries'] = totals['retries']
+        
+        with self.lock:
+            document['spans'] = [span.to_dict() for span in self.spans]
+        document['_aws'] = {
+            'Timestamp': int(self.timestamp * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': NAMESPACE,
+                'Dimensions': [['Operation']],
+                'Metrics': metrics
+            }]
+        }
+        return document
+
+
+class LogExporter:
+    """Writes each trace as one EMF line on stdout (CloudWatch Logs picks it up in Lambda)"""
+    
+    def __init__(self, stream=None):
+        self.stream = stream
+    
+    def export(self, trace):
+        stream = self.stream or sys.stdout
+        stream.write(json.dumps(trace.to_emf(), default=str) + "\n")
+        stream.flush()
+
+
+class InMemoryExporter:
+    """Keeps finished traces so tests and benchmarks can assert on the breakdown"""
+    
+    def __init__(self):
+        self.traces = []
+        self.lock = threading.Lock()
+    
+    def export(self, trace):
+        with self.lock:
+            self.traces.append(trace)
+    
+    def clear(self):
+        with self.lock:
+            self.traces = []
+    
+    @property
+    def last(self):
+        return self.traces[-1] if self.traces else None
+
+
+_exporters = [LogExporter()]
+
+
+def set_exporters(*exporters):
+    """Replace the exporters (e.g. set_exporters(InMemoryExporter()) in a benchmark)"""
+    _exporters[:] = exporters
+
+
+def add_exporter(exporter):
+    _exporters.append(exporter)
+
+
+def remove_exporter(exporter):
+    if exporter in _exporters:
+        _exporters.remove(exporter)
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+def current_span():
+    return _current_span.get()
+
+
+@contextmanager
+def trace_request(name, request_id=None, **attributes):
+    """Trace one request; exports it when the block exits
+    
+    Nested trace_request blocks (e.g. a handler calling another handler)
+    join the outer trace instead of starting a new one.
+    """
+    if _current_trace.get() is not None:
+        with span(name, **attributes) as s:
+            yield s.trace
+        return
+    
+    trace = Trace(name, request_id, **attributes)
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    except Exception as e:
+        trace.attributes['error'] = type(e).__name__
+        raise
+    finally:
+        trace.end = time.perf_counter()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        for exporter in list(_exporters):
+            try:
+                exporter.export(trace)
+            except Exception:
+                pass  # tracing must never break the request
+
+
+class span:
+    """Time a hop: `with span("qdrant.query_points", collection=c) as s:` or `@span("dynamodb.save")`
+    
+    Outside a trace the span is still timed but not recorded anywhere.
+    """
+    
+    def __init__(self, name, **attributes):
+        self.name = name
+        self.attributes = attributes
+        self._span = None
+        self._token = None
+    
+    def __enter__(self):
+        trace = _current_trace.get()
+        self._span = Span(self.name, trace, _current_span.get(), dict(self.attributes))
+        self._token = _current_span.set(self._span)
+        return self._span
+    
+    def __exit__(self, exc_type, exc, tb):
+        self._span.end = time.perf_counter()
+        if exc_type is not None:
+            self._span.error = exc_type.__name__
+        _current_span.reset(self._token)
+        if self._span.trace is not None:
+            self._span.trace.add(self._span)
+        return False
+    
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(self.name, **self.attributes):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def wrap(func):
+    """Bind func to the caller's trace context, for ThreadPoolExecutor.submit(wrap(fn), ...)"""
+    context = contextvars.copy_context()
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        # A copied context can only be entered by one thread at a time
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+
+def payload_size(value):
+    """Approximate bytes for a text, bytes or JSON-able payload"""
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    try:
+        return len(json.dumps(value, default=str).encode('utf-8'))
+    except (TypeError, ValueError):
+        return 0
+
+
+# --- boto3 -----------------------------------------------------------------
+
+_SPAN_KEY = 'chief_tracing_span'
+_instrumented = set()
+
+
+def _before_call(model, params, context, **kwargs):
+    service = model.service_model.endpoint_prefix
+    s = span(f"{service}.{model.name}", table=params.get('TableName'))
+    s.__enter__().set(bytes_in=payload_size(params))
+    context[_SPAN_KEY] = s
+
+
+def _finish(s, error):
+    s.__exit__(None, None, None)
+    s._span.error = error
+
+
+def _after_call(http_response, parsed, model, context, **kwargs):
+    s = context.pop(_SPAN_KEY, None)
+    if s is None:
+        return
+    parsed = parsed if isinstance(parsed, dict) else {}
+    metadata = parsed.get('ResponseMetadata', {})
+    s._span.set(
+        request_id=metadata.get('RequestId'),
+        retries=metadata.get('RetryAttempts', 0),
+        status=getattr(http_response, 'status_code', None),
+        bytes_out=len(getattr(http_response, 'content', b'') or b'')
+    )
+    _finish(s, parsed.get('Error', {}).get('Code'))
+
+
+def _after_call_error(exception, context, **kwargs):
+    s = context.pop(_SPAN_KEY, None)
+    if s is not None:
+        _finish(s, type(exception).__name__)
+
+
+def instrument_boto3(session=None):
+    """Trace every boto3 API call made through session (default: boto3's default session)
+    
+    Call once at import time of the entry point; boto3.client()/resource()
+    created afterwards inherit the hooks. Idempotent.
+    """
+    import boto3
+    
+    if session is None:
+        if boto3.DEFAULT_SESSION is None:
+            boto3.setup_default_session()
+        session = boto3.DEFAULT_SESSION
+    if id(session) in _instrumented:
+        return
+    events = session.events
+    events.register('before-call', _before_call, unique_id='chief-tracing-before')
+    events.register('after-call', _after_call, unique_id='chief-tracing-after')
+    events.register('after-call-error', _after_call_error, unique_id='chief-tracing-error')
+    _instrumented.add(id(session))
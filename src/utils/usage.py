@@ -0,0 +1,289 @@
+"""Token, audio and cost accounting for CHIEF's model calls
+
+Every Anthropic, embedding and Whisper call records its usage here,
+tagged with the feature that made it, the workspace and the request ID.
+Calls that don't name a feature themselves (embeddings) take the
+feature and workspace from the enclosing `tags(...)` block.
+Records are summed in memory and flushed once per request as ADD updates
+to daily aggregate items in chief_usage:
+
+    PK USAGE#<date>   SK <feature>#<workspace>#<model>
+    input_tokens, output_tokens, cache_read_tokens, cache_write_tokens,
+    audio_seconds, calls, cost_micros (millionths of a dollar)
+
+Per-request totals are also attached to the current trace, so they show
+up in that request's EMF log line.
+
+Features can be given a daily token budget in CHIEF_USAGE_BUDGETS
+(JSON, e.g. {"document_answer": 2000000}); once a feature has spent its
+budget, model_for() hands it the cheaper model for the rest of the day.
+"""
+import os
+import json
+import time
+import boto3
+import threading
+import contextvars
+from decimal import Decimal
+from contextlib import contextmanager
+from datetime import datetime
+
+from .tracing import current_trace
+from .call_policy import AWS_CONFIG
+
+
+TABLE_NAME = 'chief_usage'
+BUDGET_REFRESH_SECONDS = 60
+
+# USD per million tokens: (input, output, cache read, cache write)
+TOKEN_PRICES = {
+    'claude-sonnet-4-20250514': (3.00, 15.00, 0.30, 3.75),
+    'claude-3-5-haiku-20241022': (0.80, 4.00, 0.08, 1.00),
+    'text-embedding-3-small': (0.02, 0.0, 0.0, 0.0),
+}
+AUDIO_PRICES = {'whisper-1': 0.006 / 60}  # USD per second
+
+# Used when a feature is over budget
+CHEAPER_MODELS = {
+    'claude-sonnet-4-20250514': 'claude-3-5-haiku-20241022',
+}
+
+# Compressed audio without a known duration is estimated at 128 kbps
+ESTIMATED_AUDIO_BYTES_PER_SECOND = 16000
+
+COUNTERS = ('input_tokens', 'output_tokens', 'cache_read_tokens', 'cache_write_tokens',
+            'audio_seconds', 'calls', 'cost_micros')
+
+_tags = contextvars.ContextVar('chief_usage_tags', default={})
+
+
+def get_dynamodb():
+    return boto3.resource('dynamodb', region_name='us-east-1', config=AWS_CONFIG)
+
+
+def load_budgets():
+    raw = os.environ.get('CHIEF_USAGE_BUDGETS')
+    return {feature: int(tokens) for feature, tokens in json.loads(raw).items()} if raw else {}
+
+
+def cost_micros(model, input_tokens=0, output_tokens=0, cache_read_tokens=0, cache_write_tokens=0,
+                audio_seconds=0):
+    """Cost in millionths of a dollar (USD per million tokens x tokens)"""
+    if model in AUDIO_PRICES:
+        return int(round(audio_seconds * AUDIO_PRICES[model] * 1_000_000))
+    prices = TOKEN_PRICES.get(model)
+    if prices is None:
+        return 0
+    tokens = (input_tokens, output_tokens, cache_read_tokens, cache_write_tokens)
+    return int(round(sum(count * price for count, price in zip(tokens, prices))))
+
+
+def usage_from_response(response):
+    """Counters from an Anthropic or OpenAI SDK response (zeros when it has none)"""
+    usage = getattr(response, 'usage', None)
+    
+    def count(*fields):
+        for field in fields:
+            value = getattr(usage, field, None)
+            if isinstance(value, int):
+                return value
+        return 0
+    
+    return {
+        'input_tokens': count('input_tokens', 'prompt_tokens'),
+        'output_tokens': count('output_tokens', 'completion_tokens'),
+        'cache_read_tokens': count('cache_read_input_tokens'),
+        'cache_write_tokens': count('cache_creation_input_tokens'),
+    }
+
+
+@contextmanager
+def tags(feature=None, workspace=None):
+    """Default feature/workspace for usage recorded inside the block
+    
+    Carried into worker threads started with tracing.wrap.
+    """
+    current = dict(_tags.get())
+    if feature:
+        current['feature'] = feature
+    if workspace:
+        current['workspace'] = workspace
+    token = _tags.set(current)
+    try:
+        yield
+    finally:
+        _tags.reset(token)
+
+
+class UsageLedger:
+    def __init__(self, table_name=TABLE_NAME, budgets=None):
+        self.table_name = table_name
+        self._table = None
+        self.budgets = load_budgets() if budgets is None else budgets
+        self.lock = threading.Lock()
+        self.pending = {}     # (date, feature, workspace, model) -> counters
+        self.spent = {}       # feature -> tokens today, as of the last refresh
+        self.refreshed = {}   # feature -> (date, monotonic time)
+    
+    @property
+    def table(self):
+        if self._table is None:
+            self._table = get_dynamodb().Table(self.table_name)
+        return self._table
+    
+    def record(self, feature, model, response=None, workspace=None, audio_seconds=0, **counters):
+        """Add one call's usage; counters are read from response when given
+        
+        feature=None uses the enclosing tags() feature ('other' outside one).
+        """
+        values = dict.fromkeys(COUNTERS, 0)
+        if response is not None:
+            values.update(usage_from_response(response))
+        values.update(counters)
+        values['audio_seconds'] = round(audio_seconds, 1)
+        values['calls'] = 1
+        values['cost_micros'] = cost_micros(model, **{k: values[k] for k in COUNTERS[:5]})
+        
+        context = _tags.get()
+        feature = feature or context.get('feature') or 'other'
+        workspace = workspace or context.get('workspace') or 'none'
+        key = (datetime.utcnow().date().isoformat(), feature, workspace, model)
+        with self.lock:
+            totals = self.pending.setdefault(key, dict.fromkeys(COUNTERS, 0))
+            for name in COUNTERS:
+                totals[name] += values[name]
+        
+        trace = current_trace()
+        if trace is not None:
+            with trace.lock:
+                per_feature = trace.attributes.setdefault('usage', {}).setdefault(feature, {})
+                for name in ('input_tokens', 'output_tokens', 'audio_seconds', 'cost_micros'):
+                    per_feature[name] = per_feature.get(name, 0) + values[name]
+        return values
+    
+    def flush(self):
+        """Write pending totals as ADD updates to the daily aggregates"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        
+        written = 0
+        for key, totals in pending.items():
+            date, feature, workspace, model = key
+            counters = [name for name in COUNTERS if totals[name]]
+            try:
+                self._add(date, feature, workspace, model, totals, counters)
+            except Exception:
+                # Keep the totals for the next flush rather than dropping them
+                with self.lock:
+                    merged = self.pending.setdefault(key, dict.fromkeys(COUNTERS, 0))
+                    for name in COUNTERS:
+                        merged[name] += totals[name]
+                continue
+            written += 1
+            
+            with self.lock:
+                if feature in self.spent:
+                    self.spent[feature] += totals['input_tokens'] + totals['output_tokens']
+        return written
+    
+    def _add(self, date, feature, workspace, model, totals, counters):
+        self.table.update_item(
+            Key={'PK': f'USAGE#{date}', 'SK': f'{feature}#{workspace}#{model}'},
+            UpdateExpression='ADD ' + ', '.join(f'{name} :{name}' for name in counters)
+                             + ' SET feature = :f, workspace = :w, model = :m, updated_at = :ts',
+            ExpressionAttributeValues=dict(
+                {f':{name}': _number(totals[name]) for name in counters},
+                **{':f': feature, ':w': workspace, ':m': model, ':ts': datetime.utcnow().isoformat()}
+            )
+        )
+    
+    def daily_usage(self, date=None):
+        """Aggregate items for one day (default today)"""
+        date = date or datetime.utcnow().date().isoformat()
+        items = []
+        params = {
+            'KeyConditionExpression': 'PK = :pk',
+            'ExpressionAttributeValues': {':pk': f'USAGE#{date}'}
+        }
+        while True:
+            response = self.table.query(**params)
+            items.extend(response.get('Items', []))
+            if 'LastEvaluatedKey' not in response:
+                break
+            params['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        return items
+    
+    def _tokens_today(self, feature):
+        today = datetime.utcnow().date().isoformat()
+        date, refreshed = self.refreshed.get(feature, (None, 0))
+        if date != today or time.monotonic() - refreshed > BUDGET_REFRESH_SECONDS:
+            spent = sum(int(item.get('input_tokens', 0)) + int(item.get('output_tokens', 0))
+                        for item in self.daily_usage(today) if item.get('feature') == feature)
+            with self.lock:
+                self.spent[feature] = spent
+                self.refreshed[feature] = (today, time.monotonic())
+        
+        with self.lock:
+            unflushed = sum(t['input_tokens'] + t['output_tokens']
+                            for (date, f, _, _), t in self.pending.items() if f == feature and date == today)
+            return self.spent.get(feature, 0) + unflushed
+    
+    def model_for(self, feature, model):
+        """model, or its cheaper substitute once feature has spent its daily budget"""
+        budget = self.budgets.get(feature)
+        if budget is None or model not in CHEAPER_MODELS:
+            return model
+        try:
+            over = self._tokens_today(feature) >= budget
+        except Exception:
+            # Can't read the aggregates - don't block the call on accounting
+            return model
+        return CHEAPER_MODELS[model] if over else model
+
+
+def _number(value):
+    # DynamoDB rejects floats; audio seconds are kept to a tenth
+    return Decimal(str(value)) if isinstance(value, float) else value
+
+
+def estimate_audio_seconds(size_bytes):
+    return size_bytes / ESTIMATED_AUDIO_BYTES_PER_SECOND
+
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_usage_ledger():
+    """Process-wide ledger (reused across warm Lambda invocations)"""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = UsageLedger()
+        return _ledger
+
+
+def record_usage(feature, model, response=None, **kwargs):
+    """Record usage without letting accounting errors reach the caller"""
+    try:
+        return get_usage_ledger().record(feature, model, response, **kwargs)
+    except Exception:
+        return None
+
+
+def flush_usage():
+    """Write pending usage to the daily aggregates
+    
+    Call at the end of every request: there is no exit hook, because a
+    frozen Lambda process may never exit cleanly.
+    """
+    try:
+        return get_usage_ledger().flush()
+    except Exception:
+        # Aggregates are best-effort; the request already succeeded
+        return 0
+
+
+def model_for(feature, model):
+    return get_usage_ledger().model_for(feature, model)
+